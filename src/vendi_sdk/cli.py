@@ -0,0 +1,195 @@
+"""
+The `vendi` command line.
+`vendi complete` runs the completion requests of a JSONL file, or of the standard input, and streams their results as
+JSONL as they complete. The input is read as it arrives, so results are written while a pipe is still being fed.
+A line that is not a valid request is reported with its line number and written as a failed result, and the command
+exits with status 1 once the other requests ran:
+
+    $ vendi complete requests.jsonl -o results.jsonl --concurrency 64 --rpm 500
+"""
+import argparse
+import asyncio
+import sys
+import time
+from contextlib import contextmanager
+from itertools import count
+from typing import AsyncIterator, BinaryIO, Iterator, TextIO
+
+from vendi_sdk.completions.rate_limit import RateLimit, RateLimiter
+from vendi_sdk.completions.runner import result_line
+from vendi_sdk.completions.schema import CompletionRequest, CompletionResult
+from vendi_sdk.core import codec
+from vendi_sdk.core.retry import RetryPolicy
+from vendi_sdk.vendi import Vendi
+
+_READ_SIZE = 64 * 1024
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="vendi", description="The Vendi command line")
+    parser.add_argument("--api-key", help="The API key. Defaults to VENDI_API_KEY")
+    parser.add_argument("--api-url", help="The URL of the API. Defaults to VENDI_API_URL")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    complete = commands.add_parser(
+        "complete",
+        help="Run completion requests from JSONL",
+        description="Run the completion requests of a JSONL file, one CompletionRequest per line, and stream their "
+                    "results as JSONL as they complete. A summary is printed to stderr at the end, and the exit status "
+                    "is 1 if any line was not a valid request or any request failed",
+    )
+    complete.add_argument("input", nargs="?", default="-", help="The JSONL file of requests. Defaults to stdin")
+    complete.add_argument("-o", "--output", default="-", help="The JSONL file of results. Defaults to stdout")
+    complete.add_argument("-c", "--concurrency", type=int, default=32, help="The number of requests in flight")
+    complete.add_argument("--retries", type=int, default=2, help="The number of retries of a failed request")
+    complete.add_argument("--timeout", type=float, help="The timeout of every request attempt, in seconds")
+    complete.add_argument("--rpm", type=int, help="The maximum number of requests per minute, per model")
+    complete.add_argument("--tpm", type=int, help="The maximum number of tokens per minute, per model")
+    complete.set_defaults(handler=_complete)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+def _complete(args: argparse.Namespace) -> int:
+    rate_limiter = None
+    if args.rpm or args.tpm:
+        rate_limiter = RateLimiter(default=RateLimit(requests_per_minute=args.rpm, tokens_per_minute=args.tpm))
+    client = Vendi(
+        api_key=args.api_key,
+        api_url=args.api_url,
+        retry_policy=RetryPolicy(max_attempts=args.retries + 1),
+        timeout=args.timeout,
+        rate_limiter=rate_limiter,
+    )
+    stats = _RunStats()
+    with client, _open(args.input, "rb", sys.stdin.buffer) as source, \
+            _open(args.output, "wb", sys.stdout.buffer) as sink:
+        try:
+            asyncio.run(_run(client, _read_requests(source), sink, args.concurrency, stats))
+        except KeyboardInterrupt:
+            print("Interrupted", file=sys.stderr)
+    stats.report(sys.stderr)
+    return 1 if stats.failed else 0
+
+
+async def _run(
+    client: Vendi,
+    requests: AsyncIterator[CompletionRequest | ValueError],
+    sink: BinaryIO,
+    concurrency: int,
+    stats: "_RunStats",
+) -> None:
+    # A request starts when the client pulls it, i.e. when a slot is free
+    started_at: dict[int, float] = {}
+    # The position in the input of every request sent, by its index in the stream
+    positions: dict[int, int] = {}
+
+    async def _pull() -> AsyncIterator[CompletionRequest]:
+        sent = count()
+        position = -1
+        async for request in requests:
+            position += 1
+            if isinstance(request, ValueError):
+                print(f"{request}, skipped", file=sys.stderr)
+                _write(sink, stats, position, CompletionResult(index=position, error=request), 0.0)
+                continue
+            index = next(sent)
+            positions[index] = position
+            started_at[index] = time.monotonic()
+            yield request
+
+    async for result in client.completions.acreate_stream(_pull(), max_concurrency=concurrency):
+        _write(sink, stats, positions.pop(result.index), result, time.monotonic() - started_at.pop(result.index))
+
+
+def _write(sink: BinaryIO, stats: "_RunStats", position: int, result: CompletionResult, latency: float) -> None:
+    stats.record(result, latency)
+    sink.write(result_line(position, result))
+    sink.flush()
+
+
+async def _read_requests(source: BinaryIO) -> AsyncIterator[CompletionRequest | ValueError]:
+    """
+    Parse the requests of a JSONL document. A line that is not a valid request is yielded as the error it failed with
+    instead, with its line number, so that the other requests still run
+    """
+    number = 0
+    async for line in _read_lines(source):
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            yield codec.parse(CompletionRequest, line)
+        except ValueError as e:
+            yield ValueError(f"Line {number} is not a valid CompletionRequest: {e}")
+
+
+async def _read_lines(source: BinaryIO) -> AsyncIterator[bytes]:
+    """
+    The lines of a binary input, read in a worker thread so that waiting for a slow input does not block the event loop.
+    `read1` returns whatever is available, so the lines of a pipe are handed over as soon as they arrive
+    """
+    rest = b""
+    while chunk := await asyncio.to_thread(source.read1, _READ_SIZE):
+        lines = (rest + chunk).split(b"\n")
+        rest = lines.pop()
+        for line in lines:
+            yield line
+    if rest:
+        yield rest
+
+
+@contextmanager
+def _open(path: str, mode: str, default: BinaryIO) -> Iterator[BinaryIO]:
+    if path == "-":
+        yield default
+        return
+    with open(path, mode) as f:
+        yield f
+
+
+class _RunStats:
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.succeeded = 0
+        self.failed = 0
+        self.latencies: list[float] = []
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def record(self, result: CompletionResult, latency: float) -> None:
+        if not result.ok:
+            self.failed += 1
+            return
+        self.succeeded += 1
+        self.latencies.append(latency)
+        usage = result.response.usage
+        if usage is not None:
+            self.prompt_tokens += usage.prompt_tokens
+            self.completion_tokens += usage.completion_tokens
+
+    def report(self, out: TextIO) -> None:
+        elapsed = time.monotonic() - self.started_at
+        total = self.succeeded + self.failed
+        print(
+            f"{total} requests ({self.succeeded} succeeded, {self.failed} failed) in {elapsed:.1f}s, "
+            f"{total / elapsed if elapsed else 0:.1f} requests/s",
+            file=out,
+        )
+        if self.latencies:
+            latencies = sorted(self.latencies)
+            percentiles = ", ".join(
+                f"p{p} {latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))]:.2f}s" for p in (50, 90, 99)
+            )
+            print(f"Latency: {percentiles}, max {latencies[-1]:.2f}s", file=out)
+        print(
+            f"Tokens: {self.prompt_tokens} prompt + {self.completion_tokens} completion = "
+            f"{self.prompt_tokens + self.completion_tokens} total, "
+            f"{self.completion_tokens / elapsed if elapsed else 0:.1f} completion tokens/s",
+            file=out,
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
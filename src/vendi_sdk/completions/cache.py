@@ -0,0 +1,269 @@
+"""
+Opt-in cache of completion responses, keyed by a canonical hash of the request payload.
+Responses are kept in an in-process LRU tier and, optionally, in a bounded SQLite file shared between processes.
+A cached response was generated for another request with the same fingerprint, so its `request_id` is rewritten to the
+one of the request it answers.
+"""
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from vendi_sdk.core import codec
+
+NON_SEMANTIC_FIELDS = frozenset({"request_id"})
+"""Payload fields that do not change the generated completion and are left out of the cache key."""
+
+
+def request_fingerprint(payload: dict) -> str:
+    """
+    A canonical hash of a completion request payload. Equal requests have equal fingerprints regardless of the
+    order of their keys
+    """
+    body = {k: v for k, v in payload.items() if k not in NON_SEMANTIC_FIELDS}
+    return hashlib.sha256(codec.dumps(body, sort_keys=True)).hexdigest()
+
+
+def with_request_id(response: Any, request_id: str | None) -> Any:
+    """
+    Give a cached or shared response the request ID of the request it answers, instead of the one of the request it was
+    generated for
+    :param response: A freshly parsed response, changed in place
+    :return: The response
+    """
+    parameters = getattr(response, "parameters", None)
+    if isinstance(parameters, dict) and "request_id" in parameters:
+        parameters["request_id"] = request_id
+    return response
+
+
+def is_deterministic(payload: dict) -> bool:
+    """
+    Whether a completion request payload asks for greedy decoding, so that the same request gets the same answer
+    """
+    return payload.get("temperature") == 0
+
+
+class CacheStats:
+    """
+    Thread-safe hit and miss counters of a CompletionCache
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.memory_hits = 0
+        """The number of lookups served from the in-process tier."""
+        self.disk_hits = 0
+        """The number of lookups served from the SQLite tier."""
+        self.misses = 0
+        """The number of lookups not found in any tier."""
+        self.evictions = 0
+        """The number of entries evicted from the in-process tier to respect its size."""
+        self.disk_evictions = 0
+        """The number of entries evicted from the SQLite tier to respect its size."""
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def record(self, counter: str, count: int = 1) -> None:
+        with self.__lock:
+            setattr(self, counter, getattr(self, counter) + count)
+
+    def snapshot(self) -> dict:
+        """
+        Get a consistent copy of the counters
+        """
+        with self.__lock:
+            return {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions,
+                "hit_rate": self.hit_rate,
+            }
+
+
+class _SQLiteStore:
+    """
+    Persistent tier. Every thread uses its own connection, and WAL mode lets several processes share the file.
+    Replacing an entry gives it a new rowid, so the rowids order the entries from the oldest written
+    """
+
+    def __init__(self, path: str, ttl: float | None, max_entries: int | None):
+        self.__path = path
+        self.__ttl = ttl
+        self.__max_entries = max_entries
+        self.__local = threading.local()
+        self.__writes = 0
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS completions (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self.__local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.__path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.__local.connection = connection
+        return connection
+
+    def get(self, key: str) -> tuple[bytes, float | None] | None:
+        return self._connection().execute(
+            "SELECT value, expires_at FROM completions WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+
+    def set(self, key: str, value: bytes) -> int:
+        """
+        :return: The number of entries evicted to respect the size of the tier
+        """
+        expires_at = time.time() + self.__ttl if self.__ttl is not None else None
+        connection = self._connection()
+        rowid = connection.execute(
+            "INSERT OR REPLACE INTO completions (key, value, expires_at) VALUES (?, ?, ?)", (key, value, expires_at)
+        ).lastrowid
+        self.__writes += 1
+        if self.__writes % 1000 == 0:
+            connection.execute("DELETE FROM completions WHERE expires_at <= ?", (time.time(),))
+        if self.__max_entries is None:
+            return 0
+        # A range scan of the rowids, it keeps at most the newest max_entries entries
+        return connection.execute("DELETE FROM completions WHERE rowid <= ?", (rowid - self.__max_entries,)).rowcount
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM completions")
+
+
+class CompletionCache:
+    """
+    A two-tier cache of completion responses.
+    Lookups check the in-process LRU first, then the SQLite file if a path was given. Disk hits are promoted to memory.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float | None = 3600,
+        path: str | None = None,
+        deterministic_only: bool = True,
+        max_disk_entries: int | None = 100_000,
+    ):
+        """
+        :param max_entries: The maximum number of responses kept in memory. The least recently used ones are evicted
+        :param ttl: How long a response stays valid, in seconds. None keeps it forever
+        :param path: The path of a SQLite file to also persist the responses to. It can be shared by several
+        processes. None keeps the cache in memory only
+        :param max_disk_entries: The maximum number of responses kept in the SQLite file. The oldest written ones are
+        evicted. None lets the file grow without bound
+        :param deterministic_only: Only cache requests with temperature 0. Sampled requests are expected to return
+        a different completion every time
+        """
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.deterministic_only = deterministic_only
+        self.stats = CacheStats()
+        self.__entries: OrderedDict[str, tuple[float | None, bytes]] = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__store = _SQLiteStore(path, ttl, max_disk_entries) if path else None
+
+    def accepts(self, payload: dict) -> bool:
+        """
+        Whether responses to this request payload may be cached
+        """
+        return not self.deterministic_only or is_deterministic(payload)
+
+    def get(self, key: str) -> bytes | None:
+        """
+        Get a cached response by its request fingerprint
+        :return: The raw JSON response, or None on a miss
+        """
+        value = self.__memory_get(key)
+        if value is None and self.__store is not None:
+            value = self.__disk_get(key)
+        if value is None:
+            self.stats.record("misses")
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        """
+        Cache a raw JSON response under its request fingerprint
+        """
+        self.__memory_set(key, value, time.time() + self.ttl if self.ttl is not None else None)
+        if self.__store is not None:
+            evicted = self.__store.set(key, value)
+            if evicted:
+                self.stats.record("disk_evictions", evicted)
+
+    async def aget(self, key: str) -> bytes | None:
+        """
+        Same as get, without blocking the event loop on the SQLite tier
+        """
+        value = self.__memory_get(key)
+        if value is None and self.__store is not None:
+            value = await asyncio.to_thread(self.__disk_get, key)
+        if value is None:
+            self.stats.record("misses")
+        return value
+
+    async def aset(self, key: str, value: bytes) -> None:
+        """
+        Same as set, without blocking the event loop on the SQLite tier
+        """
+        if self.__store is None:
+            return self.set(key, value)
+        await asyncio.to_thread(self.set, key, value)
+
+    def clear(self) -> None:
+        """
+        Remove all the cached responses from every tier
+        """
+        with self.__lock:
+            self.__entries.clear()
+        if self.__store is not None:
+            self.__store.clear()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __memory_get(self, key: str) -> bytes | None:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self.__entries[key]
+                return None
+            self.__entries.move_to_end(key)
+        self.stats.record("memory_hits")
+        return value
+
+    def __disk_get(self, key: str) -> bytes | None:
+        row = self.__store.get(key)
+        if row is None:
+            return None
+        value, expires_at = row
+        self.stats.record("disk_hits")
+        self.__memory_set(key, value, expires_at)
+        return value
+
+    def __memory_set(self, key: str, value: bytes, expires_at: float | None) -> None:
+        with self.__lock:
+            self.__entries[key] = (expires_at, value)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+                self.stats.record("evictions")
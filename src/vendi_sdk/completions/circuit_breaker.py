@@ -0,0 +1,252 @@
+"""
+Circuit breakers of the completion requests, one per model (i.e. per provider and model).
+While a provider is down, its circuit opens and the requests to it fail fast with a CircuitOpenError instead of piling
+up until they time out. After a while a few trial requests are let through, and the circuit closes again if they
+succeed.
+"""
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable
+
+from vendi_sdk.core.retry import status_code
+from vendi_sdk.core.timeouts import DeadlineExceeded
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    """Requests go through and their outcomes are recorded."""
+    OPEN = "open"
+    """Requests fail fast without being sent."""
+    HALF_OPEN = "half_open"
+    """A few trial requests go through to check whether the endpoint recovered."""
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of sending a request while the circuit of its model is open
+    """
+
+    def __init__(self, key: str, retry_after: float):
+        super().__init__(f"The circuit of {key} is open, retry in {retry_after:.1f}s")
+        self.key = key
+        """The model whose circuit is open."""
+        self.retry_after = retry_after
+        """How long until the circuit lets trial requests through, in seconds."""
+
+
+def is_failure(exc: BaseException) -> bool:
+    """
+    Whether an error tells that the endpoint is unhealthy. Client errors (4xx) are the caller's fault and do not count
+    """
+    if not isinstance(exc, Exception) or isinstance(exc, (CircuitOpenError, DeadlineExceeded)):
+        return False
+    status = status_code(exc)
+    return status is None or status >= 500
+
+
+class _Circuit:
+    __slots__ = ("state", "outcomes", "opened_at", "trials", "trial_successes", "generation")
+
+    def __init__(self, window_size: int):
+        self.state = CircuitState.CLOSED
+        self.outcomes: deque[tuple[bool, bool]] = deque(maxlen=window_size)
+        self.opened_at = 0.0
+        self.trials = 0
+        self.trial_successes = 0
+        self.generation = 0
+
+
+class CircuitPermit:
+    """
+    The permission of a request to go through a circuit. Report its outcome to the breaker exactly once
+    """
+
+    __slots__ = ("key", "generation")
+
+    def __init__(self, key: str, generation: int):
+        self.key = key
+        self.generation = generation
+
+
+class CircuitBreaker:
+    """
+    A registry of circuits keyed by model, sharing the same thresholds. Thread-safe
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        slow_call_rate_threshold: float = 1.0,
+        slow_call_duration: float = 30.0,
+        window_size: int = 20,
+        minimum_calls: int = 10,
+        open_duration: float = 30.0,
+        half_open_calls: int = 3,
+        on_state_change: Callable[[str, CircuitState, CircuitState], None] | None = None,
+    ):
+        """
+        :param failure_rate_threshold: The share of failed requests in the window that opens the circuit
+        :param slow_call_rate_threshold: The share of slow requests in the window that opens the circuit
+        :param slow_call_duration: The latency above which a request is slow, in seconds
+        :param window_size: The number of recent requests the rates are computed on
+        :param minimum_calls: The number of requests to observe before the rates can open the circuit
+        :param open_duration: How long an open circuit fails fast before letting trial requests through, in seconds
+        :param half_open_calls: The number of trial requests that must succeed to close the circuit again
+        :param on_state_change: Called with the model, the previous state and the new state whenever a circuit
+        changes state, e.g. for alerting. It must not block
+        """
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.slow_call_duration = slow_call_duration
+        self.window_size = window_size
+        self.minimum_calls = minimum_calls
+        self.open_duration = open_duration
+        self.half_open_calls = half_open_calls
+        self.on_state_change = on_state_change
+        self.__circuits: dict[str, _Circuit] = {}
+        self.__lock = threading.Lock()
+
+    def state(self, key: str) -> CircuitState:
+        """
+        The current state of the circuit of a model
+        """
+        with self.__lock:
+            circuit = self.__circuits.get(key)
+            return circuit.state if circuit is not None else CircuitState.CLOSED
+
+    def is_open(self, key: str) -> bool:
+        """
+        Whether the requests to a model currently fail fast, i.e. its circuit is open and not due for trial requests
+        """
+        with self.__lock:
+            circuit = self.__circuits.get(key)
+            return (
+                circuit is not None
+                and circuit.state == CircuitState.OPEN
+                and time.monotonic() < circuit.opened_at + self.open_duration
+            )
+
+    def acquire(self, key: str) -> CircuitPermit:
+        """
+        Ask for a request to go through the circuit of a model
+        :raises CircuitOpenError: If the circuit is open, or half-open with all its trial requests in flight
+        """
+        with self.__lock:
+            circuit = self.__circuit(key)
+            transition = None
+            if circuit.state == CircuitState.OPEN:
+                retry_after = circuit.opened_at + self.open_duration - time.monotonic()
+                if retry_after > 0:
+                    raise CircuitOpenError(key, retry_after)
+                transition = self.__transition(key, circuit, CircuitState.HALF_OPEN)
+            if circuit.state == CircuitState.HALF_OPEN:
+                if circuit.trials >= self.half_open_calls:
+                    raise CircuitOpenError(key, 0.0)
+                circuit.trials += 1
+            permit = CircuitPermit(key, circuit.generation)
+        self.__notify(transition)
+        return permit
+
+    def record_success(self, permit: CircuitPermit, duration: float | None = None) -> None:
+        """
+        Report that a request succeeded
+        :param duration: The latency of the request, in seconds. None if it should not be checked for slowness
+        """
+        slow = duration is not None and duration >= self.slow_call_duration
+        self.__record(permit, failed=False, slow=slow)
+
+    def record_failure(self, permit: CircuitPermit) -> None:
+        """
+        Report that a request failed because of the endpoint
+        """
+        self.__record(permit, failed=True, slow=False)
+
+    def release(self, permit: CircuitPermit) -> None:
+        """
+        Give back a permit without an outcome, e.g. when the request was cancelled or was invalid
+        """
+        with self.__lock:
+            circuit = self.__circuit(permit.key)
+            if circuit.generation == permit.generation and circuit.state == CircuitState.HALF_OPEN:
+                circuit.trials -= 1
+
+    def reset(self, key: str | None = None) -> None:
+        """
+        Close the circuit of a model, or of all the models
+        """
+        with self.__lock:
+            keys = [key] if key is not None else list(self.__circuits)
+            transitions = [
+                self.__transition(k, self.__circuit(k), CircuitState.CLOSED)
+                for k in keys
+                if self.__circuit(k).state != CircuitState.CLOSED
+            ]
+        for transition in transitions:
+            self.__notify(transition)
+
+    def snapshot(self) -> dict[str, dict]:
+        """
+        Get a consistent copy of the state and rates of every circuit
+        """
+        with self.__lock:
+            return {
+                key: {
+                    "state": circuit.state,
+                    "calls": len(circuit.outcomes),
+                    "failure_rate": self.__rate(circuit, 0),
+                    "slow_call_rate": self.__rate(circuit, 1),
+                }
+                for key, circuit in self.__circuits.items()
+            }
+
+    def __record(self, permit: CircuitPermit, failed: bool, slow: bool) -> None:
+        with self.__lock:
+            circuit = self.__circuit(permit.key)
+            if circuit.generation != permit.generation:
+                # The request started before the circuit changed state, its outcome is stale
+                return
+            transition = None
+            if circuit.state == CircuitState.HALF_OPEN:
+                if failed or slow:
+                    transition = self.__transition(permit.key, circuit, CircuitState.OPEN)
+                else:
+                    circuit.trial_successes += 1
+                    if circuit.trial_successes >= self.half_open_calls:
+                        transition = self.__transition(permit.key, circuit, CircuitState.CLOSED)
+            elif circuit.state == CircuitState.CLOSED:
+                circuit.outcomes.append((failed, slow))
+                if len(circuit.outcomes) >= self.minimum_calls and (
+                    self.__rate(circuit, 0) >= self.failure_rate_threshold
+                    or self.__rate(circuit, 1) >= self.slow_call_rate_threshold
+                ):
+                    transition = self.__transition(permit.key, circuit, CircuitState.OPEN)
+        self.__notify(transition)
+
+    def __circuit(self, key: str) -> _Circuit:
+        circuit = self.__circuits.get(key)
+        if circuit is None:
+            circuit = self.__circuits[key] = _Circuit(self.window_size)
+        return circuit
+
+    def __transition(self, key: str, circuit: _Circuit, state: CircuitState) -> tuple:
+        previous = circuit.state
+        circuit.state = state
+        circuit.generation += 1
+        circuit.trials = circuit.trial_successes = 0
+        if state == CircuitState.OPEN:
+            circuit.opened_at = time.monotonic()
+        if state == CircuitState.CLOSED:
+            circuit.outcomes.clear()
+        return key, previous, state
+
+    def __notify(self, transition: tuple | None) -> None:
+        if transition is not None and self.on_state_change is not None:
+            self.on_state_change(*transition)
+
+    @staticmethod
+    def __rate(circuit: _Circuit, index: int) -> float:
+        if not circuit.outcomes:
+            return 0.0
+        return sum(outcome[index] for outcome in circuit.outcomes) / len(circuit.outcomes)
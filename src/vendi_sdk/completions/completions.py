@@ -1,12 +1,32 @@
 import asyncio
+import concurrent.futures
+import contextvars
+import threading
 import time
 import uuid
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable, AsyncIterable, AsyncIterator, Callable, Literal, Any
+
+import requests
 
 from vendi_sdk.completions.schema import ChatCompletion, ModelParameters, BatchInference, BatchInferenceStatus, \
-    CompletionRequest, Endpoint, VendiCompletionResponse
-from vendi_sdk.core.ahttp_client import AsyncHTTPClient
+    CompletionRequest, Endpoint, VendiCompletionResponse, CompletionResult, CompletionUsage, CompletionMetadata
+from vendi_sdk.completions.cache import CompletionCache, request_fingerprint, is_deterministic, with_request_id
+from vendi_sdk.completions.circuit_breaker import CircuitBreaker, CircuitPermit, is_failure
+from vendi_sdk.completions.concurrency import AdaptiveConcurrencyLimiter, is_overload
+from vendi_sdk.completions.hedging import HedgingPolicy
+from vendi_sdk.completions.rate_limit import RateLimiter, Reservation
+from vendi_sdk.completions.router import ModelRouter
+from vendi_sdk.completions.scheduler import Priority, PriorityScheduler, priority as _priority
+from vendi_sdk.completions.streaming import CompletionStream, AsyncCompletionStream
+from vendi_sdk.completions.structured import SchemaLike, StructuredOutputError, schema_registry
+from vendi_sdk.core import codec
+from vendi_sdk.core.ahttp_client import AsyncHTTPClient, AsyncConnectionPool
+from vendi_sdk.core.config import vendi_config
+from vendi_sdk.core.event_loop import BackgroundEventLoop
 from vendi_sdk.core.http_client import HttpClient
+from vendi_sdk.core.retry import RetryPolicy
+from vendi_sdk.core.singleflight import SingleFlight, AsyncSingleFlight
+from vendi_sdk.core.timeouts import Timeout, check_deadline, deadline as _deadline
 
 
 class Completions:
@@ -14,21 +34,131 @@ class Completions:
     Completions is the client to interact with the completions endpoint of the Vendi API.
     """
 
-    def __init__(self, url: str, api_key: str):
+    def __init__(
+        self,
+        url: str,
+        api_key: str,
+        session: requests.Session | None = None,
+        async_pool: AsyncConnectionPool | None = None,
+        retry_policy: RetryPolicy | None = None,
+        timeout: Timeout | float | None = None,
+        cache: CompletionCache | None = None,
+        coalesce_requests: bool = False,
+        rate_limiter: RateLimiter | None = None,
+        concurrency_limiter: AdaptiveConcurrencyLimiter | None = None,
+        hedging: HedgingPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        event_loop: BackgroundEventLoop | None = None,
+        scheduler: PriorityScheduler | None = None,
+    ):
         """
         Initialize the Completions client
         :param url: The URL of the Vendi API
         :param api_key: The API key to use for authentication
+        :param session: A pooled session to share with other clients. A private one is created if not provided
+        :param async_pool: An async connection pool to share with other clients. A private one is created if not provided
+        :param retry_policy: The retry policy applied to both the sync and async requests
+        :param timeout: The default timeout of every request attempt, either a Timeout or a number of seconds bounding
+        both the connection and every read. Defaults to `VENDI_HTTP_CONNECT_TIMEOUT` and `VENDI_HTTP_READ_TIMEOUT`
+        :param cache: An opt-in cache of the completion responses. Disabled if not provided
+        :param coalesce_requests: Whether concurrent identical deterministic requests (temperature 0) share a single
+        API call instead of each sending their own
+        :param rate_limiter: A client-side limiter of the requests and tokens per minute, consulted before every
+        completion request. It can be shared with other clients, threads and event loops
+        :param concurrency_limiter: An adaptive limit of the completion requests in flight, tuned from their latency
+        and overload errors
+        :param hedging: A policy to send a duplicate of the async completion requests that are slower than usual, and
+        keep the first response. Disabled if not provided
+        :param circuit_breaker: Circuit breakers per model, which fail the requests fast with a CircuitOpenError while
+        the model endpoint is down. Disabled if not provided
+        :param event_loop: The background event loop running the async fan-out of the sync bulk APIs. A private one is
+        started on first use if not provided
+        :param scheduler: Priority lanes sharing a concurrency budget, so that the bulk requests cannot starve the
+        interactive ones. Disabled if not provided
         """
         self.__api_key = api_key
         self.__client = HttpClient(
             url=url,
             api_key=api_key,
+            session=session,
+            retry_policy=retry_policy,
+            timeout=timeout,
         )
         self.__aclient = AsyncHTTPClient(
             base_url=url,
+            pool=async_pool,
+            retry_policy=retry_policy,
+            timeout=timeout,
         )
         self.__aclient.set_auth_header(api_key)
+        self.__cache = cache
+        self.__coalesce_requests = coalesce_requests
+        self.__single_flight = SingleFlight()
+        self.__asingle_flight = AsyncSingleFlight()
+        self.__rate_limiter = rate_limiter
+        self.__concurrency_limiter = concurrency_limiter
+        self.__hedging = hedging
+        self.__circuit_breaker = circuit_breaker
+        self.__event_loop = event_loop or BackgroundEventLoop()
+        self.__scheduler = scheduler
+
+    @property
+    def cache(self) -> CompletionCache | None:
+        """
+        The response cache of the client, if any. Use `cache.stats` to get its hit/miss statistics
+        """
+        return self.__cache
+
+    @property
+    def rate_limiter(self) -> RateLimiter | None:
+        """
+        The client-side rate limiter of the completion requests, if any
+        """
+        return self.__rate_limiter
+
+    @property
+    def concurrency_limiter(self) -> AdaptiveConcurrencyLimiter | None:
+        """
+        The adaptive concurrency limiter of the completion requests, if any. Its `limit` is the current number of
+        requests allowed in flight
+        """
+        return self.__concurrency_limiter
+
+    @property
+    def hedging(self) -> HedgingPolicy | None:
+        """
+        The hedging policy of the async completion requests, if any. Use `hedging.snapshot()` to get its statistics
+        """
+        return self.__hedging
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker | None:
+        """
+        The circuit breakers of the models, if any. Use `circuit_breaker.snapshot()` to get their states
+        """
+        return self.__circuit_breaker
+
+    @property
+    def scheduler(self) -> PriorityScheduler | None:
+        """
+        The priority lanes of the completion requests, if any. Use `scheduler.snapshot()` to get their queue depths
+        and wait times
+        """
+        return self.__scheduler
+
+    @property
+    def event_loop(self) -> BackgroundEventLoop:
+        """
+        The background event loop running the async fan-out of the sync bulk APIs
+        """
+        return self.__event_loop
+
+    @property
+    def coalesced_requests(self) -> int:
+        """
+        The number of requests that were served by an identical in-flight request instead of calling the API
+        """
+        return self.__single_flight.coalesced + self.__asingle_flight.coalesced
 
     def create(
         self,
@@ -49,7 +179,11 @@ class Completions:
         openai_compatible: bool = False,
         extra_body: Optional[Dict] = None,
         extra_headers: Optional[Dict] = None,
-    ) -> VendiCompletionResponse | ChatCompletion:
+        stream: bool = False,
+        bypass_cache: bool = False,
+        timeout: Timeout | float | None = None,
+        priority: Priority | str | None = None,
+    ) -> VendiCompletionResponse | ChatCompletion | CompletionStream:
         """
         Create a completion on a language model with the given parameters
         :param model: The ID of the language model to use for the completion. Should be in the format of <provider>/<model_id>
@@ -71,7 +205,16 @@ class Completions:
         :param openai_compatible: Whether to return the response in OpenAI compatible format or the vendi full response format
         :param extra_body: Extra body parameters to include in the request body
         :param extra_headers: Extra headers to include in the request
-        :return: The generated completion
+        :param stream: Whether to stream the completion. If True, an iterator of chunks is returned as soon as the
+        generation starts, and the aggregated completion is available from its `final_response` once consumed
+        :param bypass_cache: Whether to skip the response cache for this call, if the client has one.
+        Streamed completions are never cached
+        :param timeout: The timeout of every attempt of the request, either a Timeout or a number of seconds bounding
+        both the connection and every read. Defaults to the timeout of the client. Wrap the call in
+        `vendi_sdk.core.timeouts.deadline` to bound it as a whole, retries and limiter waits included
+        :param priority: The lane of the request in the scheduler of the client, if any. Defaults to the priority of
+        the current context, see `vendi_sdk.completions.scheduler.priority`
+        :return: The generated completion, or a CompletionStream if stream is True
 
         """
         data = {
@@ -96,15 +239,27 @@ class Completions:
         if stop is not None:
             data["stop"] = stop
 
-        _res = self.__client.post(
-            uri=f"/v1/chat/completions",
-            json_data=data,
-            headers=extra_headers
-        )
+        with _priority(priority):
+            if stream:
+                data["stream"] = True
+                admission = self.__admit(data)
+                started_at = time.time()
+                try:
+                    response = self.__client.stream(
+                        "POST",
+                        uri=f"/v1/chat/completions",
+                        json_data=data,
+                        headers=extra_headers,
+                        timeout=timeout,
+                    )
+                except BaseException as e:
+                    self.__settle(admission, error=e)
+                    raise
+                return CompletionStream(
+                    response, model, openai_compatible, started_at, on_finish=self.__stream_settler(admission)
+                )
 
-        if openai_compatible:
-            return ChatCompletion(**_res)
-        return VendiCompletionResponse(**_res)
+            return self.__post_completion(data, extra_headers, bypass_cache, timeout)
 
     async def acreate(
         self,
@@ -125,9 +280,14 @@ class Completions:
         openai_compatible: bool = False,
         extra_body: Optional[Dict] = None,
         extra_headers: Optional[Dict] = None,
-    ) -> VendiCompletionResponse | ChatCompletion:
+        stream: bool = False,
+        bypass_cache: bool = False,
+        timeout: Timeout | float | None = None,
+        priority: Priority | str | None = None,
+    ) -> VendiCompletionResponse | ChatCompletion | AsyncCompletionStream:
         """
-        Same documentation as completions.create but with async operation
+        Same documentation as completions.create but with async operation.
+        With `stream=True` an async iterator of chunks is returned, to be consumed with `async for`
         """
 
         data = {
@@ -153,22 +313,390 @@ class Completions:
         if stop is not None:
             data["stop"] = stop
 
-        _res = await self.__aclient.post(
-            path=f"/v1/chat/completions",
-            json=data,
-            headers=extra_headers
+        with _priority(priority):
+            if stream:
+                data["stream"] = True
+                admission = await self.__aadmit(data)
+                started_at = time.time()
+                try:
+                    response = await self.__aclient.stream(
+                        "POST",
+                        path=f"/v1/chat/completions",
+                        json=data,
+                        headers=extra_headers,
+                        timeout=timeout,
+                    )
+                except BaseException as e:
+                    self.__settle(admission, error=e)
+                    raise
+                return AsyncCompletionStream(
+                    response, model, openai_compatible, started_at, on_finish=self.__stream_settler(admission)
+                )
+
+            return await self.__apost_completion(data, extra_headers, bypass_cache, timeout)
+
+    def __post_completion(
+        self, data: dict, headers: Optional[Dict], bypass_cache: bool, timeout: Timeout | float | None = None
+    ) -> VendiCompletionResponse | ChatCompletion:
+        response_type = ChatCompletion if data.get("openai_compatible") else VendiCompletionResponse
+        use_cache = self.__use_cache(data, bypass_cache)
+        coalesces = self.__coalesces(data)
+        if not use_cache and not coalesces:
+            return codec.parse(response_type, self.__send(data, headers, timeout))
+
+        cache_key = request_fingerprint(data)
+        raw = self.__cache.get(cache_key) if use_cache else None
+        if raw is None:
+            def _fetch() -> bytes:
+                _raw = self.__send(data, headers, timeout)
+                if use_cache:
+                    self.__cache.set(cache_key, _raw)
+                return _raw
+
+            if coalesces:
+                raw = self.__single_flight.do(self.__flight_key(cache_key, headers), _fetch)
+            else:
+                raw = _fetch()
+        # The response may have been generated for another request with the same fingerprint
+        return with_request_id(codec.parse(response_type, raw), data.get("request_id"))
+
+    async def __apost_completion(
+        self, data: dict, headers: Optional[Dict], bypass_cache: bool, timeout: Timeout | float | None = None
+    ) -> VendiCompletionResponse | ChatCompletion:
+        response_type = ChatCompletion if data.get("openai_compatible") else VendiCompletionResponse
+        use_cache = self.__use_cache(data, bypass_cache)
+        coalesces = self.__coalesces(data)
+        if not use_cache and not coalesces:
+            raw, _ = await self.__afetch(data, headers, timeout)
+            return codec.parse(response_type, raw)
+
+        cache_key = request_fingerprint(data)
+        raw = await self.__cache.aget(cache_key) if use_cache else None
+        if raw is None:
+            led = False
+
+            async def _fetch() -> tuple[bytes, bool]:
+                nonlocal led
+                led = True
+                _raw, substituted = await self.__afetch(data, headers, timeout)
+                # The response of the fallback model of a hedge does not answer the next identical requests
+                if use_cache and not substituted:
+                    await self.__cache.aset(cache_key, _raw)
+                return _raw, substituted
+
+            if coalesces:
+                raw, substituted = await self.__asingle_flight.do(self.__flight_key(cache_key, headers), _fetch)
+                if substituted and not led:
+                    # Only the caller that sent the request accepted an answer from the fallback model
+                    raw, _ = await _fetch()
+            else:
+                raw, _ = await _fetch()
+        # The response may have been generated for another request with the same fingerprint
+        return with_request_id(codec.parse(response_type, raw), data.get("request_id"))
+
+    def __send(self, data: dict, headers: Optional[Dict], timeout: Timeout | float | None = None) -> bytes:
+        """
+        Send a completion request to the API, through the rate and concurrency limiters if any
+        :return: The raw JSON response
+        """
+        admission = self.__admit(data)
+        started_at = time.monotonic()
+        try:
+            raw = self.__client.post(
+                uri=f"/v1/chat/completions",
+                json_data=data,
+                headers=headers,
+                response_type=bytes,
+                timeout=timeout,
+            )
+        except BaseException as e:
+            self.__settle(admission, error=e)
+            raise
+        self.__settle(admission, raw=raw, latency=time.monotonic() - started_at)
+        return raw
+
+    async def __asend(self, data: dict, headers: Optional[Dict], timeout: Timeout | float | None = None) -> bytes:
+        """
+        Same as __send, without blocking the event loop while waiting for the limiters
+        """
+        admission = await self.__aadmit(data)
+        started_at = time.monotonic()
+        try:
+            raw = await self.__aclient.post(
+                path=f"/v1/chat/completions",
+                json=data,
+                headers=headers,
+                response_type=bytes,
+                timeout=timeout,
+            )
+        except BaseException as e:
+            self.__settle(admission, error=e)
+            raise
+        self.__settle(admission, raw=raw, latency=time.monotonic() - started_at)
+        return raw
+
+    async def __afetch(
+        self, data: dict, headers: Optional[Dict], timeout: Timeout | float | None = None
+    ) -> tuple[bytes, bool]:
+        """
+        Send a completion request, hedged if the client has a hedging policy
+        :return: The raw JSON response, and whether it was generated by the fallback model of the hedging policy
+        instead of the requested one
+        """
+        if self.__hedging is None:
+            return await self.__asend(data, headers, timeout), False
+        return await self.__ahedged_send(data, headers, timeout)
+
+    async def __ahedged_send(
+        self, data: dict, headers: Optional[Dict], timeout: Timeout | float | None = None
+    ) -> tuple[bytes, bool]:
+        """
+        Send a completion request, and a duplicate of it if no response came within the hedging delay.
+        The first successful response wins and the other request is cancelled, which frees its connection
+        :return: The raw JSON response, and whether it is the one of a hedge sent to another model
+        """
+        policy = self.__hedging
+        policy.start()
+        started_at = time.monotonic()
+        primary = asyncio.ensure_future(self.__asend(data, headers, timeout))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=policy.delay)
+            if primary in done:
+                if primary.exception() is None:
+                    policy.record(time.monotonic() - started_at)
+                return primary.result(), False
+            substitutes = bool(policy.fallback_model) and policy.fallback_model != data.get("model")
+            if policy.try_hedge():
+                hedge_data = {**data, "model": policy.fallback_model} if substitutes else data
+                pending.add(asyncio.ensure_future(self.__asend(hedge_data, headers, timeout)))
+
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        # When the hedge wins, the primary latency is only known to be at least this long
+                        policy.record(time.monotonic() - started_at, hedge_won=task is not primary)
+                        return task.result(), substitutes and task is not primary
+                    # Report the error of the primary request rather than the hedge's
+                    if error is None or task is primary:
+                        error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def __admit(self, data: dict) -> "_Admission":
+        """
+        Wait until the circuit breaker and the limiters let the request through
+        :raises CircuitOpenError: If the circuit of the model is open
+        :raises DeadlineExceeded: If the deadline of the operation passed, or would before the limiters let it through
+        """
+        check_deadline()
+        admission = _Admission()
+        # Fail fast before waiting for the limiters
+        if self.__circuit_breaker is not None:
+            admission.permit = self.__circuit_breaker.acquire(data.get("model") or "")
+        try:
+            if self.__scheduler is not None:
+                admission.lane = self.__scheduler.acquire()
+            if self.__rate_limiter is not None:
+                admission.reservation = self.__rate_limiter.acquire(data)
+            if self.__concurrency_limiter is not None:
+                self.__concurrency_limiter.acquire()
+        except BaseException:
+            self.__revoke(admission)
+            raise
+        return admission
+
+    async def __aadmit(self, data: dict) -> "_Admission":
+        check_deadline()
+        admission = _Admission()
+        if self.__circuit_breaker is not None:
+            admission.permit = self.__circuit_breaker.acquire(data.get("model") or "")
+        try:
+            if self.__scheduler is not None:
+                admission.lane = await self.__scheduler.aacquire()
+            if self.__rate_limiter is not None:
+                admission.reservation = await self.__rate_limiter.aacquire(data)
+            if self.__concurrency_limiter is not None:
+                await self.__concurrency_limiter.aacquire()
+        except BaseException:
+            self.__revoke(admission)
+            raise
+        return admission
+
+    def __revoke(self, admission: "_Admission") -> None:
+        """
+        Give back what a request got before it was stopped while waiting for admission
+        """
+        if admission.permit is not None:
+            self.__circuit_breaker.release(admission.permit)
+        if admission.reservation is not None:
+            self.__rate_limiter.cancel(admission.reservation)
+        if admission.lane is not None:
+            self.__scheduler.release(admission.lane)
+
+    def __settle(
+        self,
+        admission: "_Admission",
+        error: BaseException | None = None,
+        raw: bytes | None = None,
+        usage: CompletionUsage | None = None,
+        latency: float | None = None,
+    ) -> None:
+        """
+        Report the outcome of an admitted request to the circuit breaker and the limiters
+        """
+        self.__settle_circuit(admission, error, latency)
+        if admission.reservation is not None:
+            if error is not None:
+                self.__rate_limiter.release(admission.reservation)
+            else:
+                if raw is not None:
+                    usage = codec.parse(CompletionMetadata, raw).usage
+                self.__rate_limiter.reconcile(admission.reservation, usage)
+        if self.__concurrency_limiter is not None:
+            if error is not None:
+                self.__concurrency_limiter.release(overloaded=is_overload(error))
+            else:
+                self.__concurrency_limiter.release(latency=latency)
+        if admission.lane is not None:
+            self.__scheduler.release(admission.lane)
+
+    def __settle_circuit(
+        self, admission: "_Admission", error: BaseException | None = None, latency: float | None = None
+    ) -> None:
+        permit, admission.permit = admission.permit, None
+        if permit is None:
+            return
+        if error is None:
+            self.__circuit_breaker.record_success(permit, latency)
+        elif is_failure(error):
+            self.__circuit_breaker.record_failure(permit)
+        else:
+            self.__circuit_breaker.release(permit)
+
+    def __stream_settler(self, admission: "_Admission") -> Callable[[CompletionUsage | None], None] | None:
+        # The endpoint answered, which is all the circuit breaker needs to know about a stream
+        self.__settle_circuit(admission)
+        if admission.reservation is None and admission.lane is None and self.__concurrency_limiter is None:
+            return None
+        # The duration of a stream depends on how fast it is consumed, it is not sampled as a latency
+        return lambda usage: self.__settle(admission, usage=usage)
+
+    def __use_cache(self, data: dict, bypass_cache: bool) -> bool:
+        return self.__cache is not None and not bypass_cache and self.__cache.accepts(data)
+
+    def __coalesces(self, data: dict) -> bool:
+        # Sampled requests are expected to get different answers, they are never merged
+        return self.__coalesce_requests and is_deterministic(data)
+
+    @staticmethod
+    def __flight_key(cache_key: str, headers: Optional[Dict]) -> str | tuple:
+        if not headers:
+            return cache_key
+        return cache_key, tuple(sorted(headers.items()))
+
+    def create_many(
+        self,
+        requests: list[CompletionRequest],
+        deadline: float | None = None,
+        mode: Literal["async", "threads"] = "async",
+        max_workers: int | None = None,
+        return_exceptions: bool = False,
+        on_progress: Callable[[int, int], None] | None = None,
+        priority: Priority | str | None = Priority.BULK,
+    ) -> List[ChatCompletion] | List[VendiCompletionResponse]:
+        """
+        Same as acreate_many, for sync code. The calling thread blocks until all the requests complete
+        :param requests: A list of completion requests
+        :param deadline: The time all the requests have to complete, in seconds
+        :param mode: How the requests run concurrently. "async" runs them on the background event loop of the client,
+        which keeps its connection pool between calls. "threads" runs them with the sync client in a pool of
+        `max_workers` threads sharing its pooled session, for code that cannot use asyncio at all
+        :param max_workers: The number of threads in "threads" mode. Defaults to `VENDI_HTTP_POOL_MAXSIZE`, so that
+        every thread gets a pooled connection
+        :param return_exceptions: Whether a failed request puts its exception in the results instead of failing the
+        whole call, the other requests being unaffected
+        :param on_progress: Called with the number of completed requests and the total after each request completes.
+        It runs on the thread that completed the request and must not block
+        :param priority: The lane of the requests in the scheduler of the client, if any
+        :return: The completions, in the order of the requests
+        Examples:
+        >>> completions = client.completions.create_many(requests=[...], mode="threads", max_workers=16)
+        """
+        if mode == "threads":
+            with _deadline(deadline):
+                return self.__create_many_threaded(requests, max_workers, return_exceptions, on_progress, priority)
+        if mode != "async":
+            raise ValueError(f"Unknown mode {mode!r}, expected 'async' or 'threads'")
+        return self.__event_loop.run(
+            self.acreate_many(
+                requests,
+                deadline=deadline,
+                return_exceptions=return_exceptions,
+                on_progress=on_progress,
+                priority=priority,
+            )
         )
-        if openai_compatible:
-            return ChatCompletion(**_res)
-        return VendiCompletionResponse(**_res)
+
+    def __create_many_threaded(
+        self,
+        requests: list[CompletionRequest],
+        max_workers: int | None,
+        return_exceptions: bool,
+        on_progress: Callable[[int, int], None] | None,
+        priority: Priority | str | None,
+    ) -> list:
+        progress = _Progress(len(requests), on_progress)
+
+        def _create(request: CompletionRequest):
+            try:
+                return self.create(**request.model_dump(), priority=priority)
+            finally:
+                progress.advance()
+
+        results: list = [None] * len(requests)
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers or vendi_config.VENDI_HTTP_POOL_MAXSIZE,
+            thread_name_prefix="vendi-completions",
+        ) as executor:
+            # Every request runs in its own copy of the caller's context, to carry the deadline over
+            futures = {
+                executor.submit(contextvars.copy_context().run, _create, request): index
+                for index, request in enumerate(requests)
+            }
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    error = future.exception()
+                    if error is not None and not return_exceptions:
+                        raise error
+                    results[futures[future]] = error if error is not None else future.result()
+            except BaseException:
+                # Do not send the requests that have not started yet
+                for future in futures:
+                    future.cancel()
+                raise
+        return results
 
     async def acreate_many(
         self,
         requests: list[CompletionRequest],
+        deadline: float | None = None,
+        return_exceptions: bool = False,
+        on_progress: Callable[[int, int], None] | None = None,
+        priority: Priority | str | None = Priority.BULK,
     ) -> List[ChatCompletion] | List[VendiCompletionResponse]:
         """
         Create multiple completions on different models with the same prompt and parameters
         requests: A list of completionr requests
+        deadline: The time all the requests have to complete, in seconds. A request still running when it passes
+        raises DeadlineExceeded
+        return_exceptions: Whether a failed request puts its exception in the results instead of failing the whole call
+        on_progress: Called with the number of completed requests and the total after each request completes
+        priority: The lane of the requests in the scheduler of the client, if any
         Examples:
         >>> import uuid
         >>> from vendi.completions.schema import CompletionRequest
@@ -196,30 +724,161 @@ class Completions:
         >>> )
         """
 
-        tasks = [
-            self.acreate(
-                **request.model_dump(),
-            ) for request in requests
-        ]
+        progress = _Progress(len(requests), on_progress)
+
+        async def _acreate(request: CompletionRequest):
+            try:
+                return await self.acreate(**request.model_dump(), priority=priority)
+            finally:
+                progress.advance()
 
-        res = await asyncio.gather(*tasks)
+        # The tasks copy the context, and the deadline with it, when they are created
+        with _deadline(deadline):
+            tasks = [_acreate(request) for request in requests]
+
+            res = await asyncio.gather(*tasks, return_exceptions=return_exceptions)
         return res
 
+    async def acreate_stream(
+        self,
+        requests: Iterable[CompletionRequest] | AsyncIterable[CompletionRequest],
+        max_concurrency: int = 32,
+        deadline: float | None = None,
+        priority: Priority | str | None = Priority.BULK,
+    ) -> AsyncIterator[CompletionResult]:
+        """
+        Run many completion requests with at most `max_concurrency` of them in flight, yielding the results as they
+        complete. Requests are pulled from the input lazily, so memory stays bounded regardless of the input size.
+        The results of the requests in flight are yielded while an async input waits for its next request.
+        A failed request does not stop the others, its exception is returned in the result instead.
+        :param requests: An iterable or async iterable of completion requests
+        :param max_concurrency: The maximum number of requests in flight at the same time
+        :param deadline: The time the whole run has, in seconds. The requests still running or not sent yet when it
+        passes fail with DeadlineExceeded
+        :param priority: The lane of the requests in the scheduler of the client, if any
+        :return: An async iterator of results, in completion order. Use `result.index` to match them to the input
+        Examples:
+        >>> async for result in client.completions.acreate_stream(requests, max_concurrency=64):
+        >>>     if result.ok:
+        >>>         print(result.request_id, result.response.choices[0].message.content)
+        >>>     else:
+        >>>         print(result.request_id, "failed:", result.error)
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        # The generator is resumed in the context of its consumer, so the deadline is handed to every task instead
+        at = time.monotonic() + deadline if deadline is not None else None
+        pending: set[asyncio.Task] = set()
+        _requests = _aiter(requests)
+        # An async input is pulled in its own task, so that the results of the requests in flight are yielded while
+        # its next request is not available yet
+        pulls_in_task = isinstance(requests, AsyncIterable)
+        pull: asyncio.Task | None = None
+        index = 0
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < max_concurrency:
+                    if pulls_in_task:
+                        if pull is None:
+                            pull = asyncio.ensure_future(anext(_requests))
+                        if pending and not pull.done():
+                            break
+                        next_request, pull = pull, None
+                    else:
+                        next_request = anext(_requests)
+                    try:
+                        request = await next_request
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    pending.add(asyncio.ensure_future(self.__acreate_result(index, request, at, priority)))
+                    index += 1
+                if not pending:
+                    return
+                done, _ = await asyncio.wait(
+                    pending if pull is None else pending | {pull}, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task is not pull:
+                        pending.discard(task)
+                        yield task.result()
+        finally:
+            if pull is not None:
+                pull.cancel()
+            for task in pending:
+                task.cancel()
+
+    async def __acreate_result(
+        self, index: int, request: CompletionRequest, at: float | None, priority: Priority | str | None
+    ) -> CompletionResult:
+        try:
+            with _deadline(at=at):
+                response = await self.acreate(**request.model_dump(), priority=priority)
+        except Exception as e:
+            return CompletionResult(index=index, request_id=request.request_id, error=e)
+        return CompletionResult(index=index, request_id=request.request_id, response=response)
+
+    def create_structured(self, model: str, messages: List[Dict[str, str]], schema: SchemaLike, **params) -> Any:
+        """
+        Create a completion constrained by a JSON schema, and return its content parsed and validated against it.
+        The schema is parsed and compiled once, on first use
+        :param model: The ID of the language model to use for the completion
+        :param messages: The messages to use as the prompt for the completion
+        :param schema: The JSON schema, as text, as a dict, or as a pydantic model
+        :param params: The other parameters of `create`
+        :return: An instance of the model if the schema is a pydantic model, the parsed JSON otherwise
+        :raises StructuredOutputError: If the generated content does not match the schema
+        Examples:
+        >>> class Person(BaseModel):
+        >>>     name: str
+        >>>     age: int
+        >>>
+        >>> person = client.completions.create_structured("openai/gpt-4o", messages, schema=Person)
+        """
+        compiled = schema_registry.compile(schema)
+        response = self.create(model=model, messages=messages, json_schema=compiled.text, **params)
+        return compiled.parse(_content(response))
+
+    async def acreate_structured(
+        self, model: str, messages: List[Dict[str, str]], schema: SchemaLike, **params
+    ) -> Any:
+        """
+        Same as create_structured, with async operation
+        """
+        compiled = schema_registry.compile(schema)
+        response = await self.acreate(model=model, messages=messages, json_schema=compiled.text, **params)
+        return compiled.parse(_content(response))
+
+    def router(self, models: list[str], **options) -> ModelRouter:
+        """
+        Create a router that sends the completions to the fastest healthy model of a pool of equivalent models, and
+        falls back to the next ones when it fails
+        :param models: The equivalent models to route to, in the format of <provider>/<model_id>
+        :param options: The options of the router, see `ModelRouter`
+        :return: The router, with the same `create` and `acreate` methods as this client except for `model`
+        Examples:
+        >>> router = client.completions.router(["openai/gpt-4o-mini", "vendi/llama-3-8b-instruct"])
+        >>> router.refresh_endpoints()
+        >>> completion = router.create(messages=[{"role": "user", "content": "Hi"}], max_tokens=64)
+        >>> print(completion.model, router.snapshot())
+        """
+        return ModelRouter(self, models, **options)
+
     def available_endpoints(self) -> List[Endpoint]:
         """
         Get the list of available endpoints , those that are configured and ready to use
         :return: The list of available endpoints
         """
-        _endpoints = self.__client.get(uri="/platform/v1/inference/endpoints")
-        return [Endpoint(**endpoint) for endpoint in _endpoints]
+        return self.__client.get(uri="/platform/v1/inference/endpoints", response_type=list[Endpoint])
 
     def endpoints_catalog(self) -> List[Endpoint]:
         """
         Get the list of all supported endpoints within the platform
         :return: The list of all supported endpoints
         """
-        _endpoints = self.__client.get(uri="/platform/v1/inference/endpoints/all")
-        return [Endpoint(**endpoint) for endpoint in _endpoints]
+        return self.__client.get(uri="/platform/v1/inference/endpoints/all", response_type=list[Endpoint])
 
     def run_batch_job(
         self,
@@ -262,14 +921,14 @@ class Completions:
         timeout: int = 3000,
         poll_interval: int = 5,
     ) -> BatchInference:
-        _res = await self.__aclient.post(
+        job = await self.__aclient.post(
             path="/platform/v1/inference/batch/",
             json={
                 "dataset_id": str(dataset_id),
                 "model_parameters": [{**i.model_dump(), **i.model_extra} for i in model_parameters]
-            }
+            },
+            response_type=BatchInference,
         )
-        job = BatchInference(**_res)
 
         if wait_until_complete:
             start_time = time.time()
@@ -285,16 +944,15 @@ class Completions:
                 await asyncio.sleep(poll_interval)
 
     def __post_batch_job(self, dataset_id: uuid.UUID, model_parameters: list[ModelParameters]) -> BatchInference:
-        res = self.__client.post(
+        return self.__client.post(
             uri="/platform/v1/inference/batch/",
             json_data={
                 "dataset_id": str(dataset_id),
                 "model_parameters": [{**i.model_dump(), **i.model_extra} for i in model_parameters]
-            }
+            },
+            response_type=BatchInference,
         )
 
-        return BatchInference(**res)
-
     def batch_job_status(self, job_id: uuid.UUID) -> BatchInferenceStatus:
         """
         Returns the status of a batch inference job.
@@ -306,31 +964,80 @@ class Completions:
         """
         Get a batch inference object job by ID
         """
-        res = self.__client.get(
-            uri=f"/platform/v1/inference/batch/{batch_inference_id}"
+        return self.__client.get(
+            uri=f"/platform/v1/inference/batch/{batch_inference_id}",
+            response_type=BatchInference,
         )
-        return BatchInference(**res)
 
     async def _aget_batch_job(self, batch_inference_id: uuid.UUID) -> BatchInference:
         """
         Get a batch inference object job by ID
         """
-        res = await self.__aclient.get(
-            path=f"/platform/v1/inference/batch/{batch_inference_id}"
+        return await self.__aclient.get(
+            path=f"/platform/v1/inference/batch/{batch_inference_id}",
+            response_type=BatchInference,
         )
-        return BatchInference(**res)
 
     def list_batch_jobs(self) -> List[BatchInference]:
         """
         Get all batch inferences
         """
-        res = self.__client.get(
-            uri="/platform/v1/inference/batch/"
+        return self.__client.get(
+            uri="/platform/v1/inference/batch/",
+            response_type=list[BatchInference],
         )
-        return [BatchInference(**i) for i in res]
 
     def delete_batch_job(self, batch_id: uuid.UUID):
         """
         Delete a batch inference job
         """
         return self.__client.delete(f"/platform/v1/inference/batch/{batch_id}")
+
+
+class _Admission:
+    """
+    What an admitted completion request holds until its outcome is settled
+    """
+
+    __slots__ = ("permit", "reservation", "lane")
+
+    def __init__(self):
+        self.permit: CircuitPermit | None = None
+        self.reservation: Reservation | None = None
+        self.lane: Priority | None = None
+
+
+def _content(response: VendiCompletionResponse | ChatCompletion) -> str:
+    content = response.choices[0].message.content if response.choices else None
+    if not isinstance(content, str):
+        raise StructuredOutputError("The completion has no text content", "")
+    return content
+
+
+class _Progress:
+    """
+    A thread-safe count of the completed requests of a bulk call, reported to its progress callback
+    """
+
+    def __init__(self, total: int, callback: Callable[[int, int], None] | None):
+        self.total = total
+        self.callback = callback
+        self.done = 0
+        self.__lock = threading.Lock()
+
+    def advance(self) -> None:
+        if self.callback is None:
+            return
+        # Reported under the lock, so that the counts reach the callback in order
+        with self.__lock:
+            self.done += 1
+            self.callback(self.done, self.total)
+
+
+async def _aiter(items: Iterable | AsyncIterable) -> AsyncIterator:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
@@ -0,0 +1,238 @@
+"""
+Adaptive limit of the number of completion requests in flight.
+The limit grows additively while the recent latency stays close to its long-term average and shrinks multiplicatively
+on overload signals (429, 5xx, timeouts) or in proportion to the latency gradient when the latency inflates, like TCP
+congestion control. Bulk runs thus settle at the highest concurrency the gateway sustains instead of a fixed,
+hand-tuned number.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+
+import aiohttp
+import requests
+
+from vendi_sdk.core.retry import status_code
+from vendi_sdk.core.timeouts import DeadlineExceeded, remaining
+
+
+def is_overload(exc: BaseException) -> bool:
+    """
+    Whether an error means the API is overloaded and the client should send fewer requests at a time
+    """
+    if isinstance(exc, DeadlineExceeded):
+        # The caller ran out of time, which says nothing about the API
+        return False
+    if isinstance(exc, (TimeoutError, asyncio.TimeoutError, requests.Timeout, aiohttp.ServerTimeoutError)):
+        return True
+    status = status_code(exc)
+    return status is not None and (status == 429 or status >= 500)
+
+
+class Waiter:
+    """
+    A caller waiting for a slot, woken from any thread once the slot is handed to it. Shared by the limiters and
+    schedulers of the requests in flight
+    """
+
+    __slots__ = ("event", "loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop | None = None):
+        """
+        :param loop: The event loop of an async caller, None for a thread that blocks on an event
+        """
+        self.event = threading.Event() if loop is None else None
+        self.loop = loop
+        self.future = loop.create_future() if loop is not None else None
+        self.granted = False
+
+    def wake(self) -> None:
+        """
+        Tell the caller its slot was handed to it, set `granted` first
+        """
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self.__resolve)
+
+    def __resolve(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limiter of the requests in flight, shared by threads and event loops.
+    Callers wait in FIFO order for a slot with `acquire()` / `aacquire()` and give it back with `release()`, reporting
+    the latency of the request or whether it failed from overload.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 16,
+        min_limit: int = 1,
+        max_limit: int = 512,
+        backoff_ratio: float = 0.7,
+        latency_tolerance: float = 1.5,
+        smoothing: float = 0.1,
+        baseline_smoothing: float = 0.01,
+    ):
+        """
+        :param initial_limit: The number of requests allowed in flight at first
+        :param min_limit: The limit never goes below this number
+        :param max_limit: The limit never goes above this number
+        :param backoff_ratio: The factor applied to the limit on overload
+        :param latency_tolerance: How many times the baseline latency the recent latency may reach before the limit
+        is decreased
+        :param smoothing: The weight of a new sample in the moving average of the recent latency
+        :param baseline_smoothing: The weight of a new sample in the long-term moving average of the latency, used as
+        the baseline
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("The limits must satisfy 1 <= min_limit <= initial_limit <= max_limit")
+        if not 0 < backoff_ratio < 1:
+            raise ValueError("backoff_ratio must be between 0 and 1")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self.baseline_smoothing = baseline_smoothing
+        self.__limit = float(initial_limit)
+        self.__in_flight = 0
+        self.__waiters: deque[Waiter] = deque()
+        self.__lock = threading.Lock()
+        self.__baseline_latency: float | None = None
+        self.__latency: float | None = None
+        self.__last_decrease = 0.0
+        self.increases = 0
+        """The number of times the limit was raised."""
+        self.decreases = 0
+        """The number of times the limit was lowered."""
+
+    @property
+    def limit(self) -> int:
+        """
+        The current number of requests allowed in flight
+        """
+        return int(self.__limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self.__in_flight
+
+    @property
+    def waiting(self) -> int:
+        return len(self.__waiters)
+
+    def snapshot(self) -> dict:
+        """
+        Get a consistent copy of the limiter metrics
+        """
+        with self.__lock:
+            return {
+                "limit": int(self.__limit),
+                "in_flight": self.__in_flight,
+                "waiting": len(self.__waiters),
+                "latency": self.__latency,
+                "baseline_latency": self.__baseline_latency,
+                "increases": self.increases,
+                "decreases": self.decreases,
+            }
+
+    def acquire(self) -> None:
+        """
+        Wait for a slot, blocking the thread
+        :raises DeadlineExceeded: If no slot got free before the deadline of the current context
+        """
+        with self.__lock:
+            if self.__try_acquire():
+                return
+            waiter = Waiter()
+            self.__waiters.append(waiter)
+        if not waiter.event.wait(timeout=remaining()):
+            self.__abandon(waiter)
+            raise DeadlineExceeded("No concurrency slot got free before the deadline of the operation")
+
+    async def aacquire(self) -> None:
+        """
+        Wait for a slot without blocking the event loop
+        :raises DeadlineExceeded: If no slot got free before the deadline of the current context
+        """
+        with self.__lock:
+            if self.__try_acquire():
+                return
+            waiter = Waiter(asyncio.get_running_loop())
+            self.__waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), remaining())
+        except asyncio.CancelledError:
+            self.__abandon(waiter)
+            raise
+        except asyncio.TimeoutError:
+            self.__abandon(waiter)
+            raise DeadlineExceeded("No concurrency slot got free before the deadline of the operation")
+
+    def release(self, latency: float | None = None, overloaded: bool = False) -> None:
+        """
+        Give back a slot and adapt the limit to the outcome of its request
+        :param latency: The latency of the request, in seconds. None if it should not be sampled
+        :param overloaded: Whether the request failed because the API is overloaded
+        """
+        with self.__lock:
+            self.__in_flight -= 1
+            if overloaded:
+                self.__decrease(self.backoff_ratio)
+            elif latency is not None:
+                self.__observe(latency)
+            self.__wake_waiters()
+
+    def __abandon(self, waiter: Waiter) -> None:
+        with self.__lock:
+            if not waiter.granted:
+                self.__waiters.remove(waiter)
+                return
+        # The slot was handed over before the waiter gave up
+        self.release()
+
+    def __try_acquire(self) -> bool:
+        if self.__waiters or self.__in_flight >= int(self.__limit):
+            return False
+        self.__in_flight += 1
+        return True
+
+    def __observe(self, latency: float) -> None:
+        if self.__baseline_latency is None:
+            self.__baseline_latency = self.__latency = latency
+            return
+        self.__latency += self.smoothing * (latency - self.__latency)
+        self.__baseline_latency += self.baseline_smoothing * (latency - self.__baseline_latency)
+        # Let the baseline catch up at once when the latency improves, e.g. after a congestion cleared
+        self.__baseline_latency = min(self.__baseline_latency, self.__latency)
+
+        gradient = self.latency_tolerance * self.__baseline_latency / self.__latency
+        if gradient < 1:
+            self.__decrease(max(0.5, gradient))
+        elif self.__in_flight + 1 >= self.__limit / 2:
+            # Only grow when the limit is actually used, otherwise it would climb without bound on a light load
+            previous = int(self.__limit)
+            self.__limit = min(float(self.max_limit), self.__limit + 1 / self.__limit)
+            if int(self.__limit) > previous:
+                self.increases += 1
+
+    def __decrease(self, ratio: float | None = None) -> None:
+        now = time.monotonic()
+        # Requests that were already in flight report the same overload, only react once per round trip
+        if now - self.__last_decrease < (self.__latency or 0.0):
+            return
+        self.__last_decrease = now
+        self.__limit = max(float(self.min_limit), self.__limit * (ratio or self.backoff_ratio))
+        self.decreases += 1
+
+    def __wake_waiters(self) -> None:
+        while self.__waiters and self.__in_flight < int(self.__limit):
+            waiter = self.__waiters.popleft()
+            waiter.granted = True
+            self.__in_flight += 1
+            waiter.wake()
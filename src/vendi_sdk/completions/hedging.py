@@ -0,0 +1,123 @@
+"""
+Hedged completion requests, to cut the tail latency caused by occasional slow replicas.
+When a request gets no response within a delay derived from a percentile of the recent latencies, a duplicate request
+is sent, optionally to a fallback model, and the first successful response wins while the other one is cancelled.
+The share of hedged requests is capped by a budget so that the extra load on the backend stays bounded.
+"""
+import math
+import threading
+from collections import deque
+
+
+class HedgingPolicy:
+    """
+    When and where to send hedged requests. Thread-safe, and meant to be shared by all the requests of a client so
+    that its latency percentile and hedge budget reflect the whole traffic
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95,
+        initial_delay: float = 1.0,
+        min_delay: float = 0.05,
+        max_delay: float = 30.0,
+        max_hedge_ratio: float = 0.05,
+        max_burst: int = 10,
+        window: int = 1000,
+        min_samples: int = 20,
+        fallback_model: str | None = None,
+    ):
+        """
+        :param percentile: The percentile of the recent latencies after which a request is hedged
+        :param initial_delay: The hedging delay used until enough latencies were observed, in seconds
+        :param min_delay: The lower bound of the hedging delay, in seconds
+        :param max_delay: The upper bound of the hedging delay, in seconds
+        :param max_hedge_ratio: The maximum share of requests that are hedged in the long run
+        :param max_burst: The maximum number of hedges that can be sent in a row when the budget is full
+        :param window: The number of recent latencies the percentile is computed on
+        :param min_samples: The number of latencies to observe before the percentile replaces the initial delay
+        :param fallback_model: The model to send the hedged requests to. None sends them to the same model
+        """
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+        if not 0 <= max_hedge_ratio <= 1:
+            raise ValueError("max_hedge_ratio must be between 0 and 1")
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.max_burst = max_burst
+        self.min_samples = min_samples
+        self.fallback_model = fallback_model
+        self.__latencies: deque[float] = deque(maxlen=window)
+        self.__delay = initial_delay
+        self.__samples = 0
+        self.__budget = float(max_burst)
+        self.__lock = threading.Lock()
+        self.requests = 0
+        """The number of requests sent under this policy, not counting the hedges."""
+        self.hedges = 0
+        """The number of hedged requests sent."""
+        self.hedge_wins = 0
+        """The number of times the hedged request answered first."""
+
+    @property
+    def delay(self) -> float:
+        """
+        How long to wait for a response before hedging, in seconds
+        """
+        return self.__delay
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedges / self.requests if self.requests else 0.0
+
+    def snapshot(self) -> dict:
+        """
+        Get a consistent copy of the hedging metrics
+        """
+        with self.__lock:
+            return {
+                "delay": self.__delay,
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "hedge_rate": self.hedge_rate,
+            }
+
+    def start(self) -> None:
+        """
+        Count a new request, which earns its share of the hedge budget
+        """
+        with self.__lock:
+            self.requests += 1
+            self.__budget = min(float(self.max_burst), self.__budget + self.max_hedge_ratio)
+
+    def try_hedge(self) -> bool:
+        """
+        Take a hedge from the budget
+        :return: Whether a hedged request may be sent
+        """
+        with self.__lock:
+            if self.__budget < 1:
+                return False
+            self.__budget -= 1
+            self.hedges += 1
+            return True
+
+    def record(self, latency: float, hedge_won: bool = False) -> None:
+        """
+        Observe the latency of a primary request, in seconds. For a request that lost to its hedge, this is the time
+        it had been running when it was cancelled
+        """
+        with self.__lock:
+            self.__latencies.append(latency)
+            if hedge_won:
+                self.hedge_wins += 1
+            # Sorting the window on every request is wasteful, the percentile moves slowly anyway
+            self.__samples += 1
+            if len(self.__latencies) >= self.min_samples and self.__samples % 16 == 0:
+                latencies = sorted(self.__latencies)
+                index = min(len(latencies) - 1, math.ceil(self.percentile / 100 * len(latencies)) - 1)
+                self.__delay = min(self.max_delay, max(self.min_delay, latencies[index]))
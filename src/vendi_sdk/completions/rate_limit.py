@@ -0,0 +1,215 @@
+"""
+Client-side rate limiting of completion requests, in requests per minute and tokens per minute.
+Limits are keyed by `<provider>/<model>` or by `<provider>` and every limit matching a request applies. The tokens of a
+request are estimated and reserved before it is sent, then reconciled with the actual usage returned by the API.
+"""
+import asyncio
+import threading
+import time
+from typing import Any
+
+from pydantic import BaseModel
+
+from vendi_sdk.completions.schema import CompletionUsage
+from vendi_sdk.core.timeouts import DeadlineExceeded, remaining
+
+CHARS_PER_TOKEN = 4
+"""A rough average used to estimate the number of prompt tokens without a tokenizer."""
+TOKENS_PER_MESSAGE = 4
+"""The formatting overhead of every chat message, in tokens."""
+
+
+class RateLimit(BaseModel):
+    requests_per_minute: float | None = None
+    """The maximum number of requests per minute. None means no limit."""
+    tokens_per_minute: float | None = None
+    """The maximum number of prompt and completion tokens per minute. None means no limit."""
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket that refills continuously up to its capacity.
+    Reservations are taken immediately and may overdraw the bucket; the caller then waits for the debt to refill,
+    which keeps the callers in order without holding the lock while waiting.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.__available = per_minute
+        self.__updated_at = time.monotonic()
+        self.__lock = threading.Lock()
+
+    @property
+    def available(self) -> float:
+        with self.__lock:
+            self.__refill()
+            return self.__available
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take `amount` from the bucket
+        :return: How long to wait, in seconds, before the reservation is covered
+        """
+        with self.__lock:
+            self.__refill()
+            self.__available -= amount
+            return max(0.0, -self.__available / self.rate)
+
+    def refund(self, amount: float) -> None:
+        """
+        Give back part of a reservation that was not used
+        """
+        with self.__lock:
+            self.__refill()
+            self.__available = min(self.capacity, self.__available + amount)
+
+    def __refill(self) -> None:
+        now = time.monotonic()
+        self.__available = min(self.capacity, self.__available + (now - self.__updated_at) * self.rate)
+        self.__updated_at = now
+
+
+class Reservation:
+    __slots__ = ("buckets", "tokens", "delay")
+
+    def __init__(self, buckets: list[tuple[TokenBucket | None, TokenBucket | None]], tokens: int, delay: float):
+        self.buckets = buckets
+        """The (requests, tokens) buckets of every limit the request is subject to."""
+        self.tokens = tokens
+        """The number of tokens reserved for the request."""
+        self.delay = delay
+        """How long the request had to wait for the reservation, in seconds."""
+
+
+class RateLimiter:
+    """
+    Rate limiter shared by all the completion requests of a client, across threads and coroutines
+    """
+
+    def __init__(self, limits: dict[str, RateLimit] | None = None, default: RateLimit | None = None):
+        """
+        :param limits: The limits keyed by `<provider>/<model>` (e.g. `openai/gpt-4`) or by `<provider>` (e.g. `openai`)
+        :param default: The limit of the models that match no key. None means they are not limited
+        """
+        self.limits = dict(limits or {})
+        self.default = default
+        self.__buckets: dict[str, tuple[TokenBucket | None, TokenBucket | None]] = {}
+        self.__lock = threading.Lock()
+
+    def reserve(self, payload: dict) -> Reservation:
+        """
+        Reserve a request and its estimated tokens without waiting
+        :return: The reservation. Wait for `reservation.delay` seconds before sending the request
+        """
+        tokens = estimate_tokens(payload)
+        buckets = self.__matching_buckets(payload.get("model") or "")
+        delay = 0.0
+        for requests_bucket, tokens_bucket in buckets:
+            if requests_bucket is not None:
+                delay = max(delay, requests_bucket.reserve(1))
+            if tokens_bucket is not None:
+                delay = max(delay, tokens_bucket.reserve(tokens))
+        return Reservation(buckets, tokens, delay)
+
+    def acquire(self, payload: dict) -> Reservation:
+        """
+        Reserve a request and block the thread until it can be sent
+        :raises DeadlineExceeded: If the request could not be sent before the deadline of the current context
+        """
+        reservation = self.__reserve_within_deadline(payload)
+        if reservation.delay:
+            time.sleep(reservation.delay)
+        return reservation
+
+    async def aacquire(self, payload: dict) -> Reservation:
+        """
+        Reserve a request and wait until it can be sent, without blocking the event loop
+        :raises DeadlineExceeded: If the request could not be sent before the deadline of the current context
+        """
+        reservation = self.__reserve_within_deadline(payload)
+        if reservation.delay:
+            try:
+                await asyncio.sleep(reservation.delay)
+            except asyncio.CancelledError:
+                self.cancel(reservation)
+                raise
+        return reservation
+
+    def reconcile(self, reservation: Reservation, usage: CompletionUsage | None) -> None:
+        """
+        Correct the reserved tokens with the actual usage of the request, once it completed
+        """
+        if usage is None:
+            return
+        difference = reservation.tokens - usage.total_tokens
+        for _, tokens_bucket in reservation.buckets:
+            if tokens_bucket is None:
+                continue
+            if difference > 0:
+                tokens_bucket.refund(difference)
+            elif difference < 0:
+                tokens_bucket.reserve(-difference)
+
+    def release(self, reservation: Reservation) -> None:
+        """
+        Give back the tokens of a request that failed before generating anything. The request itself still counts
+        """
+        for _, tokens_bucket in reservation.buckets:
+            if tokens_bucket is not None:
+                tokens_bucket.refund(reservation.tokens)
+
+    def cancel(self, reservation: Reservation) -> None:
+        """
+        Give back the whole reservation of a request that was never sent
+        """
+        self.release(reservation)
+        for requests_bucket, _ in reservation.buckets:
+            if requests_bucket is not None:
+                requests_bucket.refund(1)
+
+    def __reserve_within_deadline(self, payload: dict) -> Reservation:
+        reservation = self.reserve(payload)
+        left = remaining()
+        if left is not None and reservation.delay >= left:
+            self.cancel(reservation)
+            raise DeadlineExceeded("The rate limit does not allow the request before the deadline of the operation")
+        return reservation
+
+    def __matching_buckets(self, model: str) -> list[tuple[TokenBucket | None, TokenBucket | None]]:
+        keys = [key for key in (model, model.split("/", 1)[0]) if key in self.limits]
+        if not keys and self.default is not None:
+            # Every unlisted model gets its own buckets under the default limit
+            keys = [model]
+        return [self.__buckets_for(key) for key in dict.fromkeys(keys)]
+
+    def __buckets_for(self, key: str) -> tuple[TokenBucket | None, TokenBucket | None]:
+        with self.__lock:
+            buckets = self.__buckets.get(key)
+            if buckets is None:
+                limit = self.limits.get(key, self.default)
+                buckets = self.__buckets[key] = (
+                    TokenBucket(limit.requests_per_minute) if limit.requests_per_minute else None,
+                    TokenBucket(limit.tokens_per_minute) if limit.tokens_per_minute else None,
+                )
+            return buckets
+
+
+def estimate_tokens(payload: dict) -> int:
+    """
+    Estimate the tokens a completion request will use: its prompt plus the maximum number of generated tokens
+    """
+    prompt_tokens = 2
+    for message in payload.get("messages") or []:
+        content = message.get("content") if isinstance(message, dict) else getattr(message, "content", "")
+        prompt_tokens += TOKENS_PER_MESSAGE + len(_text(content)) // CHARS_PER_TOKEN
+    return prompt_tokens + (payload.get("max_tokens") or 0) * (payload.get("n") or 1)
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else getattr(part, "text", "") or ""
+                       for part in content)
+    return ""
@@ -0,0 +1,264 @@
+"""
+Latency-aware routing of completions over a pool of equivalent models.
+Every model of the pool is scored from its observed latency and error rate, and from its endpoint status when known.
+Requests go to the best model first and fall back to the next ones in order when it fails, or when its circuit is open,
+so that traffic drains away from slow or degraded providers automatically.
+"""
+import random
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+import requests
+
+from vendi_sdk.completions.circuit_breaker import CircuitOpenError
+from vendi_sdk.completions.schema import ChatCompletion, Endpoint, VendiCompletionResponse
+from vendi_sdk.core.retry import status_code
+from vendi_sdk.deployments.schema import DeploymentStatus
+
+if TYPE_CHECKING:
+    from vendi_sdk.completions.completions import Completions
+
+FALLBACK_STATUSES = frozenset({404, 408, 409, 429, 500, 502, 503, 504})
+"""The statuses that another model may not fail with: the model is missing, overloaded or down. The other statuses
+mean the request itself is invalid."""
+
+
+def should_fall_back(exc: BaseException) -> bool:
+    """
+    Whether a failed completion may succeed on another model: it failed to reach the model, or with one of
+    `FALLBACK_STATUSES`. Any other error, e.g. an expired deadline or an invalid response, is raised as is. An open
+    circuit is not a failure of the model, the router skips it without falling back
+    """
+    status = status_code(exc)
+    if status is not None:
+        return status in FALLBACK_STATUSES
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout, aiohttp.ClientConnectionError))
+
+
+class ModelHealth:
+    """
+    The observed health of a model in a router
+    """
+
+    __slots__ = ("latency", "elapsed_time", "requests", "failures", "status", "_error_rate", "_updated_at")
+
+    def __init__(self):
+        self.latency: float | None = None
+        """The moving average of the wall-clock latency of the completions, in seconds."""
+        self.elapsed_time: float | None = None
+        """The moving average of the `elapsed_time` the API reported for the completions, in seconds."""
+        self.requests = 0
+        """The number of requests routed to the model."""
+        self.failures = 0
+        """The number of requests that failed on the model."""
+        self.status: DeploymentStatus | None = None
+        """The status of the model endpoint, if known."""
+        self._error_rate = 0.0
+        self._updated_at = time.monotonic()
+
+    def error_rate(self, half_life: float) -> float:
+        """
+        The moving average of the failures, decayed with time so that a model that stopped receiving traffic after
+        failing gets another chance
+        """
+        return self._error_rate * 0.5 ** ((time.monotonic() - self._updated_at) / half_life)
+
+
+class ModelRouter:
+    """
+    Routes completions to the best model of a pool, with ordered fallbacks. Thread-safe
+    """
+
+    def __init__(
+        self,
+        completions: "Completions",
+        models: list[str],
+        smoothing: float = 0.2,
+        error_penalty: float = 10.0,
+        error_half_life: float = 60.0,
+        max_error_rate: float = 0.5,
+        exploration: float = 0.05,
+        max_attempts: int | None = None,
+    ):
+        """
+        :param completions: The completions client to send the requests with
+        :param models: The equivalent models to route to, in the format of <provider>/<model_id>. Their order breaks
+        the ties, e.g. before any latency is known
+        :param smoothing: The weight of a new sample in the moving averages of the latency and error rate
+        :param error_penalty: How much the error rate inflates the score of a model. A model with a 10% error rate
+        and the default penalty scores like a model twice as slow
+        :param error_half_life: The time it takes for the error rate of a model to halve without new requests, in
+        seconds
+        :param max_error_rate: Models with a higher error rate are only used as a last resort
+        :param exploration: The share of requests sent to a random model first, to keep measuring the latency of
+        the models that are not preferred
+        :param max_attempts: The maximum number of models tried for a request. Defaults to all of them
+        """
+        if not models:
+            raise ValueError("The router needs at least one model")
+        self.models = list(dict.fromkeys(models))
+        self.smoothing = smoothing
+        self.error_penalty = error_penalty
+        self.error_half_life = error_half_life
+        self.max_error_rate = max_error_rate
+        self.exploration = exploration
+        self.max_attempts = max_attempts or len(self.models)
+        self.__completions = completions
+        self.__health = {model: ModelHealth() for model in self.models}
+        self.__lock = threading.Lock()
+
+    def rank(self) -> list[str]:
+        """
+        The models in the order they would be tried for the next request. The models whose endpoint is not live, whose
+        circuit is open or whose error rate is over `max_error_rate` come last
+        """
+        circuit_breaker = self.__completions.circuit_breaker
+        with self.__lock:
+            healthy, degraded = [], []
+            for model in self.models:
+                health = self.__health[model]
+                available = health.status in (None, DeploymentStatus.LIVE) and not (
+                    circuit_breaker is not None and circuit_breaker.is_open(model)
+                )
+                error_rate = health.error_rate(self.error_half_life)
+                (healthy if available and error_rate <= self.max_error_rate else degraded).append(
+                    (self.__score(health, error_rate), model)
+                )
+        ranked = [model for _, model in sorted(healthy, key=lambda item: item[0])]
+        ranked += [model for _, model in sorted(degraded, key=lambda item: item[0])]
+        if len(ranked) > 1 and random.random() < self.exploration:
+            ranked.insert(0, ranked.pop(random.randrange(1, len(ranked))))
+        return ranked[:self.max_attempts]
+
+    def create(self, messages: list[dict], **params: Any) -> VendiCompletionResponse | ChatCompletion:
+        """
+        Create a completion on the best model of the pool, falling back to the next ones if it fails
+        :param messages: The messages to use as the prompt for the completion
+        :param params: The other parameters of `Completions.create`, except `model`
+        :return: The completion of the first model that succeeded. Its `model` tells which one it was
+        :raises CircuitOpenError: If the circuit of every model was open
+        """
+        error: BaseException | None = None
+        for model in self.rank():
+            started_at = time.monotonic()
+            try:
+                response = self.__completions.create(model=model, messages=messages, **params)
+            except CircuitOpenError as e:
+                # Opened, or out of trial requests, since the models were ranked
+                error = e
+                continue
+            except Exception as e:
+                if not should_fall_back(e):
+                    raise
+                self.record_failure(model)
+                error = e
+                continue
+            self.__record_response(model, time.monotonic() - started_at, response, params)
+            return response
+        raise error
+
+    async def acreate(self, messages: list[dict], **params: Any) -> VendiCompletionResponse | ChatCompletion:
+        """
+        Same as create, with async operation
+        """
+        error: BaseException | None = None
+        for model in self.rank():
+            started_at = time.monotonic()
+            try:
+                response = await self.__completions.acreate(model=model, messages=messages, **params)
+            except CircuitOpenError as e:
+                # Opened, or out of trial requests, since the models were ranked
+                error = e
+                continue
+            except Exception as e:
+                if not should_fall_back(e):
+                    raise
+                self.record_failure(model)
+                error = e
+                continue
+            self.__record_response(model, time.monotonic() - started_at, response, params)
+            return response
+        raise error
+
+    def refresh_endpoints(self, endpoints: list[Endpoint] | None = None) -> None:
+        """
+        Update the status of the models from their endpoints. Models whose endpoint is not live are only used as a
+        last resort
+        :param endpoints: The endpoints to read the statuses from. Defaults to `completions.available_endpoints()`
+        """
+        if endpoints is None:
+            endpoints = self.__completions.available_endpoints()
+        statuses = {}
+        for endpoint in endpoints:
+            statuses[endpoint.model_id] = endpoint.status
+            statuses[f"{endpoint.provider}/{endpoint.model_id}"] = endpoint.status
+        with self.__lock:
+            for model, health in self.__health.items():
+                health.status = statuses.get(model, DeploymentStatus.DOES_NOT_EXIST)
+
+    def record_success(self, model: str, latency: float | None = None, elapsed_time: float | None = None) -> None:
+        """
+        Observe a successful completion of a model
+        :param latency: The wall-clock latency of the completion, in seconds. None if it is not meaningful, e.g. for
+        a stream
+        :param elapsed_time: The time the API reported it took to generate the completion, in seconds, if any
+        """
+        with self.__lock:
+            health = self.__health[model]
+            health.requests += 1
+            self.__update_error_rate(health, 0.0)
+            if latency is not None:
+                health.latency = self.__average(health.latency, latency)
+            if elapsed_time is not None:
+                health.elapsed_time = self.__average(health.elapsed_time, elapsed_time)
+
+    def record_failure(self, model: str) -> None:
+        """
+        Observe a failed completion of a model
+        """
+        with self.__lock:
+            health = self.__health[model]
+            health.requests += 1
+            health.failures += 1
+            self.__update_error_rate(health, 1.0)
+
+    def snapshot(self) -> dict[str, dict]:
+        """
+        Get a consistent copy of the health of every model
+        """
+        with self.__lock:
+            return {
+                model: {
+                    "latency": health.latency,
+                    "elapsed_time": health.elapsed_time,
+                    "error_rate": health.error_rate(self.error_half_life),
+                    "requests": health.requests,
+                    "failures": health.failures,
+                    "status": health.status,
+                }
+                for model, health in self.__health.items()
+            }
+
+    def __record_response(self, model: str, latency: float, response: Any, params: dict) -> None:
+        if params.get("stream"):
+            # A stream has only started, its duration depends on how fast it is consumed
+            self.record_success(model)
+            return
+        self.record_success(model, latency, getattr(response, "elapsed_time", None))
+
+    def __score(self, health: ModelHealth, error_rate: float) -> float:
+        # The wall-clock latency of a response served from the cache is not the one of the model, its elapsed_time is.
+        # Models without a latency yet score best, so that they get measured
+        latency = max(health.latency or 0.0, health.elapsed_time or 0.0)
+        return latency * (1 + self.error_penalty * error_rate)
+
+    def __update_error_rate(self, health: ModelHealth, sample: float) -> None:
+        health._error_rate = self.__average(health.error_rate(self.error_half_life), sample)
+        health._updated_at = time.monotonic()
+
+    def __average(self, average: float | None, sample: float) -> float:
+        if average is None:
+            return sample
+        return average + self.smoothing * (sample - average)
@@ -0,0 +1,313 @@
+"""
+Resumable bulk runs of completion requests.
+The requests are streamed from a JSONL file or an iterator, and their results are appended to a JSONL output as they
+complete, with a checkpoint next to it. A run that was interrupted and is started again with the same input and output
+skips the requests that already succeeded, without loading the input or the output in memory, and sends the ones that
+failed again.
+"""
+import os
+import time
+from typing import TYPE_CHECKING, AsyncIterable, AsyncIterator, Iterable
+
+from pydantic import BaseModel
+
+from vendi_sdk.completions.scheduler import Priority
+from vendi_sdk.completions.schema import CompletionRequest, CompletionResult, RunSummary
+from vendi_sdk.core import codec
+
+if TYPE_CHECKING:
+    from vendi_sdk.completions.completions import Completions
+
+Requests = str | os.PathLike | Iterable[CompletionRequest | dict] | AsyncIterable[CompletionRequest | dict]
+
+
+class FailedRequest(BaseModel):
+    position: int
+    """The position of the request in the input."""
+    offset: int | None = None
+    """The byte offset of the request in the input file, if it is a file. None until the input is read past it."""
+    key: str | int
+    """The `request_id` of the request, or its position if it has none."""
+
+
+class RunCheckpoint(BaseModel):
+    position: int = 0
+    """The number of leading input requests that are all completed, successfully or not."""
+    input_offset: int = 0
+    """The byte offset of the first request not known to be completed in the input file, if it is a file."""
+    output_offset: int = 0
+    """The size of the output when the checkpoint was written. The results after it were written since."""
+    completed_ahead: list[str | int] = []
+    """The keys of the requests that succeeded after `position`, before the checkpoint was written."""
+    failed_requests: list[FailedRequest] = []
+    """The requests whose last attempt failed, sent again by the next run."""
+    succeeded: int = 0
+    """The number of requests that succeeded in all the runs."""
+    failed: int = 0
+    """The number of requests whose last attempt failed."""
+
+
+class _Pending:
+    __slots__ = ("position", "offset", "key")
+
+    def __init__(self, position: int, offset: int, key: str | int):
+        self.position = position
+        self.offset = offset
+        self.key = key
+
+
+class CompletionRunner:
+    """
+    Runs a large number of completion requests with bounded concurrency, writing each result to an output JSONL file
+    as soon as it completes. Every output line has the `index` of the request in the input, its `request_id`, and
+    either the `response` or the `error` it failed with.
+    The requests are identified by their `request_id`, or by their position in the input when they have none, so
+    restart a run with the same input in the same order. The requests that failed are sent again by the next run,
+    which appends their new result: the last line of a request in the output is its final result.
+    """
+
+    def __init__(
+        self,
+        completions: "Completions",
+        output: str | os.PathLike,
+        checkpoint: str | os.PathLike | None = None,
+        max_concurrency: int = 32,
+        checkpoint_interval: float = 1.0,
+        priority: Priority | str | None = Priority.BULK,
+        retry_failed: bool = True,
+    ):
+        """
+        :param completions: The client to send the requests with
+        :param output: The JSONL file the results are appended to
+        :param checkpoint: The file the progress of the run is saved to. Defaults to the output path with a
+        `.checkpoint` suffix
+        :param max_concurrency: The maximum number of requests in flight at the same time
+        :param checkpoint_interval: How often the checkpoint is saved, in seconds. The results written since the last
+        checkpoint are recovered from the end of the output on restart
+        :param priority: The lane of the requests in the scheduler of the client, if any
+        :param retry_failed: Whether to send the requests that failed in the previous runs again. Otherwise they are
+        skipped like the ones that succeeded
+        """
+        self.completions = completions
+        self.output = os.fspath(output)
+        self.checkpoint = os.fspath(checkpoint) if checkpoint is not None else self.output + ".checkpoint"
+        self.max_concurrency = max_concurrency
+        self.checkpoint_interval = checkpoint_interval
+        self.priority = priority
+        self.retry_failed = retry_failed
+
+    def run(self, requests: Requests) -> RunSummary:
+        """
+        Run the requests on the background event loop of the client, blocking until they are all completed
+        :param requests: A path to a JSONL file of completion requests, or an iterable or async iterable of requests
+        :return: The counts of the run
+        """
+        return self.completions.event_loop.run(self.arun(requests))
+
+    async def arun(self, requests: Requests) -> RunSummary:
+        """
+        Same as run, without blocking the event loop
+        """
+        started_at = time.monotonic()
+        checkpoint = self.load_checkpoint()
+        summary = RunSummary()
+        with open(self.output, "ab+") as output:
+            done, failures = self.__recover(output, checkpoint)
+            if self.retry_failed:
+                # The failures after the checkpoint are read from the input again, the ones before it are sent first
+                failures = {position: failed for position, failed in failures.items() if position < checkpoint.position}
+            # The requests pulled by the client and not completed yet, by their index in the client stream
+            pending: dict[int, _Pending] = {}
+            ahead: dict[int, str | int] = {}
+            source = _Source(requests, checkpoint, list(failures.values()) if self.retry_failed else [])
+
+            async def _requests() -> AsyncIterator[CompletionRequest]:
+                index = 0
+                async for position, offset, request in source:
+                    key = _key(position, request.request_id)
+                    if position >= source.start:
+                        if key in done:
+                            # Kept until the checkpoint moves past it, as if this run had completed it
+                            ahead[position] = key
+                            summary.skipped += 1
+                            continue
+                        if position in failures:
+                            failures[position].offset = offset
+                            summary.skipped += 1
+                            continue
+                    pending[index] = _Pending(position, offset, key)
+                    index += 1
+                    yield request
+
+            saved_at = time.monotonic()
+            results = self.completions.acreate_stream(
+                _requests(), max_concurrency=self.max_concurrency, priority=self.priority
+            )
+            async for result in results:
+                entry = pending.pop(result.index)
+                output.write(result_line(entry.position, result))
+                if result.ok:
+                    ahead[entry.position] = entry.key
+                    failures.pop(entry.position, None)
+                    summary.succeeded += 1
+                else:
+                    failures[entry.position] = FailedRequest(
+                        position=entry.position, offset=entry.offset, key=entry.key
+                    )
+                    summary.failed += 1
+                if time.monotonic() - saved_at >= self.checkpoint_interval:
+                    self.__save(output, checkpoint, summary, source, pending, ahead, failures)
+                    saved_at = time.monotonic()
+            self.__save(output, checkpoint, summary, source, pending, ahead, failures)
+        summary.elapsed_time = time.monotonic() - started_at
+        return summary
+
+    def load_checkpoint(self) -> RunCheckpoint:
+        """
+        Read the checkpoint of the previous runs, or an empty one if there were none
+        """
+        try:
+            with open(self.checkpoint, "rb") as f:
+                return codec.parse(RunCheckpoint, f.read())
+        except FileNotFoundError:
+            return RunCheckpoint()
+
+    def __recover(self, output, checkpoint: RunCheckpoint) -> tuple[set[str | int], dict[int, FailedRequest]]:
+        """
+        Collect the requests completed after the checkpoint, from the end of the output, and drop the last line if it
+        was only partly written
+        :return: The keys of the requests that succeeded after the checkpoint position, and the requests whose last
+        attempt failed by their position
+        """
+        output.seek(0, os.SEEK_END)
+        size = output.tell()
+        if size < checkpoint.output_offset:
+            raise ValueError(f"{self.output} is shorter than its checkpoint {self.checkpoint}, it was modified")
+        done = set(checkpoint.completed_ahead)
+        failures = {failed.position: failed for failed in checkpoint.failed_requests}
+        output.seek(checkpoint.output_offset)
+        end = checkpoint.output_offset
+        for line in output:
+            if not line.endswith(b"\n"):
+                break
+            entry = codec.loads(line)
+            position = entry["index"]
+            key = _key(position, entry.get("request_id"))
+            if "error" in entry:
+                failures.setdefault(position, FailedRequest(position=position, key=key))
+            else:
+                done.add(key)
+                failures.pop(position, None)
+                checkpoint.succeeded += 1
+            end += len(line)
+        if end < size:
+            output.truncate(end)
+        return done, failures
+
+    def __save(
+        self,
+        output,
+        checkpoint: RunCheckpoint,
+        summary: RunSummary,
+        source: "_Source",
+        pending: dict[int, _Pending],
+        ahead: dict[int, str | int],
+        failures: dict[int, FailedRequest],
+    ) -> None:
+        # The output must be on disk before the checkpoint that points past it
+        output.flush()
+        os.fsync(output.fileno())
+        # The failed requests sent again are before the checkpoint, they stay in the failures until they succeed
+        waiting = [entry for entry in pending.values() if entry.position >= source.start]
+        if waiting:
+            first = min(waiting, key=lambda entry: entry.position)
+            position, offset = first.position, first.offset
+        else:
+            position, offset = source.position, source.offset
+        for done_position in [p for p in ahead if p < position]:
+            del ahead[done_position]
+        state = RunCheckpoint(
+            position=position,
+            input_offset=offset,
+            output_offset=output.tell(),
+            completed_ahead=list(ahead.values()),
+            failed_requests=sorted(failures.values(), key=lambda failed: failed.position),
+            succeeded=checkpoint.succeeded + summary.succeeded,
+            failed=len(failures),
+        )
+        tmp = self.checkpoint + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(codec.dumps(state.model_dump()))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.checkpoint)
+
+
+class _Source:
+    """
+    The input requests from the checkpoint on, with their position and the byte offset they start at in a file,
+    preceded by the failed requests before the checkpoint that are sent again
+    """
+
+    def __init__(self, requests: Requests, checkpoint: RunCheckpoint, retry: list[FailedRequest]):
+        self.requests = requests
+        self.start = checkpoint.position
+        """The position the input is read from. The requests before it are only read to be sent again."""
+        self.position = checkpoint.position
+        """The position of the next request to read."""
+        self.offset = checkpoint.input_offset
+        """The byte offset of the next request to read, if the input is a file."""
+        self.retry = sorted(retry, key=lambda failed: failed.position)
+
+    async def __aiter__(self) -> AsyncIterator[tuple[int, int, CompletionRequest]]:
+        if isinstance(self.requests, (str, os.PathLike)):
+            with open(self.requests, "rb") as f:
+                for failed in self.retry:
+                    f.seek(failed.offset)
+                    yield failed.position, failed.offset, codec.parse(CompletionRequest, f.readline())
+                f.seek(self.offset)
+                for line in iter(f.readline, b""):
+                    offset = self.offset
+                    self.offset += len(line)
+                    if not line.strip():
+                        continue
+                    position = self.position
+                    self.position += 1
+                    yield position, offset, codec.parse(CompletionRequest, line)
+            return
+        retry = {failed.position for failed in self.retry}
+        position = 0
+        if isinstance(self.requests, AsyncIterable):
+            async for request in self.requests:
+                if position >= self.start or position in retry:
+                    yield self.__next(position, request)
+                position += 1
+        else:
+            for request in self.requests:
+                if position >= self.start or position in retry:
+                    yield self.__next(position, request)
+                position += 1
+
+    def __next(self, position: int, request: CompletionRequest | dict) -> tuple[int, int, CompletionRequest]:
+        if position >= self.start:
+            self.position = position + 1
+        if not isinstance(request, CompletionRequest):
+            request = CompletionRequest.model_validate(request)
+        return position, 0, request
+
+
+def _key(position: int, request_id: str | None) -> str | int:
+    return request_id if request_id is not None else position
+
+
+def result_line(position: int, result: CompletionResult) -> bytes:
+    """
+    The JSONL output line of a result: the `index` of the request, its `request_id`, and either the `response` or the
+    `error` it failed with
+    """
+    entry = {"index": position, "request_id": result.request_id}
+    if result.ok:
+        entry["response"] = result.response.model_dump(mode="json")
+    else:
+        entry["error"] = f"{type(result.error).__name__}: {result.error}"
+    return codec.dumps(entry) + b"\n"
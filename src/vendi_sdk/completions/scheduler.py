@@ -0,0 +1,220 @@
+"""
+Priority lanes of the completion requests.
+Requests wait for a slot of a shared concurrency budget in the lane of their priority, and the freed slots are handed
+out by weighted fair queuing: every lane gets a share of the budget proportional to its weight while it has requests
+waiting, so a bulk run can use the whole budget when alone but cannot starve the interactive requests.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from enum import Enum
+from typing import Iterator
+
+from vendi_sdk.completions.concurrency import Waiter
+from vendi_sdk.core.timeouts import DeadlineExceeded, remaining
+
+
+class Priority(str, Enum):
+    INTERACTIVE = "interactive"
+    """User-facing requests, e.g. chat turns, that someone is waiting for."""
+    DEFAULT = "default"
+    """Requests that did not ask for a priority."""
+    BULK = "bulk"
+    """Background requests, e.g. the bulk APIs, that only need throughput."""
+
+
+DEFAULT_WEIGHTS = {Priority.INTERACTIVE: 16, Priority.DEFAULT: 4, Priority.BULK: 1}
+
+_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar("vendi_priority", default=Priority.DEFAULT)
+
+
+@contextmanager
+def priority(value: Priority | str | None) -> Iterator[Priority]:
+    """
+    Send the completion requests made in the block, sync or async, in the lane of a priority.
+    None keeps the priority of the enclosing block
+    Examples:
+    >>> with priority("interactive"):
+    >>>     client.completions.create(...)
+    """
+    if value is None:
+        yield _priority.get()
+        return
+    token = _priority.set(Priority(value))
+    try:
+        yield _priority.get()
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Priority:
+    """
+    The priority of the completion requests made in the current context
+    """
+    return _priority.get()
+
+
+class _Lane:
+    __slots__ = ("weight", "waiters", "in_flight", "admitted", "virtual_time", "wait_time", "max_wait_time")
+
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.waiters: deque[tuple[Waiter, float]] = deque()
+        self.in_flight = 0
+        self.admitted = 0
+        self.virtual_time = 0.0
+        self.wait_time: float | None = None
+        self.max_wait_time = 0.0
+
+
+class PriorityScheduler:
+    """
+    A concurrency budget shared by priority lanes, for threads and event loops.
+    Callers wait for a slot with `acquire()` / `aacquire()` and give it back with `release()`
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 32,
+        weights: dict[Priority | str, float] | None = None,
+        smoothing: float = 0.1,
+    ):
+        """
+        :param max_concurrency: The number of requests in flight across all the lanes. When the client also has an
+        adaptive concurrency limiter, keep it at or below the limit the limiter settles on, so that the requests queue
+        by priority here rather than in the limiter
+        :param weights: The share of the budget of each lane while several lanes have requests waiting. Defaults to
+        16 for interactive, 4 for default and 1 for bulk
+        :param smoothing: The weight of a new sample in the moving average of the wait time of each lane
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        weights = {**DEFAULT_WEIGHTS, **{Priority(k): v for k, v in (weights or {}).items()}}
+        if any(weight <= 0 for weight in weights.values()):
+            raise ValueError("The weights must be positive")
+        self.max_concurrency = max_concurrency
+        self.smoothing = smoothing
+        self.__lanes = {p: _Lane(weights[p]) for p in Priority}
+        self.__in_flight = 0
+        self.__virtual_time = 0.0
+        self.__lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        """
+        The number of requests holding a slot, across all the lanes
+        """
+        return self.__in_flight
+
+    def snapshot(self) -> dict[str, dict]:
+        """
+        Get a consistent copy of the metrics of every lane: the queue depth, the requests in flight and admitted, and
+        the average and maximum wait for a slot, in seconds
+        """
+        with self.__lock:
+            return {
+                p.value: {
+                    "weight": lane.weight,
+                    "queued": len(lane.waiters),
+                    "in_flight": lane.in_flight,
+                    "admitted": lane.admitted,
+                    "wait_time": lane.wait_time,
+                    "max_wait_time": lane.max_wait_time,
+                }
+                for p, lane in self.__lanes.items()
+            }
+
+    def acquire(self, priority: Priority | str | None = None) -> Priority:
+        """
+        Wait for a slot in the lane of a priority, blocking the thread
+        :param priority: The lane. Defaults to the priority of the current context
+        :return: The lane, to pass to `release()`
+        :raises DeadlineExceeded: If no slot was handed to the lane before the deadline of the current context
+        """
+        lane, waiter = self.__enqueue(priority)
+        if waiter is None:
+            return lane
+        if not waiter.event.wait(timeout=remaining()):
+            self.__abandon(lane, waiter)
+            raise DeadlineExceeded("No slot was handed to the lane before the deadline of the operation")
+        return lane
+
+    async def aacquire(self, priority: Priority | str | None = None) -> Priority:
+        """
+        Wait for a slot in the lane of a priority without blocking the event loop
+        :param priority: The lane. Defaults to the priority of the current context
+        :return: The lane, to pass to `release()`
+        :raises DeadlineExceeded: If no slot was handed to the lane before the deadline of the current context
+        """
+        lane, waiter = self.__enqueue(priority, asyncio.get_running_loop())
+        if waiter is None:
+            return lane
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), remaining())
+        except asyncio.CancelledError:
+            self.__abandon(lane, waiter)
+            raise
+        except asyncio.TimeoutError:
+            self.__abandon(lane, waiter)
+            raise DeadlineExceeded("No slot was handed to the lane before the deadline of the operation")
+        return lane
+
+    def release(self, priority: Priority) -> None:
+        """
+        Give back the slot of a request of a lane, and hand it to the next request due
+        """
+        with self.__lock:
+            self.__lanes[priority].in_flight -= 1
+            self.__in_flight -= 1
+            self.__dispatch()
+
+    def __enqueue(
+        self, priority: Priority | str | None, loop: asyncio.AbstractEventLoop | None = None
+    ) -> tuple[Priority, Waiter | None]:
+        priority = Priority(priority) if priority is not None else current_priority()
+        with self.__lock:
+            lane = self.__lanes[priority]
+            if not lane.waiters:
+                # A lane coming back from idle does not get credit for the time it did not use its share
+                lane.virtual_time = max(lane.virtual_time, self.__virtual_time)
+            if self.__in_flight < self.max_concurrency and not any(l.waiters for l in self.__lanes.values()):
+                self.__admit(lane, 0.0)
+                return priority, None
+            waiter = Waiter(loop)
+            lane.waiters.append((waiter, time.monotonic()))
+            return priority, waiter
+
+    def __abandon(self, priority: Priority, waiter: Waiter) -> None:
+        with self.__lock:
+            if not waiter.granted:
+                lane = self.__lanes[priority]
+                lane.waiters = deque(entry for entry in lane.waiters if entry[0] is not waiter)
+                return
+        # The slot was handed over before the waiter gave up
+        self.release(priority)
+
+    def __dispatch(self) -> None:
+        while self.__in_flight < self.max_concurrency:
+            busy = [lane for lane in self.__lanes.values() if lane.waiters]
+            if not busy:
+                return
+            # The lane whose next request would finish first in virtual time, i.e. the furthest behind its share
+            lane = min(busy, key=lambda l: l.virtual_time + 1 / l.weight)
+            waiter, queued_at = lane.waiters.popleft()
+            self.__admit(lane, time.monotonic() - queued_at)
+            waiter.granted = True
+            waiter.wake()
+
+    def __admit(self, lane: _Lane, waited: float) -> None:
+        lane.virtual_time += 1 / lane.weight
+        self.__virtual_time = max(self.__virtual_time, lane.virtual_time - 1 / lane.weight)
+        lane.in_flight += 1
+        lane.admitted += 1
+        self.__in_flight += 1
+        lane.wait_time = waited if lane.wait_time is None else (
+            self.smoothing * waited + (1 - self.smoothing) * lane.wait_time
+        )
+        lane.max_wait_time = max(lane.max_wait_time, waited)
@@ -1,9 +1,9 @@
-import json
 import uuid
 from enum import Enum
 from typing import Optional, Literal
 from pydantic import BaseModel, model_validator, ConfigDict
 
+from vendi_sdk.completions.structured import schema_registry
 from vendi_sdk.core.schema import SchemaMixin
 from vendi_sdk.deployments.schema import DeploymentStatus
 
@@ -93,6 +93,49 @@ class VendiCompletionResponse(ChatCompletion):
         arbitrary_types_allowed = True
 
 
+class ChoiceDelta(BaseModel):
+    role: str | None = None
+    """The role of the author of the message. Only sent in the first chunk of a choice."""
+    content: str | None = None
+    """The next piece of the generated message."""
+
+
+class ChunkChoice(BaseModel):
+    index: int
+    """The index of the choice in the list of choices."""
+    delta: ChoiceDelta
+    """The incremental update of the choice message."""
+    finish_reason: str | None = None
+    """The reason the model stopped generating tokens. Only sent in the last chunk of a choice."""
+
+
+class ChatCompletionChunk(BaseModel):
+    id: str | None = None
+    """A unique identifier for the chat completion. Every chunk of a completion has the same ID."""
+    choices: list[ChunkChoice] = []
+    """The incremental updates of the completion choices."""
+    created: int | None = None
+    """The Unix timestamp (in seconds) of when the chat completion was created."""
+    model: str | None = None
+    """The model used for the chat completion."""
+    object: Literal["chat.completion.chunk"] = "chat.completion.chunk"
+    """The object type, which is always `chat.completion.chunk`."""
+    usage: Optional[CompletionUsage] = None
+    """Usage statistics for the completion request. Usually only sent in the last chunk."""
+
+    model_config = ConfigDict(extra="allow")
+
+
+class CompletionMetadata(BaseModel):
+    """
+    The fields of a completion response read by the client flow control, parsed without the choices
+    """
+    usage: Optional[CompletionUsage] = None
+    """Usage statistics for the completion request."""
+    elapsed_time: float | None = None
+    """The time the API took to generate the completion, when reported."""
+
+
 class CompletionParams(BaseModel):
     stop: str | list[str] = []
     """The stop sequence(s) to use for the completion."""
@@ -136,12 +179,8 @@ class CompletionParams(BaseModel):
                 "Json schema and regex cannot be used together. Please use on of them"
             )
         if data.json_schema:
-            try:
-                json.loads(data.json_schema)
-            except json.JSONDecodeError:
-                raise ValueError(
-                    "Passed schema is not valid json. Please check your syntax."
-                )
+            # Parsed once per distinct schema, the registry raises if it is not valid
+            schema_registry.compile(data.json_schema)
         return data
 
     model_config = ConfigDict(protected_namespaces=(), extra='allow')
@@ -159,6 +198,44 @@ class CompletionRequest(ModelParameters):
     """The prompt messages to use for the completion."""
 
 
+class CompletionResult(BaseModel):
+    index: int
+    """The position of the request in the input requests."""
+    request_id: str | None = None
+    """The `request_id` of the request, if it had one."""
+    response: VendiCompletionResponse | ChatCompletion | None = None
+    """The generated completion. None if the request failed."""
+    error: Exception | None = None
+    """The exception the request failed with. None if the request succeeded."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    @property
+    def ok(self) -> bool:
+        """
+        Whether the request succeeded
+        """
+        return self.error is None
+
+
+class RunSummary(BaseModel):
+    succeeded: int = 0
+    """The number of requests completed by this run."""
+    failed: int = 0
+    """The number of requests that failed in this run. Their errors are written to the output."""
+    skipped: int = 0
+    """The number of requests skipped because a previous run already completed them."""
+    elapsed_time: float = 0.0
+    """The duration of the run, in seconds."""
+
+    @property
+    def throughput(self) -> float:
+        """
+        The number of requests processed per second
+        """
+        return (self.succeeded + self.failed) / self.elapsed_time if self.elapsed_time else 0.0
+
+
 class BatchInferenceStatus(str, Enum):
     CREATING = "creating"
     """The batch inference is being created."""
@@ -0,0 +1,313 @@
+"""
+Streamed completions. The completion is received as server-sent events, each carrying a ChatCompletionChunk with the
+next tokens, and aggregated into a regular completion response once the stream is consumed.
+A stream dropped without being consumed or closed is finished when it is garbage collected, so that the limiter slots
+and the rate limit reservation of its request are given back.
+"""
+import time
+import weakref
+from typing import AsyncIterator, Callable, Iterator
+
+import aiohttp
+import requests
+
+from vendi_sdk.completions.schema import ChatCompletion, ChatCompletionChunk, Choice, CompletionUsage, LlmMessage, \
+    VendiCompletionResponse
+from vendi_sdk.core import codec
+from vendi_sdk.core.sse import SSEDecoder, ServerSentEvent
+
+DONE = b"[DONE]"
+
+
+class CompletionStreamError(Exception):
+    """
+    Raised by a stream when the server sends an error instead of the next chunk, e.g. the provider failed halfway
+    """
+
+    def __init__(self, error: dict | str):
+        message = error.get("message", error) if isinstance(error, dict) else error
+        super().__init__(f"The completion stream failed: {message}")
+        self.error = error
+        """The error sent by the server."""
+
+
+def parse_chunk(event: ServerSentEvent) -> ChatCompletionChunk:
+    """
+    Parse the chunk of a server-sent event
+    :raises CompletionStreamError: If the event is an error
+    """
+    if event.event == "error":
+        try:
+            error = codec.loads(event.data)
+        except ValueError:
+            error = event.data.decode(errors="replace")
+        raise CompletionStreamError(error.get("error", error) if isinstance(error, dict) else error)
+    chunk = codec.parse(ChatCompletionChunk, event.data)
+    # OpenAI compatible servers send the errors as regular events
+    error = (chunk.model_extra or {}).get("error")
+    if error is not None:
+        raise CompletionStreamError(error)
+    return chunk
+
+
+class _ChunkAccumulator:
+    """
+    Aggregates the chunks of a stream into the final completion response
+    """
+
+    def __init__(self, model: str, openai_compatible: bool, started_at: float):
+        self.__model = model
+        self.__openai_compatible = openai_compatible
+        self.__started_at = started_at
+        self.__finished_at: float | None = None
+        self.__first: ChatCompletionChunk | None = None
+        self.__last: ChatCompletionChunk | None = None
+        self.__roles: dict[int, str] = {}
+        self.__contents: dict[int, list[str]] = {}
+        self.__finish_reasons: dict[int, str] = {}
+
+    def add(self, chunk: ChatCompletionChunk) -> None:
+        if self.__first is None:
+            self.__first = chunk
+        self.__last = chunk
+        for choice in chunk.choices:
+            contents = self.__contents.setdefault(choice.index, [])
+            if choice.delta.role:
+                self.__roles[choice.index] = choice.delta.role
+            if choice.delta.content:
+                contents.append(choice.delta.content)
+            if choice.finish_reason:
+                self.__finish_reasons[choice.index] = choice.finish_reason
+
+    def finish(self) -> bool:
+        """
+        :return: Whether the stream was not already finished
+        """
+        if self.__finished_at is not None:
+            return False
+        self.__finished_at = time.time()
+        return True
+
+    @property
+    def finished(self) -> bool:
+        return self.__finished_at is not None
+
+    @property
+    def usage(self) -> CompletionUsage | None:
+        return next(
+            (chunk.usage for chunk in (self.__last, self.__first) if chunk is not None and chunk.usage is not None),
+            None,
+        )
+
+    def response(self) -> VendiCompletionResponse | ChatCompletion:
+        first = self.__first or ChatCompletionChunk()
+        usage = self.usage
+        choices = [
+            Choice(
+                index=index,
+                message=LlmMessage(role=self.__roles.get(index, "assistant"), content="".join(contents)),
+                finish_reason="length" if self.__finish_reasons.get(index) == "length" else "stop",
+            )
+            for index, contents in sorted(self.__contents.items())
+        ]
+        fields = {
+            "id": first.id or "",
+            "choices": choices,
+            "created": first.created or int(self.__started_at),
+            "model": first.model or self.__model,
+            "usage": usage,
+        }
+        if self.__openai_compatible:
+            return ChatCompletion(**fields)
+
+        # Vendi sends its own metadata (provider, elapsed_time...) as extra fields of the chunks
+        extra = {**(first.model_extra or {}), **((self.__last and self.__last.model_extra) or {})}
+        extra.setdefault("elapsed_time", (self.__finished_at or time.time()) - self.__started_at)
+        return VendiCompletionResponse(**extra, **fields)
+
+
+class _Finisher:
+    """
+    Ends the aggregation of a stream and reports its usage, once. It does not reference the stream, so that a dropped
+    stream can be finalized
+    """
+
+    __slots__ = ("accumulator", "on_finish")
+
+    def __init__(self, accumulator: _ChunkAccumulator, on_finish: Callable[[CompletionUsage | None], None] | None):
+        self.accumulator = accumulator
+        self.on_finish = on_finish
+
+    def __call__(self) -> None:
+        if self.accumulator.finish() and self.on_finish is not None:
+            self.on_finish(self.accumulator.usage)
+
+
+def _parse(event: ServerSentEvent, accumulator: _ChunkAccumulator) -> ChatCompletionChunk:
+    chunk = parse_chunk(event)
+    accumulator.add(chunk)
+    return chunk
+
+
+def _iter_chunks(
+    response: requests.Response, accumulator: _ChunkAccumulator, finish: _Finisher
+) -> Iterator[ChatCompletionChunk]:
+    decoder = SSEDecoder()
+    try:
+        for data in response.iter_content(chunk_size=None):
+            for event in decoder.feed(data):
+                if event.data == DONE:
+                    return
+                yield _parse(event, accumulator)
+        for event in decoder.flush():
+            if event.data != DONE:
+                yield _parse(event, accumulator)
+    finally:
+        finish()
+        response.close()
+
+
+async def _aiter_chunks(
+    response: aiohttp.ClientResponse, accumulator: _ChunkAccumulator, finish: _Finisher
+) -> AsyncIterator[ChatCompletionChunk]:
+    decoder = SSEDecoder()
+    try:
+        async for data in response.content.iter_any():
+            for event in decoder.feed(data):
+                if event.data == DONE:
+                    return
+                yield _parse(event, accumulator)
+        for event in decoder.flush():
+            if event.data != DONE:
+                yield _parse(event, accumulator)
+    finally:
+        finish()
+        response.release()
+
+
+def _abandon(finish: _Finisher, release: Callable[[], object]) -> None:
+    finish()
+    release()
+
+
+class CompletionStream:
+    """
+    A sync iterator over the chunks of a streamed completion.
+    Iterate over it to receive the chunks as they are generated, then use `final_response` to get the aggregated
+    completion. The connection is released once the stream is consumed or closed.
+    """
+
+    def __init__(
+        self,
+        response: requests.Response,
+        model: str,
+        openai_compatible: bool,
+        started_at: float,
+        on_finish: Callable[[CompletionUsage | None], None] | None = None,
+    ):
+        """
+        :param on_finish: Called once with the usage of the completion when the stream ends: consumed, closed, or
+        dropped and garbage collected
+        """
+        self.__accumulator = _ChunkAccumulator(model, openai_compatible, started_at)
+        finish = _Finisher(self.__accumulator, on_finish)
+        self.__chunks = _iter_chunks(response, self.__accumulator, finish)
+        self.__finalizer = weakref.finalize(self, _abandon, finish, response.close)
+
+    def __iter__(self) -> Iterator[ChatCompletionChunk]:
+        return self
+
+    def __next__(self) -> ChatCompletionChunk:
+        return next(self.__chunks)
+
+    def __enter__(self) -> "CompletionStream":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stop receiving the completion and release the connection
+        """
+        self.__chunks.close()
+        # The generator does not run its cleanup if it was never started
+        self.__finalizer()
+
+    @property
+    def final_response(self) -> VendiCompletionResponse | ChatCompletion:
+        """
+        The completion aggregated from all the chunks, including usage and elapsed time
+        """
+        if not self.__accumulator.finished:
+            raise ValueError("The stream is not consumed yet, iterate over it or use `get_final_response()`")
+        return self.__accumulator.response()
+
+    def get_final_response(self) -> VendiCompletionResponse | ChatCompletion:
+        """
+        Consume the rest of the stream and return the aggregated completion
+        """
+        for _ in self:
+            pass
+        return self.final_response
+
+
+class AsyncCompletionStream:
+    """
+    An async iterator over the chunks of a streamed completion.
+    Iterate over it with `async for` to receive the chunks as they are generated, then use `final_response` to get
+    the aggregated completion. The connection is released once the stream is consumed or closed.
+    """
+
+    def __init__(
+        self,
+        response: aiohttp.ClientResponse,
+        model: str,
+        openai_compatible: bool,
+        started_at: float,
+        on_finish: Callable[[CompletionUsage | None], None] | None = None,
+    ):
+        """
+        :param on_finish: Called once with the usage of the completion when the stream ends: consumed, closed, or
+        dropped and garbage collected
+        """
+        self.__accumulator = _ChunkAccumulator(model, openai_compatible, started_at)
+        finish = _Finisher(self.__accumulator, on_finish)
+        self.__chunks = _aiter_chunks(response, self.__accumulator, finish)
+        self.__finalizer = weakref.finalize(self, _abandon, finish, response.release)
+
+    def __aiter__(self) -> AsyncIterator[ChatCompletionChunk]:
+        return self
+
+    async def __anext__(self) -> ChatCompletionChunk:
+        return await self.__chunks.__anext__()
+
+    async def __aenter__(self) -> "AsyncCompletionStream":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Stop receiving the completion and release the connection
+        """
+        await self.__chunks.aclose()
+        self.__finalizer()
+
+    @property
+    def final_response(self) -> VendiCompletionResponse | ChatCompletion:
+        """
+        The completion aggregated from all the chunks, including usage and elapsed time
+        """
+        if not self.__accumulator.finished:
+            raise ValueError("The stream is not consumed yet, iterate over it or use `get_final_response()`")
+        return self.__accumulator.response()
+
+    async def get_final_response(self) -> VendiCompletionResponse | ChatCompletion:
+        """
+        Consume the rest of the stream and return the aggregated completion
+        """
+        async for _ in self:
+            pass
+        return self.final_response
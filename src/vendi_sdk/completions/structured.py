@@ -0,0 +1,159 @@
+"""
+JSON schemas of the constrained (structured output) completions.
+Each distinct schema is parsed and compiled into a validator once and kept in a registry, so that the requests and the
+responses that use it are checked without parsing the schema again. The responses are validated with `jsonschema`
+when it is installed (`pip install vendi-sdk[schema]`); without it, they are only checked to be valid JSON. Schemas
+given as pydantic models are always validated by pydantic.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from vendi_sdk.core import codec
+
+try:
+    import jsonschema
+except ImportError:
+    jsonschema = None
+
+T = TypeVar("T")
+
+SchemaLike = str | dict | type[BaseModel]
+
+
+class StructuredOutputError(ValueError):
+    """
+    Raised when the content generated by a model does not match the schema it was constrained with
+    """
+
+    def __init__(self, message: str, content: str | bytes):
+        super().__init__(message)
+        self.content = content
+        """The generated content that did not match."""
+
+
+class CompiledSchema(Generic[T]):
+    """
+    A parsed JSON schema with its validator. Get it from a SchemaRegistry rather than building it
+    """
+
+    def __init__(self, text: str, schema: dict | bool, model: type[BaseModel] | None = None):
+        """
+        :raises ValueError: If the schema is not a JSON object or a boolean, or not a valid JSON schema
+        """
+        self.text = text
+        """The schema as sent to the API."""
+        self.schema = schema
+        """The parsed schema. A boolean schema accepts everything (true) or nothing (false)."""
+        self.model = model
+        """The pydantic model the schema was generated from, if any."""
+        self.fingerprint = hashlib.sha256(text.encode()).hexdigest()
+        """A stable identifier of the schema."""
+        self.__validator = None
+        if not isinstance(schema, (dict, bool)):
+            raise ValueError("Passed schema is not a valid JSON schema: it must be a JSON object or a boolean")
+        if model is None and jsonschema is not None:
+            validator_class = jsonschema.validators.validator_for(schema)
+            try:
+                validator_class.check_schema(schema)
+            except jsonschema.SchemaError as e:
+                raise ValueError(f"Passed schema is not a valid JSON schema: {e.message}") from e
+            self.__validator = validator_class(schema)
+
+    def parse(self, content: str | bytes) -> T:
+        """
+        Parse generated content and validate it against the schema
+        :return: An instance of the model if the schema was given as a pydantic model, the parsed JSON otherwise
+        :raises StructuredOutputError: If the content is not valid JSON or does not match the schema
+        """
+        if self.model is not None:
+            try:
+                return codec.parse(self.model, content)
+            except ValidationError as e:
+                raise StructuredOutputError(f"The content does not match {self.model.__name__}: {e}", content) from e
+        try:
+            value = codec.loads(content)
+        except ValueError as e:
+            raise StructuredOutputError(f"The content is not valid JSON: {e}", content) from e
+        if self.__validator is not None:
+            error = jsonschema.exceptions.best_match(self.__validator.iter_errors(value))
+            if error is not None:
+                raise StructuredOutputError(f"The content does not match the schema: {error.message}", content)
+        return value
+
+    def is_valid(self, content: str | bytes) -> bool:
+        """
+        Whether generated content is valid JSON that matches the schema
+        """
+        try:
+            self.parse(content)
+        except StructuredOutputError:
+            return False
+        return True
+
+
+class SchemaRegistry:
+    """
+    A thread-safe LRU registry of compiled schemas, keyed by their text or by their pydantic model
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        :param max_entries: The number of schemas kept compiled. The least recently used ones are evicted first
+        """
+        self.max_entries = max_entries
+        self.__schemas: OrderedDict[str | type, CompiledSchema] = OrderedDict()
+        self.__lock = threading.Lock()
+        self.hits = 0
+        """The number of lookups served by an already compiled schema."""
+        self.misses = 0
+        """The number of schemas compiled."""
+
+    def __len__(self) -> int:
+        return len(self.__schemas)
+
+    def compile(self, schema: SchemaLike) -> CompiledSchema:
+        """
+        Get the compiled version of a schema, compiling it on first use
+        :param schema: The schema, as JSON text, as a dict, or as a pydantic model whose JSON schema is used
+        :raises ValueError: If the schema is not valid JSON, or not a valid JSON schema
+        """
+        key = schema if isinstance(schema, (str, type)) else codec.dumps(schema, sort_keys=True).decode()
+        with self.__lock:
+            compiled = self.__schemas.get(key)
+            if compiled is not None:
+                self.__schemas.move_to_end(key)
+                self.hits += 1
+                return compiled
+        # Compiled outside the lock, two threads may compile the same schema at worst
+        compiled = _compile(schema)
+        with self.__lock:
+            self.misses += 1
+            self.__schemas[key] = compiled
+            while len(self.__schemas) > self.max_entries:
+                self.__schemas.popitem(last=False)
+        return compiled
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__schemas.clear()
+
+
+def _compile(schema: SchemaLike) -> CompiledSchema:
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        model_schema = schema.model_json_schema()
+        return CompiledSchema(codec.dumps(model_schema).decode(), model_schema, model=schema)
+    if isinstance(schema, dict):
+        return CompiledSchema(codec.dumps(schema).decode(), schema)
+    try:
+        parsed = codec.loads(schema)
+    except ValueError:
+        raise ValueError("Passed schema is not valid json. Please check your syntax.")
+    return CompiledSchema(schema, parsed)
+
+
+schema_registry = SchemaRegistry()
+"""The registry shared by the request validation and the structured completions."""
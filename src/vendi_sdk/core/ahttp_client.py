@@ -1,60 +1,208 @@
+import asyncio
+import threading
+import weakref
+from typing import Any, AsyncGenerator
+
 import aiohttp
 
+from vendi_sdk.core import codec
+from vendi_sdk.core.retry import RetryPolicy
+from vendi_sdk.core.timeouts import DeadlineExceeded, Timeout, remaining
+
+
+class AsyncConnectionPool:
+    """
+    Owns a long-lived aiohttp session and connector that can be shared by several AsyncHTTPClient instances.
+    aiohttp sessions are bound to the event loop they were created on, so the pool lazily keeps one session per
+    running loop and closes it when that loop shuts down (e.g. at the end of `asyncio.run`).
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        ttl_dns_cache: int | None = 300,
+        keepalive_timeout: float = 30,
+    ):
+        """
+        :param limit: The total number of simultaneous connections. 0 means no limit
+        :param limit_per_host: The number of simultaneous connections to a single host. 0 means no limit
+        :param ttl_dns_cache: How long resolved DNS entries are cached, in seconds. None caches them forever
+        :param keepalive_timeout: How long an idle connection is kept open for reuse, in seconds
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.ttl_dns_cache = ttl_dns_cache
+        self.keepalive_timeout = keepalive_timeout
+        self.__sessions: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.__finalizers: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.__lock = threading.Lock()
+
+    async def session(self) -> aiohttp.ClientSession:
+        """
+        Get the session of the running event loop, creating it on first use
+        """
+        loop = asyncio.get_running_loop()
+        with self.__lock:
+            session = self.__sessions.get(loop)
+            if session is not None and not session.closed:
+                return session
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host,
+                    ttl_dns_cache=self.ttl_dns_cache,
+                    use_dns_cache=self.ttl_dns_cache != 0,
+                    keepalive_timeout=self.keepalive_timeout,
+                ),
+            )
+            self.__sessions[loop] = session
+        # The loop finalizes pending async generators on shutdown, which closes the session on its own loop
+        finalizer = self.__close_on_loop_shutdown(session)
+        self.__finalizers[loop] = finalizer
+        await finalizer.__anext__()
+        return session
+
+    async def aclose(self) -> None:
+        """
+        Close the session of the running event loop
+        """
+        loop = asyncio.get_running_loop()
+        with self.__lock:
+            session = self.__sessions.pop(loop, None)
+            self.__finalizers.pop(loop, None)
+        if session is not None:
+            await session.close()
+
+    @staticmethod
+    async def __close_on_loop_shutdown(session: aiohttp.ClientSession) -> AsyncGenerator[None, None]:
+        try:
+            yield
+        finally:
+            await session.close()
+
 
 class AsyncHTTPClient:
-    def __init__(self, base_url: str, timeout: int = 60):
+    def __init__(
+        self,
+        base_url: str,
+        timeout: Timeout | float | None = None,
+        pool: AsyncConnectionPool | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ):
         self.base_url = base_url
-        self.timeout = timeout
+        self.timeout = Timeout.of(timeout)
         self.headers = {
             "content-type": "application/json",
         }
+        self.__owns_pool = pool is None
+        self.pool = pool or AsyncConnectionPool()
+        self.retry_policy = retry_policy or RetryPolicy()
 
     def set_auth_header(self, api_key: str):
         self.headers["Authorization"] = f"Bearer {api_key}"
 
-    async def get(self, path: str, params: dict = None) -> dict:
-        url = self.base_url + path
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                url, params=params, timeout=self.timeout, headers=self.headers
-            ) as response:
-                return await self._handle_response(response)
+    async def aclose(self) -> None:
+        """
+        Close the underlying session, unless the pool was passed in and is owned by someone else
+        """
+        if self.__owns_pool:
+            await self.pool.aclose()
 
-    async def post(self, path: str, data: dict = None, headers: dict = None, **kwargs) -> dict:
-        url = self.base_url + path
+    async def __aenter__(self) -> "AsyncHTTPClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def get(
+        self, path: str, params: dict = None, response_type: Any = None, timeout: Timeout | float | None = None
+    ) -> Any:
+        return await self.__request("GET", path, response_type, timeout, params=params, headers=self.headers)
+
+    async def post(
+        self,
+        path: str,
+        data: dict = None,
+        headers: dict = None,
+        response_type: Any = None,
+        timeout: Timeout | float | None = None,
+        **kwargs,
+    ) -> Any:
         _headers = self.headers
         if headers:
-            _headers.update(headers)
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                url, data=data, timeout=self.timeout, headers=_headers, **kwargs
-            ) as response:
-                return await self._handle_response(response)
+            _headers = {**self.headers, **headers}
+        return await self.__request("POST", path, response_type, timeout, data=data, headers=_headers, **kwargs)
 
     async def put(self, path: str, data: dict = None) -> dict:
-        url = self.base_url + path
-        async with aiohttp.ClientSession() as session:
-            async with session.put(
-                url, data=data, timeout=self.timeout, headers=self.headers
-            ) as response:
-                return await self._handle_response(response)
+        return await self.__request("PUT", path, data=data, headers=self.headers)
 
     async def delete(self, path: str, data: dict = None) -> dict:
-        url = self.base_url + path
-        async with aiohttp.ClientSession() as session:
-            async with session.delete(
-                url, data=data, timeout=self.timeout, headers=self.headers
-            ) as response:
-                return await self._handle_response(response)
+        return await self.__request("DELETE", path, data=data, headers=self.headers)
 
     async def patch(self, path: str, data: dict = None) -> dict:
+        return await self.__request("PATCH", path, data=data, headers=self.headers)
+
+    async def stream(
+        self,
+        method: str,
+        path: str,
+        json: Any = None,
+        headers: dict = None,
+        timeout: Timeout | float | None = None,
+    ) -> aiohttp.ClientResponse:
+        """
+        Send a request and return as soon as the response headers are received, without reading the body.
+        The caller is responsible for releasing the returned response.
+        The total timeout, and the deadline if any, bound the whole stream and not only its headers.
+        """
+        url = self.base_url + path
+        _headers = {**self.headers, **headers} if headers else self.headers
+        data = codec.dumps(json) if json is not None else None
+        timeout = Timeout.of(timeout, self.timeout)
+        async for attempt in self.retry_policy.aretrying(method):
+            with attempt:
+                session = await self.pool.session()
+                response = await session.request(
+                    method, url, data=data, headers=_headers, timeout=self.__client_timeout(timeout)
+                )
+                response.raise_for_status()
+                return response
+
+    async def __request(
+        self, method: str, path: str, response_type: Any = None, timeout: Timeout | float | None = None, **kwargs
+    ) -> Any:
         url = self.base_url + path
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(
-                url, data=data, timeout=self.timeout, headers=self.headers
-            ) as response:
-                return await self._handle_response(response)
+        if "json" in kwargs:
+            kwargs["data"] = codec.dumps(kwargs.pop("json"))
+        timeout = Timeout.of(timeout, self.timeout)
+        try:
+            async for attempt in self.retry_policy.aretrying(method):
+                with attempt:
+                    session = await self.pool.session()
+                    # A cancelled or timed out request leaves the block before its body is read, which closes the
+                    # connection instead of returning it to the pool in an unknown state
+                    async with session.request(
+                        method, url, timeout=self.__client_timeout(timeout), **kwargs
+                    ) as response:
+                        return await self._handle_response(response, response_type)
+        except asyncio.TimeoutError as e:
+            left = remaining()
+            if left is not None and left <= 0 and not isinstance(e, DeadlineExceeded):
+                raise DeadlineExceeded("The deadline of the operation was exceeded") from e
+            raise
+
+    @staticmethod
+    def __client_timeout(timeout: Timeout) -> aiohttp.ClientTimeout:
+        # Every attempt gets the time left by the deadline, if any
+        timeout = timeout.bounded()
+        return aiohttp.ClientTimeout(total=timeout.total, sock_connect=timeout.connect, sock_read=timeout.read)
 
-    async def _handle_response(self, response: aiohttp.ClientResponse) -> dict:
+    async def _handle_response(self, response: aiohttp.ClientResponse, response_type: Any = None) -> Any:
         response.raise_for_status()
-        return await response.json()
+        body = await response.read()
+        if response_type is bytes:
+            return body
+        if response_type is not None:
+            return codec.parse(response_type, body)
+        return codec.loads(body) if body else None
@@ -0,0 +1,54 @@
+"""
+JSON encoding and decoding used by the HTTP clients.
+orjson is used when it is installed (`pip install vendi-sdk[fast]`), and the standard json module otherwise.
+Typed responses are validated straight from the raw bytes with a cached pydantic TypeAdapter, skipping the
+intermediate dict.
+"""
+import json
+from functools import lru_cache
+from typing import Any, TypeVar
+
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+T = TypeVar("T")
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """
+    Encode an object to JSON bytes
+    :param obj: The object to encode
+    :param sort_keys: Whether to sort the keys of the objects, for a canonical encoding of equal objects
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, allow_nan=False, sort_keys=sort_keys).encode()
+
+
+def loads(data: bytes | str) -> Any:
+    """
+    Decode JSON bytes or text to python objects
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@lru_cache(maxsize=None)
+def type_adapter(response_type: type[T]) -> TypeAdapter[T]:
+    """
+    Get the TypeAdapter of a type, building it only once
+    """
+    return TypeAdapter(response_type)
+
+
+def parse(response_type: type[T], data: bytes | str) -> T:
+    """
+    Validate raw JSON straight into the given type, e.g. a pydantic model or `list[Model]`
+    """
+    return type_adapter(response_type).validate_json(data)
@@ -1,3 +1,5 @@
+import os
+
 from pydantic_settings import BaseSettings
 
 
@@ -7,6 +9,20 @@ class VendiConfig(BaseSettings):
     VENDI_API_URL: str = "https://api.vendi-ai.com"
     """The URL of the Vendi API. Use the `VENDI_API_URL` environment variable to set this value."""
     VENDI_PROJECT_ID: str | None = None
+    VENDI_HTTP_POOL_CONNECTIONS: int = 10
+    """The number of per-host connection pools the sync HTTP session keeps cached."""
+    VENDI_HTTP_POOL_MAXSIZE: int = 32
+    """The maximum number of keep-alive connections the sync HTTP session keeps open per host."""
+    VENDI_HTTP_CONNECT_TIMEOUT: float | None = 10
+    """How long the HTTP clients wait for a connection to be established, in seconds."""
+    VENDI_HTTP_READ_TIMEOUT: float | None = 60
+    """How long the HTTP clients wait for the next bytes of a response, in seconds."""
+    VENDI_HTTP_TOTAL_TIMEOUT: float | None = None
+    """How long a single HTTP request attempt may take, in seconds. Unset means no limit."""
+    VENDI_DATASET_CACHE_DIR: str = os.path.join(os.path.expanduser("~"), ".cache", "vendi", "datasets")
+    """The directory of the local dataset cache."""
+    VENDI_DATASET_CACHE_MAX_SIZE: int = 10 * 1024 ** 3
+    """The maximum size of the local dataset cache on disk, in bytes."""
 
 
 vendi_config = VendiConfig()
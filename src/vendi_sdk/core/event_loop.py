@@ -0,0 +1,164 @@
+"""
+A long-lived event loop running in a background thread, so that sync code can use the async APIs without creating and
+tearing down an event loop, and its connection pool, on every call.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+from typing import Awaitable, TypeVar
+
+T = TypeVar("T")
+
+
+class BackgroundEventLoop:
+    """
+    An event loop in a daemon thread, started on first use. Thread-safe
+    """
+
+    def __init__(self, name: str = "vendi-event-loop"):
+        """
+        :param name: The name of the thread running the loop
+        """
+        self.name = name
+        self.__loop: asyncio.AbstractEventLoop | None = None
+        self.__thread: threading.Thread | None = None
+        self.__lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether the loop thread is started and not closed
+        """
+        return self.__thread is not None and self.__thread.is_alive()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """
+        The event loop, started if needed
+        """
+        with self.__lock:
+            if self.__loop is None:
+                self.__loop = asyncio.new_event_loop()
+                started = threading.Event()
+                self.__thread = threading.Thread(
+                    target=self.__run_forever, args=(self.__loop, started), name=self.name, daemon=True
+                )
+                self.__thread.start()
+                started.wait()
+            return self.__loop
+
+    def submit(self, awaitable: Awaitable[T]) -> "concurrent.futures.Future[T]":
+        """
+        Schedule an awaitable on the loop and return at once.
+        It runs in a copy of the caller's context, so a deadline set by the caller applies to it
+        :return: A future of its result. Cancelling the future cancels the awaitable
+        """
+        loop = self.loop
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        context = contextvars.copy_context()
+
+        def start() -> None:
+            if future.cancelled():
+                _close(awaitable)
+                return
+            task = context.run(asyncio.ensure_future, awaitable, loop=loop)
+            task.add_done_callback(lambda _: _copy_state(task, future))
+            future.add_done_callback(lambda _: future.cancelled() and loop.call_soon_threadsafe(task.cancel))
+
+        loop.call_soon_threadsafe(start)
+        return future
+
+    def run(self, awaitable: Awaitable[T], timeout: float | None = None) -> T:
+        """
+        Run an awaitable on the loop and block the calling thread until it completes
+        :param timeout: How long to wait for the result, in seconds. The awaitable is cancelled when it expires
+        :raises TimeoutError: If the timeout expired
+        """
+        if threading.current_thread() is self.__thread:
+            _close(awaitable)
+            raise RuntimeError("Cannot block the background event loop on itself, await the call instead")
+        future = self.submit(awaitable)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # Covers both the timeout and a KeyboardInterrupt of the caller
+            future.cancel()
+            raise
+
+    def close(self, timeout: float | None = 10) -> None:
+        """
+        Cancel the pending tasks, finalize the async generators (which closes the sessions of the connection pools
+        used on the loop), then stop the loop and its thread. The loop is started again on next use
+        :param timeout: How long to wait for the thread to stop, in seconds
+        """
+        detached = self.__detach()
+        if detached is None:
+            return
+        loop, thread = detached
+        asyncio.run_coroutine_threadsafe(_shutdown(), loop).result(timeout)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+
+    async def aclose(self, timeout: float | None = 10) -> None:
+        """
+        Close the loop like `close()`, from another event loop, without blocking it while the tasks are cancelled and
+        the thread stops
+        :param timeout: How long to wait for the thread to stop, in seconds
+        """
+        detached = self.__detach()
+        if detached is None:
+            return
+        loop, thread = detached
+        await asyncio.wait_for(asyncio.wrap_future(asyncio.run_coroutine_threadsafe(_shutdown(), loop)), timeout)
+        loop.call_soon_threadsafe(loop.stop)
+        await asyncio.to_thread(thread.join, timeout)
+        if not thread.is_alive():
+            loop.close()
+
+    def __detach(self) -> tuple[asyncio.AbstractEventLoop, threading.Thread] | None:
+        """
+        Forget the running loop, so that the next use starts a new one
+        :return: The loop and its thread, None if the loop was not started
+        """
+        with self.__lock:
+            loop, thread = self.__loop, self.__thread
+            self.__loop = self.__thread = None
+        if loop is None:
+            return None
+        if thread is threading.current_thread():
+            raise RuntimeError("Cannot close the background event loop from itself")
+        return loop, thread
+
+    @staticmethod
+    def __run_forever(loop: asyncio.AbstractEventLoop, started: threading.Event) -> None:
+        asyncio.set_event_loop(loop)
+        loop.call_soon(started.set)
+        loop.run_forever()
+
+
+async def _shutdown() -> None:
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.get_running_loop().shutdown_asyncgens()
+
+
+def _copy_state(task: asyncio.Future, future: concurrent.futures.Future) -> None:
+    if task.cancelled():
+        future.cancel()
+    if not future.set_running_or_notify_cancel():
+        return
+    if task.exception() is not None:
+        future.set_exception(task.exception())
+    else:
+        future.set_result(task.result())
+
+
+def _close(awaitable: Awaitable) -> None:
+    # Avoid the "coroutine was never awaited" warning of a coroutine that will not run
+    if asyncio.iscoroutine(awaitable):
+        awaitable.close()
@@ -2,13 +2,55 @@ from typing import Dict, Optional, Any
 
 import requests
 from requests import Response
+from requests.adapters import HTTPAdapter
+
+from vendi_sdk.core import codec
+from vendi_sdk.core.config import vendi_config
+from vendi_sdk.core.retry import RetryPolicy
+from vendi_sdk.core.timeouts import DeadlineExceeded, Timeout, remaining
+
+
+def create_session(
+    pool_connections: int | None = None,
+    pool_maxsize: int | None = None,
+    keep_alive: bool = True,
+) -> requests.Session:
+    """
+    Create a pooled `requests.Session` that can be shared between several HttpClient instances
+    :param pool_connections: The number of per-host connection pools to cache. Defaults to `VENDI_HTTP_POOL_CONNECTIONS`
+    :param pool_maxsize: The maximum number of connections to keep alive per host. Defaults to `VENDI_HTTP_POOL_MAXSIZE`
+    :param keep_alive: Whether to keep connections open between requests. Disable it to close the socket after every call
+    :return: The configured session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections or vendi_config.VENDI_HTTP_POOL_CONNECTIONS,
+        pool_maxsize=pool_maxsize or vendi_config.VENDI_HTTP_POOL_MAXSIZE,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
 
 
 class HttpClient:
-    def __init__(self, api_key: str, url: str | None = None, api_prefix: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: str,
+        url: str | None = None,
+        api_prefix: Optional[str] = None,
+        session: requests.Session | None = None,
+        retry_policy: RetryPolicy | None = None,
+        timeout: Timeout | float | None = None,
+    ):
         self.__url: str = url
         self.__api_url: str = url + api_prefix if api_prefix else url
         self.__api_key: str = api_key
+        self.__owns_session: bool = session is None
+        self.__session: requests.Session = session or create_session()
+        self.__retry_policy: RetryPolicy = retry_policy or RetryPolicy()
+        self.__timeout: Timeout = Timeout.of(timeout)
 
     @property
     def base_url(self) -> str:
@@ -18,31 +60,66 @@ class HttpClient:
     def api_url(self) -> str:
         return self.__api_url
 
-    # @retry(wait=wait_exponential(max=3), stop=stop_after_attempt(3), reraise=True)
+    @property
+    def session(self) -> requests.Session:
+        return self.__session
+
+    @property
+    def retry_policy(self) -> RetryPolicy:
+        return self.__retry_policy
+
+    @property
+    def timeout(self) -> Timeout:
+        return self.__timeout
+
+    def close(self) -> None:
+        """
+        Close the underlying session, unless it was passed in and is owned by someone else
+        """
+        if self.__owns_session:
+            self.__session.close()
+
+    def __enter__(self) -> "HttpClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
     def put(
         self,
         uri: str,
         json_data: Any = None,
         data: Any = None,
         headers: Optional[Dict] = None,
+        response_type: Any = None,
+        timeout: Timeout | float | None = None,
     ) -> Any:
         _headers = self._set_headers(headers)
         url = self.__urljoin(uri)
-        res = requests.put(url, json=json_data, data=data, headers=_headers)
-        return self.__handle_response(res)
+        return self.__request(
+            "PUT", url, response_type, timeout=timeout, data=self.__encode(json_data, data), headers=_headers
+        )
 
-    # @retry(wait=wait_exponential(max=3), stop=stop_after_attempt(3), reraise=True)
     def post(
         self,
         uri: str,
         json_data: Any = None,
         data: Any = None,
         headers: Optional[Dict] = None,
+        response_type: Any = None,
+        timeout: Timeout | float | None = None,
     ) -> Any:
         _headers = self._set_headers(headers)
         url = self.__urljoin(uri)
-        res = requests.post(url, json=json_data, data=data, headers=_headers, allow_redirects=True)
-        return self.__handle_response(res)
+        return self.__request(
+            "POST",
+            url,
+            response_type,
+            timeout=timeout,
+            data=self.__encode(json_data, data),
+            headers=_headers,
+            allow_redirects=True,
+        )
 
     def _set_headers(self, headers: Dict[str, str]) -> Dict[str, str]:
         _headers = {
@@ -53,9 +130,14 @@ class HttpClient:
             _headers.update(headers)
         return _headers
 
-    # @retry(wait=wait_exponential(max=3), stop=stop_after_attempt(3), reraise=True)
     def get(
-        self, uri: str | None = None, *, params: Optional[Dict] = None, headers: Optional[Dict] = None
+        self,
+        uri: str | None = None,
+        *,
+        params: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+        response_type: Any = None,
+        timeout: Timeout | float | None = None,
     ) -> Any:
         _headers = self._set_headers(headers)
         url = self.__urljoin(uri)
@@ -66,15 +148,17 @@ class HttpClient:
                     v = "true" if v else "false"
                 translate_params[k] = v
 
-        res = requests.get(url, params=translate_params, headers=_headers)
-        return self.__handle_response(res)
+        return self.__request(
+            "GET", url, response_type, timeout=timeout, params=translate_params, headers=_headers
+        )
 
-    # @retry(wait=wait_exponential(max=3), stop=stop_after_attempt(3), reraise=True)
     def delete(
         self,
         uri: str,
         params: Optional[Dict] = None,
         headers: Optional[Dict] = None,
+        response_type: Any = None,
+        timeout: Timeout | float | None = None,
     ) -> Any:
         _headers = self._set_headers(headers)
         url = self.__urljoin(uri)
@@ -85,8 +169,59 @@ class HttpClient:
                     v = "true" if v else "false"
                 translate_params[k] = v
 
-        res = requests.delete(url, params=translate_params, headers=_headers)
-        return self.__handle_response(res)
+        return self.__request(
+            "DELETE", url, response_type, timeout=timeout, params=translate_params, headers=_headers
+        )
+
+    def stream(
+        self,
+        method: str,
+        uri: str,
+        json_data: Any = None,
+        headers: Optional[Dict] = None,
+        timeout: Timeout | float | None = None,
+    ) -> Response:
+        """
+        Send a request and return as soon as the response headers are received, without reading the body.
+        The caller is responsible for closing the returned response.
+        """
+        _headers = self._set_headers(headers)
+        url = self.__urljoin(uri)
+        return self.__request(
+            method, url, stream=True, timeout=timeout, data=self.__encode(json_data, None), headers=_headers
+        )
+
+    def __request(
+        self,
+        method: str,
+        url: str,
+        response_type: Any = None,
+        stream: bool = False,
+        timeout: Timeout | float | None = None,
+        **kwargs,
+    ) -> Any:
+        timeout = Timeout.of(timeout, self.__timeout)
+        try:
+            for attempt in self.__retry_policy.retrying(method):
+                with attempt:
+                    # Every attempt gets the time left by the deadline, if any
+                    res = self.__session.request(
+                        method, url, stream=stream, timeout=timeout.bounded().as_requests(), **kwargs
+                    )
+                    if stream and res.ok:
+                        return res
+                    return self.__handle_response(res, response_type)
+        except requests.Timeout as e:
+            left = remaining()
+            if left is not None and left <= 0:
+                raise DeadlineExceeded("The deadline of the operation was exceeded") from e
+            raise
+
+    @staticmethod
+    def __encode(json_data: Any, data: Any) -> Any:
+        if json_data is None:
+            return data
+        return codec.dumps(json_data)
 
     def __urljoin(self, uri: str) -> str:
         if not uri:
@@ -94,7 +229,7 @@ class HttpClient:
         return self.__api_url + uri
 
     @staticmethod
-    def __handle_response(resp: Response) -> Any:
+    def __handle_response(resp: Response, response_type: Any = None) -> Any:
         try:
             resp.raise_for_status()
         except requests.exceptions.HTTPError as e:
@@ -104,7 +239,11 @@ class HttpClient:
             except ValueError:
                 pass
             raise requests.exceptions.HTTPError(message, response=e.response)
-        return resp.json() if resp.content else None
+        if response_type is bytes:
+            return resp.content
+        if response_type is not None:
+            return codec.parse(response_type, resp.content)
+        return codec.loads(resp.content) if resp.content else None
 
     def patch(
         self,
@@ -112,8 +251,11 @@ class HttpClient:
         json_data: Any = None,
         data: Any = None,
         headers: Optional[Dict] = None,
+        response_type: Any = None,
+        timeout: Timeout | float | None = None,
     ) -> Any:
         _headers = self._set_headers(headers)
         url = self.__urljoin(uri)
-        res = requests.patch(url, json=json_data, data=data, headers=_headers)
-        return self.__handle_response(res)
+        return self.__request(
+            "PATCH", url, response_type, timeout=timeout, data=self.__encode(json_data, data), headers=_headers
+        )
@@ -0,0 +1,251 @@
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from collections import Counter
+from typing import Iterable
+
+import aiohttp
+import requests
+import urllib3
+from tenacity import AsyncRetrying, RetryCallState, Retrying
+
+from vendi_sdk.core.timeouts import DeadlineExceeded, remaining
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+"""Methods that are safe to send again after any transient failure."""
+
+
+class RetryStats:
+    """
+    Thread-safe counters of the retries done through a RetryPolicy, meant to be exported as metrics
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.attempts = 0
+        """The number of requests sent, including the retried ones."""
+        self.retries = 0
+        """The number of requests sent again after a retryable failure."""
+        self.exhausted = 0
+        """The number of calls that failed after using all their attempts or their retry budget."""
+        self.retries_by_reason: Counter[str] = Counter()
+        """The number of retries per reason - a status code or an exception class name."""
+
+    def record_attempt(self) -> None:
+        with self.__lock:
+            self.attempts += 1
+
+    def record_retry(self, reason: str) -> None:
+        with self.__lock:
+            self.retries += 1
+            self.retries_by_reason[reason] += 1
+
+    def record_exhausted(self) -> None:
+        with self.__lock:
+            self.exhausted += 1
+
+    def snapshot(self) -> dict:
+        """
+        Get a consistent copy of the counters
+        """
+        with self.__lock:
+            return {
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "exhausted": self.exhausted,
+                "retries_by_reason": dict(self.retries_by_reason),
+            }
+
+
+class RetryPolicy:
+    """
+    Retry policy shared by the sync and async HTTP clients.
+    Failed requests are retried with exponential backoff and full jitter, honoring the `Retry-After` header.
+    Non idempotent requests (e.g. POST completions) are only retried when the connection could not be established,
+    or on `non_idempotent_retry_statuses`, where the server did not process the request.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        retry_budget: float | None = 60.0,
+        retry_statuses: Iterable[int] = (408, 429, 500, 502, 503, 504),
+        non_idempotent_retry_statuses: Iterable[int] = (429, 503),
+        respect_retry_after: bool = True,
+    ):
+        """
+        :param max_attempts: The maximum number of attempts per call, including the first one. 1 disables retries
+        :param backoff_base: The base delay of the exponential backoff, in seconds
+        :param backoff_max: The maximum backoff delay between two attempts, in seconds
+        :param retry_budget: The maximum time spent on a single call including all its retries, in seconds.
+        None means no limit
+        :param retry_statuses: The response status codes that are retried for idempotent requests
+        :param non_idempotent_retry_statuses: The response status codes that are retried for non idempotent requests
+        :param respect_retry_after: Whether to wait for at least the `Retry-After` delay sent by the server
+        """
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_budget = retry_budget
+        self.retry_statuses = frozenset(retry_statuses)
+        self.non_idempotent_retry_statuses = frozenset(non_idempotent_retry_statuses)
+        self.respect_retry_after = respect_retry_after
+        self.stats = RetryStats()
+
+    @classmethod
+    def disabled(cls) -> "RetryPolicy":
+        """
+        A policy that sends every request exactly once
+        """
+        return cls(max_attempts=1)
+
+    def retrying(self, method: str) -> Retrying:
+        """
+        Get a tenacity controller applying this policy to a sync request of the given HTTP method
+        """
+        return Retrying(**self.__retrying_kwargs(method), sleep=time.sleep)
+
+    def aretrying(self, method: str) -> AsyncRetrying:
+        """
+        Get a tenacity controller applying this policy to an async request of the given HTTP method
+        """
+        return AsyncRetrying(**self.__retrying_kwargs(method), sleep=asyncio.sleep)
+
+    def is_retryable(self, method: str, exc: BaseException) -> bool:
+        """
+        Whether a request of the given HTTP method that failed with `exc` can be sent again
+        """
+        if isinstance(exc, DeadlineExceeded):
+            return False
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        status = status_code(exc)
+        if status is not None:
+            statuses = self.retry_statuses if idempotent else self.non_idempotent_retry_statuses
+            return status in statuses
+        if idempotent:
+            return isinstance(
+                exc, (requests.ConnectionError, requests.Timeout, aiohttp.ClientConnectionError, asyncio.TimeoutError)
+            )
+        # The request may have reached the server, only retry if the connection was never established
+        return isinstance(exc, (requests.ConnectTimeout, aiohttp.ClientConnectorError)) or _never_connected(exc)
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        """
+        The delay before sending attempt number `attempt + 1`
+        :param attempt: The number of attempts done so far
+        :param retry_after: The delay the server asked for, if any
+        """
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        if retry_after is not None and self.respect_retry_after:
+            delay = max(delay, retry_after)
+        return delay
+
+    def __retrying_kwargs(self, method: str) -> dict:
+        def _retry(retry_state: RetryCallState) -> bool:
+            exc = retry_state.outcome.exception()
+            return exc is not None and self.is_retryable(method, exc)
+
+        def _before(retry_state: RetryCallState) -> None:
+            self.stats.record_attempt()
+
+        def _before_sleep(retry_state: RetryCallState) -> None:
+            exc = retry_state.outcome.exception()
+            status = status_code(exc)
+            self.stats.record_retry(str(status) if status is not None else type(exc).__name__)
+
+        def _retry_error_callback(retry_state: RetryCallState):
+            self.stats.record_exhausted()
+            return retry_state.outcome.result()
+
+        return {
+            "retry": _retry,
+            "stop": self.__stop,
+            "wait": self.__wait,
+            "before": _before,
+            "before_sleep": _before_sleep,
+            "retry_error_callback": _retry_error_callback,
+        }
+
+    def __stop(self, retry_state: RetryCallState) -> bool:
+        if retry_state.attempt_number >= self.max_attempts:
+            return True
+        left = remaining()
+        if left is not None and left <= (self.__retry_after(retry_state) or 0):
+            # The next attempt could not complete before the deadline of the operation
+            return True
+        if self.retry_budget is None:
+            return False
+        elapsed = retry_state.seconds_since_start or 0
+        retry_after = self.__retry_after(retry_state) or 0
+        return elapsed + retry_after >= self.retry_budget
+
+    def __wait(self, retry_state: RetryCallState) -> float:
+        delay = self.backoff(retry_state.attempt_number, self.__retry_after(retry_state))
+        if self.retry_budget is not None:
+            delay = min(delay, max(0.0, self.retry_budget - (retry_state.seconds_since_start or 0)))
+        left = remaining()
+        if left is not None:
+            delay = min(delay, max(0.0, left))
+        return delay
+
+    def __retry_after(self, retry_state: RetryCallState) -> float | None:
+        if not self.respect_retry_after or retry_state.outcome is None:
+            return None
+        exc = retry_state.outcome.exception()
+        return parse_retry_after(response_headers(exc).get("Retry-After")) if exc is not None else None
+
+
+def status_code(exc: BaseException | None) -> int | None:
+    """
+    The response status code carried by a sync or async HTTP error, if any
+    """
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status
+    return None
+
+
+def response_headers(exc: BaseException | None) -> dict:
+    """
+    The response headers carried by a sync or async HTTP error, if any
+    """
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.headers
+    if isinstance(exc, aiohttp.ClientResponseError) and exc.headers is not None:
+        return exc.headers
+    return {}
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Parse a `Retry-After` header, either in delay-seconds or in HTTP-date format, into a delay in seconds
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def _never_connected(exc: BaseException) -> bool:
+    """
+    Whether a requests ConnectionError was raised before a connection was established, e.g. a refused connection or
+    an unknown host, rather than after the request was sent, e.g. the server disconnecting before responding
+    """
+    if not isinstance(exc, requests.ConnectionError):
+        return False
+    reason = exc.args[0] if exc.args else None
+    # requests wraps the urllib3 error in a MaxRetryError
+    reason = getattr(reason, "reason", reason)
+    return isinstance(reason, urllib3.exceptions.NewConnectionError)
@@ -0,0 +1,93 @@
+"""
+In-flight deduplication of identical calls. While a call for a key is running, other callers asking for the same key
+wait for it and share its result instead of starting their own.
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Thread-safe single-flight group for sync callables
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__calls: dict[Hashable, _Call] = {}
+        self.coalesced = 0
+        """The number of calls that were served by another in-flight call."""
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """
+        Run `fn`, unless a call with the same key is already running, in which case wait for its result
+        """
+        with self.__lock:
+            call = self.__calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.__calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """
+    Single-flight group for coroutines. The shared call runs in its own task, so a cancelled caller does not cancel
+    it for the others
+    """
+
+    def __init__(self):
+        self.__tasks: dict[tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Task] = {}
+        self.coalesced = 0
+        """The number of calls that were served by another in-flight call."""
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await `fn()`, unless a call with the same key is already running, in which case wait for its result
+        """
+        # Tasks can only be awaited from their own loop
+        task_key = (asyncio.get_running_loop(), key)
+        task = self.__tasks.get(task_key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self.__tasks[task_key] = task
+            task.add_done_callback(lambda t: self.__forget(task_key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def __forget(self, task_key: tuple, task: asyncio.Task) -> None:
+        if self.__tasks.get(task_key) is task:
+            del self.__tasks[task_key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every caller was cancelled
+            task.exception()
@@ -0,0 +1,86 @@
+"""
+Incremental parser of server-sent events (text/event-stream).
+Bytes are fed as they arrive from the socket and complete events are returned as soon as their terminating blank
+line is received, without buffering the whole body.
+"""
+
+
+class ServerSentEvent:
+    __slots__ = ("event", "data", "id", "retry")
+
+    def __init__(self, event: str = "message", data: bytes = b"", id: str | None = None, retry: int | None = None):
+        self.event = event
+        """The event type, `message` unless the server sent an `event:` field."""
+        self.data = data
+        """The raw event data. Multiple `data:` lines are joined with a newline."""
+        self.id = id
+        """The last event ID sent by the server, if any."""
+        self.retry = retry
+        """The reconnection time the server asked for, in milliseconds, if any."""
+
+    def __repr__(self) -> str:
+        return f"ServerSentEvent(event={self.event!r}, data={self.data!r}, id={self.id!r})"
+
+
+class SSEDecoder:
+    def __init__(self):
+        self.__buffer = b""
+        self.__event: str | None = None
+        self.__data: list[bytes] = []
+        self.__last_id: str | None = None
+        self.__retry: int | None = None
+
+    def feed(self, chunk: bytes) -> list[ServerSentEvent]:
+        """
+        Feed the next bytes of the stream
+        :return: The events completed by these bytes, possibly none
+        """
+        self.__buffer += chunk
+        *lines, self.__buffer = self.__buffer.split(b"\n")
+        events = []
+        for line in lines:
+            event = self.__decode_line(line.rstrip(b"\r"))
+            if event is not None:
+                events.append(event)
+        return events
+
+    def flush(self) -> list[ServerSentEvent]:
+        """
+        Signal the end of the stream
+        :return: The last event, if the stream ended without a trailing blank line
+        """
+        events = self.feed(b"\n") if self.__buffer else []
+        event = self.__decode_line(b"")
+        if event is not None:
+            events.append(event)
+        return events
+
+    def __decode_line(self, line: bytes) -> ServerSentEvent | None:
+        if not line:
+            if not self.__data and self.__event is None:
+                return None
+            event = ServerSentEvent(
+                event=self.__event or "message",
+                data=b"\n".join(self.__data),
+                id=self.__last_id,
+                retry=self.__retry,
+            )
+            self.__event = None
+            self.__data = []
+            return event
+
+        if line.startswith(b":"):
+            return None
+        field, _, value = line.partition(b":")
+        if value.startswith(b" "):
+            value = value[1:]
+
+        if field == b"data":
+            self.__data.append(value)
+        elif field == b"event":
+            self.__event = value.decode()
+        elif field == b"id":
+            self.__last_id = value.decode()
+        elif field == b"retry" and value.isdigit():
+            self.__retry = int(value)
+        return None
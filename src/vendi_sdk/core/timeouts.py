@@ -0,0 +1,131 @@
+"""
+Timeouts and deadlines of the HTTP requests.
+A Timeout bounds a single attempt of a request. A deadline bounds a whole operation, including its retries, the waits
+for the limiters and every request it sends: it is held in a context variable, so it propagates through the calls and
+the asyncio tasks started under it.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from pydantic import BaseModel, ConfigDict
+
+from vendi_sdk.core.config import vendi_config
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("vendi_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised when an operation runs out of the time its deadline gave it
+    """
+
+
+class Timeout(BaseModel):
+    connect: float | None = None
+    """How long to wait for a connection to be established, in seconds. None means no limit."""
+    read: float | None = None
+    """How long to wait for the next bytes of the response, in seconds. None means no limit."""
+    total: float | None = None
+    """How long a whole attempt may take, in seconds. None means no limit. The sync client can only enforce it per
+    socket operation, by capping the connect and read timeouts."""
+
+    model_config = ConfigDict(frozen=True)
+
+    @classmethod
+    def default(cls) -> "Timeout":
+        """
+        The timeouts configured by `VENDI_HTTP_CONNECT_TIMEOUT`, `VENDI_HTTP_READ_TIMEOUT` and
+        `VENDI_HTTP_TOTAL_TIMEOUT`
+        """
+        return cls(
+            connect=vendi_config.VENDI_HTTP_CONNECT_TIMEOUT,
+            read=vendi_config.VENDI_HTTP_READ_TIMEOUT,
+            total=vendi_config.VENDI_HTTP_TOTAL_TIMEOUT,
+        )
+
+    @classmethod
+    def of(cls, value: "Timeout | float | None", default: "Timeout | None" = None) -> "Timeout":
+        """
+        Normalize a timeout argument. A number bounds both the connection and every read, like in `requests`
+        """
+        if value is None:
+            return default or cls.default()
+        if isinstance(value, Timeout):
+            return value
+        return cls(connect=value, read=value)
+
+    def bounded(self) -> "Timeout":
+        """
+        This timeout, shortened to fit in the remaining time of the current deadline
+        :raises DeadlineExceeded: If the deadline has already passed
+        """
+        check_deadline()
+        left = remaining()
+        if left is None:
+            return self
+        return Timeout(
+            connect=_min(self.connect, left),
+            read=_min(self.read, left),
+            total=_min(self.total, left),
+        )
+
+    def as_requests(self) -> tuple[float | None, float | None]:
+        """
+        The (connect, read) timeout tuple of `requests`
+        """
+        return _min(self.connect, self.total), _min(self.read, self.total)
+
+
+@contextmanager
+def deadline(seconds: float | None = None, at: float | None = None) -> Iterator[float | None]:
+    """
+    Bound everything run in the block, sync or async, by a deadline. Nested deadlines can only shorten it
+    :param seconds: The time the block has, from now
+    :param at: The absolute deadline, as a `time.monotonic()` timestamp
+    :return: The effective deadline, as a `time.monotonic()` timestamp
+    Examples:
+    >>> with deadline(5):
+    >>>     client.completions.create(...)  # the retries included, within 5 seconds
+    """
+    candidates = [d for d in (_deadline.get(), at, time.monotonic() + seconds if seconds is not None else None)
+                  if d is not None]
+    effective = min(candidates) if candidates else None
+    token = _deadline.set(effective)
+    try:
+        yield effective
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline() -> float | None:
+    """
+    The deadline of the current context, as a `time.monotonic()` timestamp, if any
+    """
+    return _deadline.get()
+
+
+def remaining() -> float | None:
+    """
+    The time left before the deadline of the current context, in seconds. None if there is no deadline
+    """
+    at = _deadline.get()
+    return at - time.monotonic() if at is not None else None
+
+
+def check_deadline() -> None:
+    """
+    :raises DeadlineExceeded: If the deadline of the current context has passed
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("The deadline of the operation was exceeded")
+
+
+def _min(a: float | None, b: float | None) -> float | None:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a, b)
@@ -0,0 +1,266 @@
+"""
+Opt-in local cache of downloaded datasets, keyed by the dataset ID and the time it was last updated, so that a new
+version of a dataset is downloaded again and an unchanged one never is.
+Datasets are stored as the JSONL text they are downloaded as, so a dataset read from the cache is exactly the one that
+was downloaded, whatever the types of its rows. The datasets loaded as Arrow tables are also kept as uncompressed Arrow
+IPC files next to their rows, memory-mapped when read back, which requires pyarrow (`pip install vendi-sdk[arrow]`).
+"""
+import hashlib
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import partial
+from typing import BinaryIO, Iterable, Iterator
+
+from vendi_sdk.core import codec
+from vendi_sdk.core.config import vendi_config
+from vendi_sdk.datasets.download import DOWNLOAD_CHUNK_SIZE, read_arrow
+from vendi_sdk.datasets.schema import CachedDataset
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+_ROWS = ".jsonl"
+_TABLE = ".arrow"
+_METADATA = ".json"
+_SUFFIXES = (_ROWS, _TABLE, _METADATA)
+
+
+class DatasetCache:
+    """
+    A size-bounded directory of datasets. When it grows over its size, the least recently used datasets are evicted.
+    It can be shared by several processes
+    """
+
+    def __init__(self, directory: str | os.PathLike | None = None, max_size: int | None = None):
+        """
+        :param directory: The directory of the cache. Defaults to `VENDI_DATASET_CACHE_DIR`
+        :param max_size: The maximum size of the cached files, in bytes. Defaults to `VENDI_DATASET_CACHE_MAX_SIZE`
+        """
+        self.directory = os.fspath(directory or vendi_config.VENDI_DATASET_CACHE_DIR)
+        self.max_size = max_size if max_size is not None else vendi_config.VENDI_DATASET_CACHE_MAX_SIZE
+        os.makedirs(self.directory, exist_ok=True)
+        self.__lock = threading.Lock()
+        self.hits = 0
+        """The number of datasets read from the cache."""
+        self.misses = 0
+        """The number of datasets not found in the cache."""
+        self.evictions = 0
+        """The number of datasets evicted to respect the size of the cache."""
+
+    def get(self, dataset_id: str, updated_at: datetime) -> BinaryIO | None:
+        """
+        Open a version of a dataset from the cache
+        :param dataset_id: The ID of the dataset
+        :param updated_at: The time the dataset was last updated
+        :return: The JSONL file of the dataset, to be closed by the caller, or None if this version is not cached
+        """
+        entry = self.__entry(dataset_id, updated_at)
+        try:
+            # The metadata is written last, and its modification time is the last time the dataset was used
+            os.utime(entry + _METADATA)
+            file = open(entry + _ROWS, "rb")
+        except FileNotFoundError:
+            self.__record("misses")
+            return None
+        self.__record("hits")
+        return file
+
+    def put(self, dataset_id: str, updated_at: datetime, chunks: Iterable[bytes]) -> BinaryIO:
+        """
+        Write a version of a dataset to the cache, replacing its other versions
+        :param dataset_id: The ID of the dataset
+        :param updated_at: The time the dataset was last updated
+        :param chunks: The JSONL document of the dataset, in chunks of any size, written as is
+        :return: The cached JSONL file of the dataset, to be closed by the caller
+        """
+        entry = self.__entry(dataset_id, updated_at)
+        rows = 0
+        last = b"\n"
+        with _writing(entry + _ROWS) as file:
+            for chunk in chunks:
+                if chunk:
+                    file.write(chunk)
+                    rows += chunk.count(b"\n")
+                    last = chunk[-1:]
+            if last != b"\n":
+                file.write(b"\n")
+                rows += 1
+        _remove(entry + _TABLE)
+        with _writing(entry + _METADATA) as file:
+            file.write(codec.dumps({"dataset_id": dataset_id, "updated_at": updated_at.isoformat(), "rows": rows}))
+        for other, _, _ in self.__stats():
+            if other != entry and os.path.basename(other).startswith(f"{dataset_id}."):
+                self.__remove(other)
+        self.__evict(keep=entry)
+        return open(entry + _ROWS, "rb")
+
+    def table(self, dataset_id: str, updated_at: datetime) -> "pa.Table":
+        """
+        Read a cached version of a dataset as an Arrow table, memory-mapped. The table is built from the rows of the
+        dataset the first time, and cached next to them
+        :param dataset_id: The ID of the dataset
+        :param updated_at: The time the dataset was last updated
+        :raises FileNotFoundError: If this version of the dataset is not cached
+        :raises ValueError: If the dataset cannot be loaded as an Arrow table, see `read_arrow`
+        """
+        if pa is None:
+            raise ImportError(
+                "Loading datasets as Arrow tables requires pyarrow, install it with `pip install vendi-sdk[arrow]`"
+            )
+        entry = self.__entry(dataset_id, updated_at)
+        try:
+            return _read(entry + _TABLE)
+        except FileNotFoundError:
+            pass
+        with open(entry + _ROWS, "rb") as file:
+            table = read_arrow(iter(partial(file.read, DOWNLOAD_CHUNK_SIZE), b""))
+        with _writing(entry + _TABLE) as file, pa.ipc.new_file(file, table.schema) as writer:
+            writer.write_table(table)
+        self.__evict(keep=entry)
+        return _read(entry + _TABLE)
+
+    def entries(self) -> list[CachedDataset]:
+        """
+        Get the datasets in the cache, from the least to the most recently used
+        """
+        entries = []
+        for entry, size, last_used in self.__stats():
+            try:
+                with open(entry + _METADATA, "rb") as file:
+                    metadata = codec.loads(file.read())
+            except FileNotFoundError:
+                # Removed, or still being written by another process
+                continue
+            entries.append(CachedDataset(
+                dataset_id=metadata["dataset_id"],
+                updated_at=datetime.fromisoformat(metadata["updated_at"]),
+                path=entry + _ROWS,
+                size=size,
+                rows=metadata["rows"],
+                last_used_at=datetime.fromtimestamp(last_used, tz=timezone.utc),
+            ))
+        return sorted(entries, key=lambda entry: entry.last_used_at)
+
+    @property
+    def size(self) -> int:
+        """
+        The size of the cached files, in bytes
+        """
+        return sum(size for _, size, _ in self.__stats())
+
+    def evict(self, dataset_id: str) -> bool:
+        """
+        Remove every version of a dataset from the cache
+        :return: Whether the dataset was cached
+        """
+        removed = False
+        for entry, _, _ in self.__stats():
+            if os.path.basename(entry).startswith(f"{dataset_id}."):
+                removed = self.__remove(entry) or removed
+        return removed
+
+    def clear(self) -> None:
+        """
+        Remove all the datasets from the cache
+        """
+        for entry, _, _ in self.__stats():
+            self.__remove(entry)
+
+    def snapshot(self) -> dict:
+        """
+        Get the counters of the cache, with its number of datasets and its size
+        """
+        stats = self.__stats()
+        with self.__lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(stats),
+                "size": sum(size for _, size, _ in stats),
+            }
+
+    def __entry(self, dataset_id: str, updated_at: datetime) -> str:
+        """
+        The path of the files of a version of a dataset, without their suffix
+        """
+        version = hashlib.sha256(updated_at.isoformat().encode()).hexdigest()[:16]
+        return os.path.join(self.directory, f"{dataset_id}.{version}")
+
+    def __stats(self) -> list[tuple[str, int, float]]:
+        """
+        Get the entries of the cache, with the size of their files and the last time they were used
+        """
+        sizes = {}
+        last_used = {}
+        for name in os.listdir(self.directory):
+            entry, suffix = os.path.splitext(os.path.join(self.directory, name))
+            if suffix not in _SUFFIXES:
+                continue
+            try:
+                stat = os.stat(entry + suffix)
+            except FileNotFoundError:
+                continue
+            sizes[entry] = sizes.get(entry, 0) + stat.st_size
+            if suffix == _METADATA:
+                last_used[entry] = stat.st_mtime
+        # The files left without metadata by an interrupted write are evicted first
+        return [(entry, size, last_used.get(entry, 0.0)) for entry, size in sizes.items()]
+
+    def __evict(self, keep: str) -> None:
+        stats = sorted(self.__stats(), key=lambda entry: entry[2])
+        size = sum(entry[1] for entry in stats)
+        for entry, entry_size, _ in stats:
+            if size <= self.max_size:
+                return
+            if entry != keep and self.__remove(entry):
+                size -= entry_size
+                self.__record("evictions")
+
+    @staticmethod
+    def __remove(entry: str) -> bool:
+        # Without its metadata, an entry is no longer read even if its other files cannot be removed yet
+        removed = False
+        for suffix in (_METADATA, _ROWS, _TABLE):
+            removed = _remove(entry + suffix) or removed
+        return removed
+
+    def __record(self, counter: str) -> None:
+        with self.__lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+@contextmanager
+def _writing(path: str) -> Iterator[BinaryIO]:
+    """
+    Write a file of the cache atomically: readers see either the previous file or the complete new one
+    """
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp, "wb") as file:
+            yield file
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _read(path: str) -> "pa.Table":
+    # The table keeps the memory map open, its buffers point into the file
+    return pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+
+def _remove(path: str) -> bool:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return False
+    except PermissionError:
+        # Memory-mapped by a reader on Windows, it is evicted later
+        return False
+    return True
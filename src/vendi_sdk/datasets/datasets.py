@@ -1,12 +1,41 @@
-import json
+import concurrent.futures
+import contextvars
 import logging
-import uuid
-from typing import List, Dict, Union, Optional
+import os
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+from functools import partial
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, Union, Optional
 
 import pandas as pd
+import requests
 
 from vendi_sdk.core.http_client import HttpClient
-from vendi_sdk.datasets.schema import Dataset, DatasetType
+from vendi_sdk.core.retry import RetryPolicy
+from vendi_sdk.core.timeouts import Timeout
+from vendi_sdk.datasets.cache import DatasetCache
+from vendi_sdk.datasets.download import (
+    DOWNLOAD_CHUNK_SIZE,
+    iter_json_items,
+    iter_jsonl,
+    json_lines,
+    read_arrow,
+)
+from vendi_sdk.datasets.schema import DataFormat, Dataset, DatasetType, UploadPart, UploadProgress, UploadSession
+from vendi_sdk.datasets.upload import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_PART_SIZE,
+    RowSource,
+    Rows,
+    UploadBody,
+    UploadIncompleteError,
+    checksum,
+    plan_parts,
+    read_part,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -16,39 +45,152 @@ class Datasets:
     Datasets is the client to interact with the datasets endpoint of the Vendi API.
     """
 
-    def __init__(self, url: str, api_key: str):
+    def __init__(
+        self,
+        url: str,
+        api_key: str,
+        session: requests.Session | None = None,
+        retry_policy: RetryPolicy | None = None,
+        timeout: Timeout | float | None = None,
+        cache: DatasetCache | None = None,
+    ):
+        """
+        :param cache: A local cache of the downloaded datasets, see `DatasetCache`
+        """
+        self.__cache = cache
         self.__client = HttpClient(
             url=url,
             api_key=api_key,
-            api_prefix=f"/platform/v1/datasets"
+            api_prefix=f"/platform/v1/datasets",
+            session=session,
+            retry_policy=retry_policy,
+            timeout=timeout,
         )
 
+    @property
+    def cache(self) -> DatasetCache | None:
+        """
+        The local cache of the downloaded datasets, if any. Use `cache.entries()` to list the cached datasets
+        """
+        return self.__cache
+
     def get(self, dataset_id: str) -> Dataset:
         """
         Get dataset metadata by ID
         :param dataset_id: The ID of the dataset to get
         """
-        res = self.__client.get(uri=f"/{dataset_id}")
-        dataset = Dataset(**res)
+        dataset = self.__client.get(uri=f"/{dataset_id}", response_type=Dataset)
 
-        def load_data() -> pd.DataFrame:
+        def load_data(format: DataFormat = "pandas", from_download_link: bool = False) -> Any:
             """
-            Download and load the dataset data into a pandas DataFrame
+            Download and load the dataset data. With a cache, a dataset that did not change since it was cached is
+            read from the cache instead
+            :param format: "pandas" for a DataFrame, "records" for a list of dicts, or "arrow" for a pyarrow Table.
+            Arrow tables are parsed by the Arrow JSON reader without any python object per row, but need every column
+            to have a single type
+            :param from_download_link: Whether to download the JSONL file of the dataset from its download link,
+            rather than its data from the API
             """
-            data = self.__client.get(uri=f"/{dataset_id}/data")
-            dataset._data = pd.DataFrame(data['data'])
+            dataset._data = self.__load(dataset_id, dataset.updated_at, format, from_download_link)
             return dataset.data
 
         dataset.load_data = load_data
         return dataset
 
+    def iter_rows(
+        self,
+        dataset_id: str,
+        from_download_link: bool = False,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    ) -> Iterator[dict]:
+        """
+        Stream the rows of a dataset, parsing them one at a time as they are downloaded, so that datasets larger than
+        memory can be processed
+        :param dataset_id: The ID of the dataset
+        :param from_download_link: Whether to download the JSONL file of the dataset from its download link, rather
+        than its data from the API
+        :param chunk_size: The number of bytes of the response read at once
+        :return: An iterator of the rows. Close it, or exhaust it, to release the connection
+        Examples:
+        >>> for row in client.datasets.iter_rows("YOUR_DATASET_ID"):
+        >>>     print(row["messages"][-1]["content"])
+        """
+        if from_download_link:
+            with self.__download(dataset_id) as response:
+                yield from iter_jsonl(response.iter_content(chunk_size))
+            return
+        with self.__client.stream("GET", f"/{dataset_id}/data") as response:
+            yield from iter_json_items(response.iter_content(chunk_size), "data")
+
+    def iter_batches(
+        self,
+        dataset_id: str,
+        batch_size: int = 1000,
+        from_download_link: bool = False,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stream the rows of a dataset as small DataFrames, parsing them as they are downloaded
+        :param dataset_id: The ID of the dataset
+        :param batch_size: The number of rows of every DataFrame but the last
+        :param from_download_link: Whether to download the JSONL file of the dataset from its download link, rather
+        than its data from the API
+        :return: An iterator of the DataFrames. Close it, or exhaust it, to release the connection
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        rows = self.iter_rows(dataset_id, from_download_link=from_download_link)
+        with closing(rows):
+            while batch := list(islice(rows, batch_size)):
+                yield pd.DataFrame(batch)
+
+    def __load(self, dataset_id: str, updated_at: datetime, format: DataFormat, from_download_link: bool) -> Any:
+        if format not in ("pandas", "arrow", "records"):
+            raise ValueError(f"Unknown format {format!r}, expected 'pandas', 'arrow' or 'records'")
+        if self.__cache is None:
+            if format == "arrow":
+                return read_arrow(self.__jsonl(dataset_id, from_download_link))
+            rows = list(self.iter_rows(dataset_id, from_download_link=from_download_link))
+            return rows if format == "records" else pd.DataFrame(rows)
+        file = self.__cache.get(dataset_id, updated_at)
+        if file is None:
+            file = self.__cache.put(dataset_id, updated_at, self.__jsonl(dataset_id, from_download_link))
+        with file:
+            if format == "arrow":
+                return self.__cache.table(dataset_id, updated_at)
+            rows = list(iter_jsonl(iter(partial(file.read, DOWNLOAD_CHUNK_SIZE), b"")))
+        return rows if format == "records" else pd.DataFrame(rows)
+
+    def __jsonl(self, dataset_id: str, from_download_link: bool) -> Iterator[bytes]:
+        """
+        Download the JSONL document of a dataset, in chunks. The rows of the API are kept as the JSON text they are
+        received as
+        """
+        if from_download_link:
+            with self.__download(dataset_id) as response:
+                yield from response.iter_content(DOWNLOAD_CHUNK_SIZE)
+            return
+        with self.__client.stream("GET", f"/{dataset_id}/data") as response:
+            items = iter_json_items(response.iter_content(DOWNLOAD_CHUNK_SIZE), "data", raw=True)
+            yield from json_lines(items)
+
+    def __download(self, dataset_id: str) -> requests.Response:
+        # The link is signed, the API key is not sent to its host
+        response = self.__client.session.get(
+            self.generate_download_link(dataset_id),
+            stream=True,
+            timeout=self.__client.timeout.bounded().as_requests(),
+        )
+        if not response.ok:
+            response.close()
+            response.raise_for_status()
+        return response
+
     def list(self) -> list[Dataset]:
         """
         Get a list of the datasets available to the user
         :return: A list of datasets metadata
         """
-        res = self.__client.get(uri=f"/")
-        return [Dataset(**dataset) for dataset in res]
+        return self.__client.get(uri=f"/", response_type=list[Dataset])
 
     def delete(self, dataset_id: str) -> None:
         """
@@ -61,60 +203,179 @@ class Datasets:
     def upload(
         self,
         name: str,
-        data: Optional[List[dict]] = None,
+        data: Optional[Rows] = None,
         data_path: Optional[str] = None,
         tags: Union[Dict, None] = None,
         path: Union[str, None] = None,
         dataset_type: Union[DatasetType, None] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        on_progress: Callable[[UploadProgress], None] | None = None,
     ) -> Dataset:
         """
-        Upload a dataset to the Vendi API
+        Upload a dataset to the Vendi API.
+        The rows are streamed to the API in chunks as they are read, so the dataset is never loaded in memory
         :param name: The name of the dataset
-        :param data: The data to upload. Should be a valid list of JSON objects
-        :param data_path: The path to the data to upload. Should be a valid path to a JSON file
+        :param data: The data to upload. Should be a list or an iterator of JSON objects, or a JSONL file object
+        :param data_path: The path to the data to upload. Should be a valid path to a JSONL file
         :param tags: The tags to apply to the dataset. Should be a dictionary of key/value pairs. For example:
         {"version": "v3", "language": "en"}
         :param path: The path to the dataset. Should be a string, for example: "datasets/financial". Defaults to None
         :param dataset_type: The type of dataset to upload. Should be a DatasetType enum value.
         If the dataset is a conversation dataset, with 'messages' key use "conversation". If the dataset is a raw dataset columns, use "raw"
+        :param chunk_size: The number of bytes of rows read and sent at once
+        :param on_progress: Called with the bytes and rows sent so far and the upload throughput after every chunk
         :return: The ID of the uploaded dataset
 
         """
-        if not data and not data_path:
+        if data is None and not data_path:
             raise ValueError("You must provide either data or data_path when uploading data")
 
-        if data_path:
-            with open(data_path, "r") as f:
-                try:
-                    data = [json.loads(line) for line in f.read().splitlines()]
-                except json.decoder.JSONDecodeError:
-                    raise ValueError(f"Could not parse JSON from {data_path} file. The file must be a valid JSONL file")
-
+        rows = RowSource(data_path or data)
         if tags is None:
             tags = {}
-        str_data = ""
-        for row in data:
-            str_data += json.dumps(row) + "\n"
 
         if not dataset_type:
-            if "messages" in data[0]:
-                dataset_type = DatasetType.CONVERSATION
-                logger.info("Detected conversation dataset, since there is a 'messages' key in the data")
-            else:
-                dataset_type = DatasetType.RAW
-                logger.info("Detected raw dataset")
-
-        res = self.__client.post(
-            uri=f"/upload",
-            json_data={
+            dataset_type = self.__detect_type(rows)
+
+        body = UploadBody(
+            fields={
                 "name": f"{name}.jsonl",
                 "type": dataset_type,
                 "tags": tags,
-                "data": str_data,
                 "path": path,
+            },
+            rows=rows,
+            chunk_size=chunk_size,
+            on_progress=on_progress,
+        )
+        dataset = self.__client.post(uri=f"/upload", data=body, response_type=Dataset)
+        progress = body.progress
+        logger.info(
+            f"Uploaded {progress.rows_sent} rows ({progress.bytes_sent / 1e6:.1f} MB) in "
+            f"{progress.elapsed_time:.1f}s, {progress.throughput / 1e6:.1f} MB/s"
+        )
+        return dataset
+
+    def upload_resumable(
+        self,
+        name: str,
+        data_path: str | os.PathLike,
+        tags: Union[Dict, None] = None,
+        path: Union[str, None] = None,
+        dataset_type: Union[DatasetType, None] = None,
+        part_size: int = DEFAULT_PART_SIZE,
+        max_workers: int = 4,
+        upload_id: str | None = None,
+        on_progress: Callable[[UploadProgress], None] | None = None,
+    ) -> Dataset:
+        """
+        Upload a large JSONL file in an upload session, as parts sent in parallel over the pooled connections.
+        Every part is checksummed and retried on its own, and the parts that still fail do not stop the others: the
+        session can then be resumed with its ID, and only the parts the API did not receive are sent again
+        :param name: The name of the dataset
+        :param data_path: The path to the JSONL file to upload
+        :param tags: The tags to apply to the dataset. Should be a dictionary of key/value pairs
+        :param path: The path to the dataset. Should be a string, for example: "datasets/financial". Defaults to None
+        :param dataset_type: The type of dataset to upload. Detected from the first row by default
+        :param part_size: The size of the parts, in bytes. Up to `max_workers` parts are held in memory at once
+        :param max_workers: The number of parts sent at the same time
+        :param upload_id: The ID of an upload session of the same file to resume, from a previous UploadIncompleteError
+        :param on_progress: Called with the bytes and rows sent so far and the upload throughput after every part
+        :return: The uploaded dataset
+        :raises UploadIncompleteError: If some parts could not be sent. Its `upload_id` resumes the upload
+        Examples:
+        >>> try:
+        >>>     dataset = client.datasets.upload_resumable(name="large", data_path="large.jsonl")
+        >>> except UploadIncompleteError as e:
+        >>>     dataset = client.datasets.upload_resumable(name="large", data_path="large.jsonl", upload_id=e.upload_id)
+        """
+        size = os.path.getsize(data_path)
+        if upload_id is None:
+            session = self.__client.post(
+                uri=f"/uploads",
+                json_data={
+                    "name": f"{name}.jsonl",
+                    "type": dataset_type or self.__detect_type(RowSource(data_path)),
+                    "tags": tags or {},
+                    "path": path,
+                    "size": size,
+                    "part_size": part_size,
+                },
+                response_type=UploadSession,
+            )
+        else:
+            session = self.__client.get(uri=f"/uploads/{upload_id}", response_type=UploadSession)
+            if session.size != size:
+                raise ValueError(f"{data_path} is not the file of upload {upload_id}, its size changed")
+        received = {part.number: part.checksum for part in session.parts}
+        parts = plan_parts(size, session.part_size)
+        progress = UploadProgress()
+        lock = threading.Lock()
+        started_at = time.monotonic()
+
+        def _send(number: int, offset: int, length: int) -> str:
+            data = read_part(data_path, offset, length)
+            digest = checksum(data)
+            if received.get(number) == digest:
+                return digest
+            part = self.__client.put(
+                uri=f"/uploads/{session.id}/parts/{number}",
+                data=data,
+                headers={"Content-Type": "application/octet-stream", "Content-Digest": f"sha-256=:{digest}:"},
+                response_type=UploadPart,
+            )
+            if part.checksum != digest:
+                raise ValueError(f"Part {number} of upload {session.id} was corrupted in transit")
+            with lock:
+                progress.bytes_sent += length
+                progress.rows_sent += data.count(b"\n")
+                progress.elapsed_time = time.monotonic() - started_at
+                if on_progress is not None:
+                    on_progress(progress)
+            return digest
+
+        digests: dict[int, str] = {}
+        errors: dict[int, BaseException] = {}
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="vendi-upload"
+        ) as executor:
+            # Every part runs in its own copy of the caller's context, to carry the deadline over
+            futures = {
+                executor.submit(contextvars.copy_context().run, _send, *part): part[0]
+                for part in parts
             }
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    error = future.exception()
+                    if error is not None:
+                        errors[futures[future]] = error
+                    else:
+                        digests[futures[future]] = future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        if errors:
+            raise UploadIncompleteError(session.id, errors)
+
+        dataset = self.__client.post(
+            uri=f"/uploads/{session.id}/complete",
+            json_data={"parts": [{"number": number, "checksum": digests[number]} for number, _, _ in parts]},
+            response_type=Dataset,
+        )
+        logger.info(
+            f"Uploaded {progress.rows_sent} rows ({progress.bytes_sent / 1e6:.1f} MB) in {len(parts)} parts in "
+            f"{progress.elapsed_time:.1f}s, {progress.throughput / 1e6:.1f} MB/s"
         )
-        return Dataset(**res)
+        return dataset
+
+    @staticmethod
+    def __detect_type(rows: RowSource) -> DatasetType:
+        if "messages" in rows.first_row():
+            logger.info("Detected conversation dataset, since there is a 'messages' key in the data")
+            return DatasetType.CONVERSATION
+        logger.info("Detected raw dataset")
+        return DatasetType.RAW
 
     def generate_download_link(self, dataset_id: str) -> str:
         """
@@ -0,0 +1,273 @@
+"""
+Streaming dataset downloads.
+The rows of a dataset are parsed one at a time as the response is received, so that datasets larger than memory can be
+processed in batches. The JSON documents of the API are parsed with the standard json decoder, value by value, and the
+JSONL files of the download links line by line.
+Datasets can also be loaded as Arrow tables when pyarrow is installed (`pip install vendi-sdk[arrow]`). The rows are
+then handed to the Arrow JSON reader as raw JSON lines, without building a python object per row. Arrow needs every
+column to have one type, so the datasets whose rows mix types, e.g. string and list message contents, are only loaded
+as rows.
+"""
+import codecs
+import io
+import json
+import re
+from itertools import chain
+from typing import Any, Iterable, Iterator
+
+from vendi_sdk.core import codec
+
+try:
+    import pyarrow as pa
+    import pyarrow.json as pa_json
+except ImportError:
+    pa = None
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+"""The number of bytes of a response read at once."""
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DELIMITERS = frozenset(" \t\n\r,:]}")
+
+ARROW_BLOCK_SIZE = 16 * 1024 * 1024
+"""The number of bytes of JSON lines the Arrow JSON reader parses at once. A row must fit in a block."""
+
+ARROW_SAMPLE_SIZE = 1024 * 1024
+"""The number of bytes of the first rows the schema of an Arrow table is inferred from."""
+
+
+def iter_json_items(chunks: Iterable[bytes], field: str, raw: bool = False) -> Iterator[Any]:
+    """
+    Parse the items of an array field of a JSON object incrementally, e.g. the rows of `{"data": [...]}`
+    :param chunks: The JSON document, in chunks of any size
+    :param field: The top-level field of the array
+    :param raw: Whether to yield the JSON text of every item instead of parsing it
+    :raises ValueError: If the document is not valid JSON, or not an object
+    """
+    reader = _Reader(chunks)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key != field or reader.peek() != "[":
+            value = reader.value()
+            if key == field and value is not None:
+                raise ValueError(f"The {field!r} field of the JSON document is not an array")
+        else:
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.expect("]")
+            else:
+                while True:
+                    yield reader.raw_value() if raw else reader.value()
+                    if reader.expect(",]") == "]":
+                        break
+        if reader.expect(",}") == "}":
+            return
+
+
+def iter_jsonl(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Parse the lines of a JSONL document incrementally
+    :param chunks: The document, in chunks of any size
+    """
+    pending = b""
+    for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield codec.loads(line)
+    if pending.strip():
+        yield codec.loads(pending)
+
+
+def read_arrow(chunks: Iterable[bytes]) -> "pa.Table":
+    """
+    Build an Arrow table from a JSONL document with the Arrow JSON reader. The columns missing from some rows are null
+    in these rows. Strings are kept as strings: the schema is inferred from the first rows with the timestamps it
+    detects turned back into strings, and only the fields that first appear later are inferred on their own
+    :param chunks: The document, in chunks of any size
+    :raises ValueError: If a column does not have the same type in every row, e.g. a string in one and a list in the
+    next, which an Arrow table cannot hold
+    """
+    if pa is None:
+        raise ImportError(
+            "Loading datasets as Arrow tables requires pyarrow, install it with `pip install vendi-sdk[arrow]`"
+        )
+    chunks = iter(chunks)
+    head = []
+    size = 0
+    for chunk in chunks:
+        head.append(chunk)
+        size += len(chunk)
+        if size >= ARROW_SAMPLE_SIZE and b"\n" in chunk:
+            break
+    sample = b"".join(head)
+    if not sample.strip():
+        return pa.table({})
+    try:
+        # The schema is inferred from the whole rows of the sample
+        end = sample.rfind(b"\n")
+        schema = pa_json.read_json(pa.BufferReader(sample[:end + 1] if end >= 0 else sample)).schema
+        schema = _strings_for_timestamps(schema)
+        source = io.BufferedReader(_ChunkStream(chain(head, chunks)), buffer_size=DOWNLOAD_CHUNK_SIZE)
+        table = pa_json.read_json(
+            source,
+            read_options=pa_json.ReadOptions(block_size=ARROW_BLOCK_SIZE),
+            parse_options=pa_json.ParseOptions(explicit_schema=schema, unexpected_field_behavior="infer"),
+        )
+    except pa.ArrowInvalid as e:
+        raise ValueError(
+            f"The dataset cannot be loaded as an Arrow table: {e}. Load it with format='pandas' or 'records' instead"
+        ) from e
+    # The reader splits the columns at its block boundaries
+    return table.combine_chunks() if table.num_rows else table
+
+
+def _strings_for_timestamps(schema: "pa.Schema") -> "pa.Schema":
+    def _type(data_type: "pa.DataType") -> "pa.DataType":
+        if pa.types.is_timestamp(data_type) or pa.types.is_date(data_type) or pa.types.is_time(data_type):
+            return pa.string()
+        if pa.types.is_list(data_type):
+            return pa.list_(data_type.value_field.with_type(_type(data_type.value_type)))
+        if pa.types.is_struct(data_type):
+            return pa.struct([field.with_type(_type(field.type)) for field in data_type])
+        return data_type
+
+    return pa.schema([field.with_type(_type(field.type)) for field in schema])
+
+
+def json_lines(items: Iterable[str]) -> Iterator[bytes]:
+    """
+    Join the JSON texts of items into a JSONL document, in chunks of about DOWNLOAD_CHUNK_SIZE bytes
+    """
+    pending = []
+    size = 0
+    for item in items:
+        if "\n" in item or "\r" in item:
+            # Line breaks can only be whitespace between the tokens of a JSON value
+            item = item.replace("\r", " ").replace("\n", " ")
+        pending.append(item)
+        size += len(item)
+        if size >= DOWNLOAD_CHUNK_SIZE:
+            yield ("\n".join(pending) + "\n").encode()
+            pending.clear()
+            size = 0
+    if pending:
+        yield ("\n".join(pending) + "\n").encode()
+
+
+class _ChunkStream(io.RawIOBase):
+    """
+    A readable file over chunks of bytes
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.__chunks = iter(chunks)
+        self.__pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self.__pending:
+            chunk = next(self.__chunks, None)
+            if chunk is None:
+                return 0
+            self.__pending = memoryview(chunk)
+        size = min(len(buffer), len(self.__pending))
+        buffer[:size] = self.__pending[:size]
+        self.__pending = self.__pending[size:]
+        return size
+
+
+class _Reader:
+    """
+    A buffer over a JSON document received in chunks, consumed one token or value at a time
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.__chunks = iter(chunks)
+        self.__decoder = codecs.getincrementaldecoder("utf-8")()
+        self.__json = json.JSONDecoder()
+        self.__buffer = ""
+        self.__position = 0
+        self.__eof = False
+
+    def peek(self) -> str:
+        """
+        The next non-whitespace character, without consuming it. Empty at the end of the document
+        """
+        while True:
+            self.__position = _WHITESPACE.match(self.__buffer, self.__position).end()
+            if self.__position < len(self.__buffer) or not self.__fill():
+                return self.__buffer[self.__position:self.__position + 1]
+
+    def expect(self, characters: str) -> str:
+        """
+        Consume the next non-whitespace character, which must be one of `characters`
+        """
+        character = self.peek()
+        if not character or character not in characters:
+            found = repr(character) if character else "the end of the document"
+            raise ValueError(f"Expected one of {characters!r} in the JSON document, found {found}")
+        self.__position += 1
+        return character
+
+    def value(self) -> Any:
+        """
+        Consume and parse the next JSON value
+        """
+        return self.__decode()[0]
+
+    def raw_value(self) -> str:
+        """
+        Consume the next JSON value and return its text
+        """
+        _, start = self.__decode()
+        return self.__buffer[start:self.__position]
+
+    def __decode(self) -> tuple[Any, int]:
+        """
+        Parse the next JSON value
+        :return: The value and the position it starts at in the buffer
+        """
+        self.peek()
+        while True:
+            start = self.__position
+            try:
+                value, end = self.__json.raw_decode(self.__buffer, start)
+            except json.JSONDecodeError as e:
+                if not self.__fill():
+                    raise ValueError(f"Invalid JSON document: {e}") from e
+                continue
+            # A number cut by the end of a chunk is parsed as a shorter one, a value always ends before a delimiter
+            if (end == len(self.__buffer) or self.__buffer[end] not in _DELIMITERS) and self.__fill():
+                continue
+            self.__position = end
+            return value, start
+
+    def __fill(self) -> bool:
+        """
+        Read at least as much as is buffered, so that a value spanning many chunks is parsed a few times only
+        :return: Whether anything was read
+        """
+        if self.__eof:
+            return False
+        pending = self.__buffer[self.__position:]
+        parts = [pending]
+        read = 0
+        while read <= len(pending):
+            chunk = next(self.__chunks, None)
+            if chunk is None:
+                self.__eof = True
+                parts.append(self.__decoder.decode(b"", final=True))
+                break
+            parts.append(self.__decoder.decode(chunk))
+            read += len(chunk)
+        self.__buffer = "".join(parts)
+        self.__position = 0
+        return read > 0 or len(self.__buffer) > len(pending)
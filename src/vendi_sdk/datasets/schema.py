@@ -1,6 +1,7 @@
 import uuid
+from datetime import datetime
 from enum import Enum
-from typing import Callable, Any
+from typing import Callable, Any, Literal
 
 import pandas as pd
 from pydantic import BaseModel
@@ -8,6 +9,9 @@ from pydantic import BaseModel
 from vendi_sdk.core.schema import SchemaMixin
 
 
+DataFormat = Literal["pandas", "arrow", "records"]
+
+
 class DatasetType(str, Enum):
     RAW = "raw"
     """A raw dataset is a dataset that has not been processed in any way. It is the most basic form of a dataset with random structure/dataset column names"""
@@ -24,14 +28,66 @@ class Dataset(SchemaMixin):
     """The storage the dataset is stored in."""
     _data: Any = None
     """The dataset data, only available after calling `load_data()`."""
-    load_data: Callable[[], Any] | None = None
-    """The function to call to load the dataset data. Populated after calling `get()` or `list()`."""
+    load_data: Callable[..., Any] | None = None
+    """The function to call to load the dataset data, `load_data(format="pandas" | "arrow" | "records")`. Populated
+    after calling `get()` or `list()`."""
 
     @property
-    def data(self) -> pd.DataFrame:
+    def data(self) -> pd.DataFrame | Any:
         """
-        Get the dataset data as a pandas DataFrame
+        Get the dataset data, as a pandas DataFrame unless it was loaded in another format
         """
         if self._data is None:
             raise ValueError("Dataset data is not loaded, run `load_data()` first")
         return self._data
+
+
+class UploadProgress(BaseModel):
+    bytes_sent: int = 0
+    """The number of bytes of JSONL rows handed to the connection so far."""
+    rows_sent: int = 0
+    """The number of rows handed to the connection so far."""
+    elapsed_time: float = 0.0
+    """The time since the upload started, in seconds."""
+
+    @property
+    def throughput(self) -> float:
+        """
+        The number of bytes sent per second
+        """
+        return self.bytes_sent / self.elapsed_time if self.elapsed_time else 0.0
+
+
+class UploadPart(BaseModel):
+    number: int
+    """The number of the part, from 1, in the order of the parts in the dataset."""
+    size: int
+    """The size of the part, in bytes."""
+    checksum: str
+    """The base64 encoded SHA-256 digest of the part."""
+
+
+class UploadSession(BaseModel):
+    id: str
+    """The ID of the upload session, to resume it with."""
+    size: int
+    """The size of the dataset file, in bytes."""
+    part_size: int
+    """The size of every part but the last, in bytes."""
+    parts: list[UploadPart] = []
+    """The parts received by the API so far."""
+
+
+class CachedDataset(BaseModel):
+    dataset_id: str
+    """The ID of the dataset."""
+    updated_at: datetime
+    """The version of the dataset that is cached, the time it was last updated."""
+    path: str
+    """The JSONL file of the dataset."""
+    size: int
+    """The size of the files of the dataset, with its Arrow table if it was loaded as one, in bytes."""
+    rows: int
+    """The number of rows of the dataset."""
+    last_used_at: datetime
+    """The last time the dataset was written to or read from the cache."""
@@ -0,0 +1,279 @@
+"""
+Streaming dataset uploads.
+The JSONL rows of a dataset are read from a file, a file object or an iterator of rows in fixed-size chunks and
+escaped into the JSON body of the upload request as it is sent with chunked transfer encoding, so the dataset is never
+held in memory, neither as rows nor as one string. Every line of a JSONL file is parsed on the way, before the chunk it
+ends in is sent, so that an invalid file fails the upload with its line number instead of being stored.
+Large dataset files can also be uploaded in an upload session, as checksummed parts sent in parallel. The parts the API
+already received are not sent again when the session is resumed.
+"""
+import base64
+import codecs
+import hashlib
+import io
+import os
+import time
+from itertools import chain
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, TextIO
+
+from vendi_sdk.core import codec
+from vendi_sdk.datasets.schema import UploadProgress
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+"""The number of bytes of JSONL rows read and sent at once."""
+
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+"""The size of the parts of an upload session."""
+
+Rows = str | os.PathLike | BinaryIO | TextIO | Iterable[dict]
+
+
+class RowSource:
+    """
+    The JSONL rows of a dataset, read in chunks. Paths, seekable file objects and sequences of rows can be read
+    several times, e.g. when a request is retried; other file objects and iterators only once
+    """
+
+    def __init__(self, rows: Rows):
+        """
+        :param rows: A path to a JSONL file, a JSONL file object opened in binary or text mode, or an iterable of rows
+        """
+        self.__rows = rows
+        self.__head: Any = None
+        self.__consumed = False
+        self.__start: int | None = None
+        if _is_file(rows) and rows.seekable():
+            self.__start = rows.tell()
+
+    @property
+    def replayable(self) -> bool:
+        """
+        Whether the rows can be read again after they were read once
+        """
+        rows = self.__rows
+        if isinstance(rows, (str, os.PathLike)):
+            return True
+        if _is_file(rows):
+            return self.__start is not None
+        return isinstance(rows, (list, tuple))
+
+    def first_row(self) -> dict:
+        """
+        Parse the first row, without consuming it
+        :raises ValueError: If there are no rows, or if the first line is not a JSON object
+        """
+        rows = self.__rows
+        if isinstance(rows, (str, os.PathLike)):
+            with open(rows, "rb") as f:
+                line = _first_line(f)
+        elif _is_file(rows):
+            if self.__start is not None:
+                line = _first_line(rows)
+                rows.seek(self.__start)
+            else:
+                if self.__head is None:
+                    # Kept to be sent before the rest of the stream
+                    self.__head = _first_line(rows)
+                line = self.__head
+        elif isinstance(rows, (list, tuple)):
+            if not rows:
+                raise ValueError("The dataset has no rows")
+            return rows[0]
+        else:
+            if self.__head is None:
+                iterator = iter(rows)
+                try:
+                    self.__head = next(iterator)
+                except StopIteration:
+                    raise ValueError("The dataset has no rows")
+                self.__rows = chain([self.__head], iterator)
+            return self.__head
+        if not line.strip():
+            raise ValueError("The dataset has no rows")
+        try:
+            row = codec.loads(line)
+        except ValueError:
+            raise ValueError("Could not parse JSON from the first line. The data must be valid JSONL")
+        if not isinstance(row, dict):
+            raise ValueError("The rows of the dataset must be JSON objects")
+        return row
+
+    def chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Read the rows as JSONL, in chunks of about `chunk_size` bytes. The lines of files are sent as they are, once
+        parsed to check that they are JSON objects
+        :raises ValueError: If the rows can only be read once and were already read, or if a line of a file is not a
+        JSON object
+        """
+        if self.__consumed and not self.replayable:
+            raise ValueError(
+                "The dataset rows were already consumed by a previous attempt and cannot be sent again. "
+                "Pass a path, a seekable file or a list to upload them"
+            )
+        self.__consumed = True
+        rows = self.__rows
+        if isinstance(rows, (str, os.PathLike)):
+            with open(rows, "rb") as f:
+                yield from _validated(_read_chunks(f, chunk_size))
+        elif _is_file(rows):
+            if self.__start is not None:
+                rows.seek(self.__start)
+                yield from _validated(_read_chunks(rows, chunk_size))
+            else:
+                head = self.__head if self.__head is not None else b""
+                yield from _validated(chain([head.encode() if isinstance(head, str) else head],
+                                            _read_chunks(rows, chunk_size)))
+        else:
+            buffer = bytearray()
+            for row in rows:
+                buffer += codec.dumps(row)
+                buffer += b"\n"
+                if len(buffer) >= chunk_size:
+                    yield bytes(buffer)
+                    buffer.clear()
+            if buffer:
+                yield bytes(buffer)
+
+
+class UploadIncompleteError(Exception):
+    """
+    Raised when some parts of an upload session could not be sent. The other parts were received, resume the session
+    with its `upload_id` to send only the missing ones
+    """
+
+    def __init__(self, upload_id: str, errors: dict[int, BaseException]):
+        super().__init__(
+            f"{len(errors)} parts of upload {upload_id} could not be sent, resume it with upload_id={upload_id!r}. "
+            f"First error: {errors[min(errors)]!r}"
+        )
+        self.upload_id = upload_id
+        """The ID of the upload session."""
+        self.errors = errors
+        """The error of every part that was not sent, by part number."""
+
+
+class UploadBody:
+    """
+    The JSON body of an upload request, `{...fields, "data": "<JSONL rows>"}`, generated chunk by chunk.
+    It is iterated again from the start when the request is retried
+    """
+
+    def __init__(
+        self,
+        fields: dict,
+        rows: RowSource,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        on_progress: Callable[[UploadProgress], None] | None = None,
+    ):
+        """
+        :param fields: The other fields of the body
+        :param rows: The rows sent as the `data` field
+        :param chunk_size: The number of bytes of rows read and sent at once
+        :param on_progress: Called with the progress of the upload after every chunk
+        """
+        self.fields = fields
+        self.rows = rows
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self.progress = UploadProgress()
+        """The progress of the last attempt to send the body."""
+
+    def __iter__(self) -> Iterator[bytes]:
+        self.progress = progress = UploadProgress()
+        started_at = time.monotonic()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        yield codec.dumps(self.fields)[:-1] + (b',"data":"' if self.fields else b'"data":"')
+        for chunk in self.rows.chunks(self.chunk_size):
+            # A chunk may end in the middle of a character, the decoder keeps it for the next one
+            yield _escape(decoder.decode(chunk))
+            progress.bytes_sent += len(chunk)
+            progress.rows_sent += chunk.count(b"\n")
+            progress.elapsed_time = time.monotonic() - started_at
+            if self.on_progress is not None:
+                self.on_progress(progress)
+        yield _escape(decoder.decode(b"", final=True)) + b'"}'
+        progress.elapsed_time = time.monotonic() - started_at
+
+
+def _escape(text: str) -> bytes:
+    # The JSON string literal of the text, without its quotes
+    return codec.dumps(text)[1:-1]
+
+
+def _validated(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Pass JSONL chunks through unchanged, each one after parsing the lines it completes. The last chunk is held until
+    the end of the document, which may end without a line break
+    :raises ValueError: If a line is not a JSON object. Blank lines are allowed
+    """
+    pending = b""
+    number = 0
+    last = b""
+    for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            number += 1
+            _validate_line(line, number)
+        if last:
+            yield last
+        last = chunk
+    _validate_line(pending, number + 1)
+    if last:
+        yield last
+
+
+def _validate_line(line: bytes, number: int) -> None:
+    if not line.strip():
+        return
+    try:
+        row = codec.loads(line)
+    except ValueError:
+        raise ValueError(f"Could not parse JSON from line {number}. The data must be valid JSONL")
+    if not isinstance(row, dict):
+        raise ValueError(f"The rows of the dataset must be JSON objects, line {number} is not")
+
+
+def _is_file(rows: Any) -> bool:
+    return isinstance(rows, io.IOBase) or hasattr(rows, "read")
+
+
+def _first_line(f: BinaryIO | TextIO) -> bytes | str:
+    line = f.readline()
+    while line and not line.strip():
+        line = f.readline()
+    return line
+
+
+def _read_chunks(f: BinaryIO | TextIO, chunk_size: int) -> Iterator[bytes]:
+    while chunk := f.read(chunk_size):
+        yield chunk.encode() if isinstance(chunk, str) else chunk
+
+
+def plan_parts(size: int, part_size: int) -> list[tuple[int, int, int]]:
+    """
+    Split a file into the parts of an upload session
+    :return: The number, the byte offset and the size of every part
+    """
+    if part_size < 1:
+        raise ValueError("part_size must be at least 1")
+    return [
+        (number, offset, min(part_size, size - offset))
+        for number, offset in enumerate(range(0, size, part_size), start=1)
+    ]
+
+
+def read_part(path: str | os.PathLike, offset: int, size: int) -> bytes:
+    """
+    Read a part of a file. Every call opens the file, so that parts can be read from several threads at once
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(size)
+
+
+def checksum(data: bytes) -> str:
+    """
+    The base64 encoded SHA-256 digest of a part, as sent in its `Content-Digest` header
+    """
+    return base64.b64encode(hashlib.sha256(data).digest()).decode()
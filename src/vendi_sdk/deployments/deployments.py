@@ -1,33 +1,45 @@
 from typing import List
 
+import requests
+
 from vendi_sdk.core.http_client import HttpClient
+from vendi_sdk.core.retry import RetryPolicy
+from vendi_sdk.core.timeouts import Timeout
 
 from .schema import Deployment, DeploymentStatus
 
 
 class Deployments:
-    def __init__(self, url: str, api_key: str):
+    def __init__(
+        self,
+        url: str,
+        api_key: str,
+        session: requests.Session | None = None,
+        retry_policy: RetryPolicy | None = None,
+        timeout: Timeout | float | None = None,
+    ):
         self.__api_key = api_key
 
         self.__client = HttpClient(
             url=url,
             api_key=api_key,
-            api_prefix=f"/v1/"
+            api_prefix=f"/v1/",
+            session=session,
+            retry_policy=retry_policy,
+            timeout=timeout,
         )
 
     def list(self) -> list[Deployment]:
         """
         Get a list of the deployments available to the user
         """
-        res = self.__client.get(uri=f"deployments/")
-        return [Deployment(**deployment) for deployment in res]
+        return self.__client.get(uri=f"deployments/", response_type=list[Deployment])
 
     def list_private(self) -> List[Deployment]:
         """
         Get a list of the private deployments available to the user
         """
-        res = self.__client.get(uri=f"deployments/")
-        return [Deployment(**deployment) for deployment in res]
+        return self.__client.get(uri=f"deployments/", response_type=list[Deployment])
 
     def get(self, deployment_id: str) -> Deployment:
         """
@@ -35,8 +47,7 @@ class Deployments:
         :param deployment_id: The ID of the deployment to get
         :return: The deployment metadata
         """
-        res = self.__client.get(uri=f"deployments/{deployment_id}")
-        return Deployment(**res)
+        return self.__client.get(uri=f"deployments/{deployment_id}", response_type=Deployment)
 
     def delete(self, deployment_id: str) -> bool:
         """
@@ -77,7 +88,7 @@ class Deployments:
         :param quantization: The quantization to use for the deployment. Please see the vendi documentation for a list of supported quantizations.
         :return: The created deployment metadata
         """
-        res = self.__client.post(
+        return self.__client.post(
             uri=f"deployments/create/",
             json_data={
                 "name": name,
@@ -93,8 +104,8 @@ class Deployments:
                 "scale_to_zero": scale_to_zero,
                 "scale_to_zero_timeout_seconds": scale_to_zero_timeout_seconds,
             },
+            response_type=Deployment,
         )
-        return Deployment(**res)
 
     def update(
         self,
@@ -111,14 +122,14 @@ class Deployments:
         This value must be between 0 and inf.
         :return: The updated deployment metadata
         """
-        res = self.__client.patch(
+        return self.__client.patch(
             uri=f"deployments/{deployment_id}",
             json_data={
                 "scale_to_zero": scale_to_zero,
                 "scale_to_zero_timeout_seconds": scale_to_zero_timeout_seconds,
             },
+            response_type=Deployment,
         )
-        return Deployment(**res)
 
     def start(
         self,
@@ -129,10 +140,10 @@ class Deployments:
         :param deployment_id: The ID of the deployment to start
         :return: The updated deployment metadata
         """
-        res = self.__client.post(
+        return self.__client.post(
             uri=f"deployments/{deployment_id}/start",
+            response_type=Deployment,
         )
-        return Deployment(**res)
 
     def stop(
         self,
@@ -143,10 +154,10 @@ class Deployments:
         :param deployment_id: The ID of the deployment to stop
         :return: The updated deployment metadata
         """
-        res = self.__client.post(
+        return self.__client.post(
             uri=f"deployments/{deployment_id}/stop",
+            response_type=Deployment,
         )
-        return Deployment(**res)
 
     def status(self, deployment_id: str) -> DeploymentStatus:
         """
@@ -1,16 +1,30 @@
 from typing import Optional, List
 
+import requests
+
 from vendi_sdk.core.http_client import HttpClient
+from vendi_sdk.core.retry import RetryPolicy
+from vendi_sdk.core.timeouts import Timeout
 from vendi_sdk.finetune.schema import TrainData, TrainJob
 from vendi_sdk.models.schema import ModelInfo, ModelProvider
 
 
 class Finetune:
-    def __init__(self, url: str, api_key: str):
+    def __init__(
+        self,
+        url: str,
+        api_key: str,
+        session: requests.Session | None = None,
+        retry_policy: RetryPolicy | None = None,
+        timeout: Timeout | float | None = None,
+    ):
         self.__client = HttpClient(
             url=url,
             api_key=api_key,
-            api_prefix="/platform/v1"
+            api_prefix="/platform/v1",
+            session=session,
+            retry_policy=retry_policy,
+            timeout=timeout,
         )
 
     def run(
@@ -52,7 +66,7 @@ class Finetune:
                 "lm_head"
             ]
 
-        res = self.__client.post(
+        return self.__client.post(
             uri="/train/train-lora",
             json_data={
                 "run_name": run_name,
@@ -81,16 +95,15 @@ class Finetune:
                     "lora_target_modules": lora_target_modules,
                     "q_lora": q_lora
                 }
-            }
+            },
+            response_type=TrainJob,
         )
-        return TrainJob(**res)
 
     def logs(self, model_id: str) -> TrainData:
         """
         Get the logs for a finetune model by ID
         """
-        res = self.__client.get(uri=f"/train/trainings/{model_id}/data")
-        return TrainData(**res)
+        return self.__client.get(uri=f"/train/trainings/{model_id}/data", response_type=TrainData)
 
     def available_models(self, provider: ModelProvider = ModelProvider.VENDI) -> List[ModelInfo]:
         res = self.__client.get(uri=f"/providers/{provider}/models")
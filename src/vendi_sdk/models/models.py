@@ -1,13 +1,27 @@
+import requests
+
 from vendi_sdk.core.http_client import HttpClient
+from vendi_sdk.core.retry import RetryPolicy
+from vendi_sdk.core.timeouts import Timeout
 from vendi_sdk.models.schema import Model, HuggingFaceModel, ModelProvider
 
 
 class Models:
-    def __init__(self, url: str, api_key: str):
+    def __init__(
+        self,
+        url: str,
+        api_key: str,
+        session: requests.Session | None = None,
+        retry_policy: RetryPolicy | None = None,
+        timeout: Timeout | float | None = None,
+    ):
         self.__client = HttpClient(
             url=url,
             api_key=api_key,
-            api_prefix=f"/platform/v1/models"
+            api_prefix=f"/platform/v1/models",
+            session=session,
+            retry_policy=retry_policy,
+            timeout=timeout,
         )
 
     # def create(self, name: str, model: Model):
@@ -23,28 +37,26 @@ class Models:
         Import a model from any of the supported model providers.
         For huggingface, pass the model card name as the model_name.
         """
-        res = self.__client.post(
+        return self.__client.post(
             uri=f"/import",
             json_data={
                 "model_name": model_name,
                 "model_provider": model_provider,
             },
+            response_type=Model,
         )
-        return Model(**res)
 
     def get(self, model_id: str):
         """
         Get mode metadata by ID
         """
-        res = self.__client.get(uri=f"/{model_id}")
-        return Model(**res)
+        return self.__client.get(uri=f"/{model_id}", response_type=Model)
 
     def list(self):
         """
         List all models available to the user
         """
-        res = self.__client.get(uri=f"/")
-        return [Model(**model) for model in res]
+        return self.__client.get(uri=f"/", response_type=list[Model])
 
     def delete(self, model_id: str) -> bool:
         """
@@ -65,5 +77,8 @@ class Models:
         Get metadata information about a huggingface model card.
         :param hf_model_name: The model card name
         """
-        res = self.__client.post(uri=f"/huggingface/get", json_data={"hf_model_name": hf_model_name})
-        return HuggingFaceModel(**res)
+        return self.__client.post(
+            uri=f"/huggingface/get",
+            json_data={"hf_model_name": hf_model_name},
+            response_type=HuggingFaceModel,
+        )
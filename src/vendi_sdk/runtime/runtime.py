@@ -1,8 +1,13 @@
 import json
 import threading
 from typing import Any
+
+import requests
+
 from vendi_sdk.core.http_client import HttpClient
-from vendi_sdk.core.ahttp_client import AsyncHTTPClient
+from vendi_sdk.core.retry import RetryPolicy
+from vendi_sdk.core.timeouts import Timeout
+from vendi_sdk.core.ahttp_client import AsyncHTTPClient, AsyncConnectionPool
 from vendi_sdk.runtime.instrument import Instrument
 
 
@@ -12,15 +17,25 @@ class Runtime:
         url: str,
         api_key: str,
         project_id: str | None = None,
+        session: requests.Session | None = None,
+        async_pool: AsyncConnectionPool | None = None,
+        retry_policy: RetryPolicy | None = None,
+        timeout: Timeout | float | None = None,
     ):
         self._project_id = project_id
         self._client = HttpClient(
             url=url,
             api_key=api_key,
-            api_prefix=f"/api/v1"
+            api_prefix=f"/api/v1",
+            session=session,
+            retry_policy=retry_policy,
+            timeout=timeout,
         )
         self._aclient = AsyncHTTPClient(
             base_url=f"{url}/api/v1",
+            pool=async_pool,
+            retry_policy=retry_policy,
+            timeout=timeout,
         )
         self._aclient.set_auth_header(api_key)
 
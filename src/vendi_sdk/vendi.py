@@ -3,15 +3,31 @@ Vendi is a Python client for the Vendi API. It provides a convenient way to acce
 This is the main entrypoint for the Vendi SDK.
 """
 from vendi_sdk.core.config import vendi_config
+from vendi_sdk.core.ahttp_client import AsyncConnectionPool
+from vendi_sdk.core.event_loop import BackgroundEventLoop
+from vendi_sdk.core.http_client import create_session
+from vendi_sdk.core.retry import RetryPolicy
+from vendi_sdk.core.timeouts import Timeout
 from vendi_sdk.datasets import Datasets
+from vendi_sdk.datasets.cache import DatasetCache
 from vendi_sdk.finetune import Finetune
 from vendi_sdk.deployments.deployments import Deployments
 from vendi_sdk.models import Models
 from vendi_sdk.completions import Completions
+from vendi_sdk.completions.cache import CompletionCache
+from vendi_sdk.completions.circuit_breaker import CircuitBreaker
+from vendi_sdk.completions.concurrency import AdaptiveConcurrencyLimiter
+from vendi_sdk.completions.hedging import HedgingPolicy
+from vendi_sdk.completions.rate_limit import RateLimiter
+from vendi_sdk.completions.scheduler import PriorityScheduler
 from vendi_sdk.runtime import Runtime
 from vendi_sdk.runtime.decorators import task, workflow
 from vendi_sdk.runtime.instrument import Instrument
+import concurrent.futures
 import os
+from typing import Awaitable, TypeVar
+
+T = TypeVar("T")
 
 VENDI_API_URL = vendi_config.VENDI_API_URL
 
@@ -25,7 +41,46 @@ class Vendi:
         api_url: str | None = None,
         api_key: str | None = None,
         project_id: str | None = None,
+        pool_connections: int | None = None,
+        pool_maxsize: int | None = None,
+        keep_alive: bool = True,
+        async_pool: AsyncConnectionPool | None = None,
+        retry_policy: RetryPolicy | None = None,
+        timeout: Timeout | float | None = None,
+        cache: CompletionCache | None = None,
+        coalesce_requests: bool = False,
+        rate_limiter: RateLimiter | None = None,
+        concurrency_limiter: AdaptiveConcurrencyLimiter | None = None,
+        hedging: HedgingPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        scheduler: PriorityScheduler | None = None,
+        dataset_cache: DatasetCache | None = None,
     ):
+        """
+        Initialize the Vendi client
+        :param api_url: The URL of the Vendi API. Defaults to `VENDI_API_URL`
+        :param api_key: The API key to use for authentication. Defaults to `VENDI_API_KEY`
+        :param project_id: The project ID to attach to instrumentation and feedback
+        :param pool_connections: The number of per-host connection pools to cache. Defaults to `VENDI_HTTP_POOL_CONNECTIONS`
+        :param pool_maxsize: The maximum number of keep-alive connections per host. Defaults to `VENDI_HTTP_POOL_MAXSIZE`
+        :param keep_alive: Whether to reuse connections between requests
+        :param async_pool: The async connection pool shared by the async APIs. Pass one to tune the aiohttp connector
+        :param retry_policy: The retry policy shared by all the sub-clients. Its `stats` counters cover every request
+        :param timeout: The default timeout of every request attempt, either a Timeout with connect, read and total
+        timeouts or a number of seconds bounding both the connection and every read. Defaults to
+        `VENDI_HTTP_CONNECT_TIMEOUT`, `VENDI_HTTP_READ_TIMEOUT` and `VENDI_HTTP_TOTAL_TIMEOUT`
+        :param cache: An opt-in cache of the completion responses, see `CompletionCache`
+        :param coalesce_requests: Whether concurrent identical deterministic completions share a single API call
+        :param rate_limiter: A client-side limiter of the requests and tokens per minute per model and provider, see
+        `RateLimiter`
+        :param concurrency_limiter: An adaptive limit of the completion requests in flight, see
+        `AdaptiveConcurrencyLimiter`
+        :param hedging: A policy to hedge the slow async completion requests, see `HedgingPolicy`
+        :param circuit_breaker: Circuit breakers per model to fail fast while a provider is down, see `CircuitBreaker`
+        :param scheduler: Priority lanes so that bulk completions cannot starve interactive ones, see
+        `PriorityScheduler`
+        :param dataset_cache: A local cache of the downloaded datasets, see `DatasetCache`
+        """
         self._base_url = api_url or vendi_config.VENDI_API_URL
         self.api_key = api_key or vendi_config.VENDI_API_KEY
 
@@ -35,14 +90,86 @@ class Vendi:
             self.instrument.project_id = project_id
 
         self._project_id = project_id
-        self.models = Models(url=self._base_url, api_key=self.api_key)
-        self.deployments = Deployments(url=self._base_url, api_key=self.api_key)
-        self.datasets = Datasets(url=self._base_url, api_key=self.api_key)
-        self.completions = Completions(url=self._base_url, api_key=self.api_key)
-        self.finetune = Finetune(url=self._base_url, api_key=self.api_key)
-        self.runtime = Runtime(url=self._base_url, api_key=self.api_key, project_id=self._project_id)
+        self._session = create_session(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            keep_alive=keep_alive,
+        )
+        self._async_pool = async_pool or AsyncConnectionPool()
+        self._event_loop = BackgroundEventLoop()
+        self.retry_policy = retry_policy or RetryPolicy()
+        transport = {"session": self._session, "retry_policy": self.retry_policy, "timeout": timeout}
+        self.models = Models(url=self._base_url, api_key=self.api_key, **transport)
+        self.deployments = Deployments(url=self._base_url, api_key=self.api_key, **transport)
+        self.datasets = Datasets(url=self._base_url, api_key=self.api_key, cache=dataset_cache, **transport)
+        self.completions = Completions(
+            url=self._base_url,
+            api_key=self.api_key,
+            async_pool=self._async_pool,
+            cache=cache,
+            coalesce_requests=coalesce_requests,
+            rate_limiter=rate_limiter,
+            concurrency_limiter=concurrency_limiter,
+            hedging=hedging,
+            circuit_breaker=circuit_breaker,
+            event_loop=self._event_loop,
+            scheduler=scheduler,
+            **transport,
+        )
+        self.finetune = Finetune(url=self._base_url, api_key=self.api_key, **transport)
+        self.runtime = Runtime(
+            url=self._base_url,
+            api_key=self.api_key,
+            project_id=self._project_id,
+            async_pool=self._async_pool,
+            **transport,
+        )
 
         self.task = task
         self.workflow = workflow
         self.feedback = self.runtime.feedback
         self.afeedback = self.runtime.afeedback
+
+    def run(self, awaitable: Awaitable[T], timeout: float | None = None) -> T:
+        """
+        Run an awaitable, e.g. a call of the async APIs, on the background event loop of the client and block until it
+        completes. The loop and its connection pool live as long as the client, instead of one per call with
+        `asyncio.run`
+        :param timeout: How long to wait for the result, in seconds. The awaitable is cancelled when it expires
+        Examples:
+        >>> completion = client.run(client.completions.acreate(model="openai/gpt-4", messages=messages))
+        """
+        return self._event_loop.run(awaitable, timeout)
+
+    def submit(self, awaitable: Awaitable[T]) -> "concurrent.futures.Future[T]":
+        """
+        Schedule an awaitable on the background event loop of the client and return a future of its result at once
+        """
+        return self._event_loop.submit(awaitable)
+
+    def close(self) -> None:
+        """
+        Close the pooled connections shared by all the sub-clients, and stop the background event loop if it was used
+        """
+        self._event_loop.close()
+        self._session.close()
+
+    def __enter__(self) -> "Vendi":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    async def aclose(self) -> None:
+        """
+        Close the pooled connections, including the async session of the running event loop, without blocking it
+        """
+        await self._event_loop.aclose()
+        self._session.close()
+        await self._async_pool.aclose()
+
+    async def __aenter__(self) -> "Vendi":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
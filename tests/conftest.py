@@ -1,4 +1,7 @@
+import json
 import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import pytest
 
@@ -11,3 +14,94 @@ def vendi_client():
     return Vendi(
         api_key=api_key
     )
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    A local stand-in for the Vendi API.
+    `routes` maps a (method, path) to a handler called with the request handler and the request body, which returns
+    (status, payload) or (status, payload, headers). A bytes payload is sent as is, an iterable of bytes is sent with
+    chunked transfer encoding, and anything else as JSON. A handler returning None drops the connection without
+    responding
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StandInHandler)
+        self.routes = {}
+        self.requests = []
+        """The (method, path, body) of every request received."""
+        self.url = f"http://127.0.0.1:{self.server_port}"
+
+    def handle_error(self, request, client_address):
+        # Clients close streamed responses early on purpose
+        pass
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def do_PUT(self):
+        self._handle()
+
+    def do_DELETE(self):
+        self._handle()
+
+    def _handle(self):
+        body = self._read_body()
+        path = self.path.split("?", 1)[0]
+        self.server.requests.append((self.command, path, body))
+        route = self.server.routes.get((self.command, path))
+        reply = route(self, body) if route is not None else (404, {"detail": "Not found"})
+        if reply is None:
+            self.close_connection = True
+            return
+        status, payload, headers = reply if len(reply) == 3 else (*reply, {})
+        if isinstance(payload, (bytes, dict, list, str, type(None))):
+            data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in payload:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            chunks = []
+            while size := int(self.rfile.readline().strip(), 16):
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            self.rfile.readline()
+            return b"".join(chunks)
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+
+@pytest.fixture()
+def api_server():
+    server = StandInServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
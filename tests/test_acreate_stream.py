@@ -0,0 +1,127 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from vendi_sdk import Vendi
+from vendi_sdk.completions.schema import CompletionRequest
+from vendi_sdk.core.retry import RetryPolicy
+from vendi_sdk.core.timeouts import DeadlineExceeded
+
+
+class InFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = 0
+        self.max = 0
+        self.delay = 0.05
+
+
+@pytest.fixture()
+def in_flight(api_server):
+    """
+    The API answers after `delay` seconds, failing the requests whose content is "bad", and tracks the number of
+    requests in flight
+    """
+    in_flight = InFlight()
+
+    def _complete(request, body):
+        content = json.loads(body)["messages"][0]["content"]
+        with in_flight.lock:
+            in_flight.current += 1
+            in_flight.max = max(in_flight.max, in_flight.current)
+        time.sleep(in_flight.delay)
+        with in_flight.lock:
+            in_flight.current -= 1
+        if content == "bad":
+            return 400, {"detail": "invalid"}
+        return 200, {
+            "id": "completion", "created": 1, "model": "openai/gpt-4o", "provider": "openai", "elapsed_time": 0.01,
+            "choices": [{"finish_reason": "stop", "index": 0, "message": {"role": "assistant", "content": content}}],
+            "usage": {"completion_tokens": 1, "prompt_tokens": 2, "total_tokens": 3},
+        }
+
+    api_server.routes[("POST", "/v1/chat/completions")] = _complete
+    return in_flight
+
+
+@pytest.fixture()
+def client(api_server):
+    client = Vendi(api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled())
+    yield client
+    client.close()
+
+
+def request(content: str, request_id: str | None = None) -> CompletionRequest:
+    return CompletionRequest(
+        model="openai/gpt-4o", messages=[{"role": "user", "content": content}], request_id=request_id
+    )
+
+
+def test_requests_are_pulled_lazily_with_bounded_concurrency(in_flight, client):
+    pulled = []
+
+    def requests():
+        for i in range(30):
+            pulled.append(i)
+            yield request(f"message {i}", request_id=str(i))
+
+    async def run():
+        results = []
+        async for result in client.completions.acreate_stream(requests(), max_concurrency=4):
+            # The input is never read far ahead of the results
+            assert len(pulled) <= len(results) + 1 + 4
+            results.append(result)
+        return results
+
+    results = asyncio.run(run())
+    assert sorted(result.index for result in results) == list(range(30))
+    assert all(result.response.choices[0].message.content == f"message {result.index}" for result in results)
+    assert all(result.request_id == str(result.index) for result in results)
+    assert 1 < in_flight.max <= 4
+
+
+def test_results_are_yielded_while_an_async_input_waits_for_its_next_request(in_flight, client):
+    async def run():
+        answered = asyncio.Event()
+
+        async def requests():
+            yield request("first")
+            # Only fed once the result of the first request came out
+            await asyncio.wait_for(answered.wait(), 5)
+            yield request("second")
+
+        results = []
+        async for result in client.completions.acreate_stream(requests(), max_concurrency=4):
+            results.append(result)
+            answered.set()
+        return results
+
+    results = asyncio.run(run())
+    assert [result.response.choices[0].message.content for result in results] == ["first", "second"]
+
+
+def test_a_failed_request_does_not_stop_the_others(in_flight, client):
+    async def run():
+        return [result async for result in client.completions.acreate_stream(
+            [request("good"), request("bad"), request("good")], max_concurrency=2
+        )]
+
+    results = {result.index: result for result in asyncio.run(run())}
+    assert [results[i].ok for i in range(3)] == [True, False, True]
+    assert results[1].error is not None
+
+
+def test_the_requests_left_at_the_deadline_fail(in_flight, client):
+    in_flight.delay = 0.3
+
+    async def run():
+        return [result async for result in client.completions.acreate_stream(
+            [request(f"message {i}") for i in range(4)], max_concurrency=2, deadline=0.5
+        )]
+
+    results = sorted(asyncio.run(run()), key=lambda result: result.index)
+    assert [result.ok for result in results] == [True, True, False, False]
+    assert all(isinstance(result.error, DeadlineExceeded) for result in results[2:])
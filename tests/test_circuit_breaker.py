@@ -0,0 +1,123 @@
+import time
+
+import pytest
+import requests
+
+from vendi_sdk.completions.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState, is_failure
+from vendi_sdk.core.timeouts import DeadlineExceeded
+
+MODEL = "openai/gpt-4o"
+
+
+def http_error(status: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+def call(breaker: CircuitBreaker, failed: bool, duration: float | None = None) -> None:
+    permit = breaker.acquire(MODEL)
+    if failed:
+        breaker.record_failure(permit)
+    else:
+        breaker.record_success(permit, duration)
+
+
+def open_breaker(**kwargs) -> tuple[CircuitBreaker, list]:
+    transitions = []
+    breaker = CircuitBreaker(
+        minimum_calls=4, window_size=4, open_duration=0.05, half_open_calls=2,
+        on_state_change=lambda *transition: transitions.append(transition), **kwargs,
+    )
+    for failed in (False, True, False, True):
+        call(breaker, failed)
+    return breaker, transitions
+
+
+def test_is_failure():
+    assert is_failure(http_error(500))
+    assert is_failure(requests.ConnectionError())
+    assert not is_failure(http_error(400))
+    assert not is_failure(http_error(429))
+    assert not is_failure(CircuitOpenError(MODEL, 1))
+    assert not is_failure(DeadlineExceeded())
+
+
+def test_circuit_opens_on_the_failure_rate_after_the_minimum_calls():
+    breaker = CircuitBreaker(minimum_calls=4, window_size=4)
+
+    for _ in range(3):
+        call(breaker, failed=True)
+    assert breaker.state(MODEL) == CircuitState.CLOSED
+    call(breaker, failed=False)
+    assert breaker.state(MODEL) == CircuitState.OPEN
+    assert breaker.state("openai/gpt-4o-mini") == CircuitState.CLOSED
+
+
+def test_circuit_opens_on_the_slow_call_rate():
+    breaker = CircuitBreaker(minimum_calls=2, window_size=2, slow_call_rate_threshold=1, slow_call_duration=1)
+
+    call(breaker, failed=False, duration=2)
+    call(breaker, failed=False, duration=2)
+    assert breaker.state(MODEL) == CircuitState.OPEN
+
+
+def test_open_circuit_fails_fast():
+    breaker, transitions = open_breaker()
+
+    assert transitions == [(MODEL, CircuitState.CLOSED, CircuitState.OPEN)]
+    assert breaker.is_open(MODEL)
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.acquire(MODEL)
+    assert error.value.key == MODEL and 0 < error.value.retry_after <= 0.05
+
+
+def test_circuit_closes_after_successful_trials():
+    breaker, transitions = open_breaker()
+    time.sleep(0.06)
+    assert not breaker.is_open(MODEL)
+
+    permits = [breaker.acquire(MODEL), breaker.acquire(MODEL)]
+    assert breaker.state(MODEL) == CircuitState.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        # Every trial request is in flight
+        breaker.acquire(MODEL)
+    for permit in permits:
+        breaker.record_success(permit)
+    assert breaker.state(MODEL) == CircuitState.CLOSED
+    assert transitions[1:] == [
+        (MODEL, CircuitState.OPEN, CircuitState.HALF_OPEN),
+        (MODEL, CircuitState.HALF_OPEN, CircuitState.CLOSED),
+    ]
+    assert breaker.snapshot()[MODEL]["calls"] == 0
+
+
+def test_failed_trial_opens_the_circuit_again():
+    breaker, transitions = open_breaker()
+    time.sleep(0.06)
+
+    late = breaker.acquire(MODEL)
+    call(breaker, failed=True)
+    assert breaker.state(MODEL) == CircuitState.OPEN
+    assert transitions[-1] == (MODEL, CircuitState.HALF_OPEN, CircuitState.OPEN)
+    # The outcome of a trial that started before the circuit opened again is ignored
+    breaker.record_success(late)
+    assert breaker.is_open(MODEL)
+
+
+def test_released_trials_let_another_one_through():
+    breaker, _ = open_breaker()
+    time.sleep(0.06)
+
+    permits = [breaker.acquire(MODEL), breaker.acquire(MODEL)]
+    breaker.release(permits.pop())
+    breaker.acquire(MODEL)
+
+
+def test_reset_closes_the_circuit():
+    breaker, transitions = open_breaker()
+
+    breaker.reset()
+    assert breaker.state(MODEL) == CircuitState.CLOSED
+    assert transitions[-1] == (MODEL, CircuitState.OPEN, CircuitState.CLOSED)
+    breaker.acquire(MODEL)
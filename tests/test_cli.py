@@ -0,0 +1,79 @@
+import io
+import json
+import os
+import sys
+import threading
+import time
+
+from vendi_sdk.cli import main
+
+COMPLETION = {
+    "id": "completion", "created": 1, "model": "openai/gpt-4o", "provider": "openai", "elapsed_time": 0.01,
+    "choices": [{"finish_reason": "stop", "index": 0, "message": {"role": "assistant", "content": "Hi"}}],
+    "usage": {"completion_tokens": 1, "prompt_tokens": 2, "total_tokens": 3},
+}
+
+
+def request(content: str) -> str:
+    return json.dumps({"model": "openai/gpt-4o", "messages": [{"role": "user", "content": content}]})
+
+
+def test_invalid_lines_are_reported_and_skipped(api_server, tmp_path, capsys):
+    api_server.routes[("POST", "/v1/chat/completions")] = lambda handler, body: (200, COMPLETION)
+    requests = tmp_path / "requests.jsonl"
+    requests.write_text("\n".join([request("first"), '{"model": "openai/gpt-4o", "messages": [', "", '{"messages": 1}',
+                                   request("last")]) + "\n")
+    results = tmp_path / "results.jsonl"
+
+    status = main(["--api-url", api_server.url, "--api-key", "key", "complete", str(requests), "-o", str(results),
+                   "--retries", "0"])
+
+    assert status == 1
+    lines = sorted((json.loads(line) for line in results.read_text().splitlines()), key=lambda line: line["index"])
+    assert [line["index"] for line in lines] == [0, 1, 2, 3]
+    assert [("response" in line, "error" in line) for line in lines] == [
+        (True, False), (False, True), (False, True), (True, False),
+    ]
+    assert "Line 2 is not a valid CompletionRequest" in lines[1]["error"]
+    assert "Line 4 is not a valid CompletionRequest" in lines[2]["error"]
+    stderr = capsys.readouterr().err
+    assert "Line 2 is not a valid CompletionRequest" in stderr and "Line 4" in stderr
+    assert "4 requests (2 succeeded, 2 failed)" in stderr
+    assert len([path for _, path, _ in api_server.requests]) == 2
+
+
+def test_valid_requests_exit_cleanly(api_server, tmp_path):
+    api_server.routes[("POST", "/v1/chat/completions")] = lambda handler, body: (200, COMPLETION)
+    requests = tmp_path / "requests.jsonl"
+    requests.write_text(request("only") + "\n")
+
+    assert main(["--api-url", api_server.url, "--api-key", "key", "complete", str(requests),
+                 "-o", str(tmp_path / "results.jsonl")]) == 0
+
+
+def test_results_are_written_while_stdin_is_still_open(api_server, tmp_path, monkeypatch):
+    api_server.routes[("POST", "/v1/chat/completions")] = lambda handler, body: (200, COMPLETION)
+    read_end, write_end = os.pipe()
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(open(read_end, "rb")))
+    results = tmp_path / "results.jsonl"
+    statuses = []
+    command = threading.Thread(target=lambda: statuses.append(
+        main(["--api-url", api_server.url, "--api-key", "key", "complete", "-o", str(results)])
+    ))
+    command.start()
+
+    def written() -> int:
+        return len(results.read_text().splitlines()) if results.exists() else 0
+
+    with open(write_end, "wb", buffering=0) as stdin:
+        for i in range(3):
+            stdin.write((request(f"message {i}") + "\n").encode())
+            # The result of every line comes out before the next line is written
+            started_at = time.monotonic()
+            while written() < i + 1:
+                assert time.monotonic() - started_at < 5, "no result before the end of the input"
+                time.sleep(0.01)
+    command.join(5)
+
+    assert statuses == [0]
+    assert [json.loads(line)["index"] for line in results.read_text().splitlines()] == [0, 1, 2]
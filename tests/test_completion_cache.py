@@ -0,0 +1,75 @@
+import json
+import threading
+import time
+
+from vendi_sdk import Vendi
+from vendi_sdk.completions.cache import CompletionCache
+from vendi_sdk.core.retry import RetryPolicy
+
+
+def serve_completions(api_server, delay: float = 0.0):
+    """
+    The API echoes the parameters of the request, its request_id included, like the Vendi API
+    """
+    def _complete(request, body):
+        time.sleep(delay)
+        payload = json.loads(body)
+        return 200, {
+            "id": "completion", "created": 1, "model": payload["model"], "provider": "openai", "elapsed_time": 0.01,
+            "choices": [{"finish_reason": "stop", "index": 0, "message": {"role": "assistant", "content": "4"}}],
+            "usage": {"completion_tokens": 1, "prompt_tokens": 2, "total_tokens": 3},
+            "parameters": {"request_id": payload["request_id"], "temperature": payload["temperature"]},
+        }
+
+    api_server.routes[("POST", "/v1/chat/completions")] = _complete
+
+
+def create(client: Vendi, request_id: str):
+    return client.completions.create(
+        model="openai/gpt-4o", messages=[{"role": "user", "content": "2+2?"}], temperature=0, request_id=request_id,
+    )
+
+
+def test_cache_hits_keep_the_request_id_of_the_caller(api_server):
+    serve_completions(api_server)
+    client = Vendi(api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled(), cache=CompletionCache())
+
+    assert create(client, "first").parameters["request_id"] == "first"
+    assert create(client, "second").parameters["request_id"] == "second"
+    assert create(client, None).parameters["request_id"] is None
+    assert len(api_server.requests) == 1
+    assert client.completions.cache.stats.hits == 2
+    client.close()
+
+
+def test_coalesced_requests_keep_the_request_id_of_the_caller(api_server):
+    serve_completions(api_server, delay=0.2)
+    client = Vendi(api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled(), coalesce_requests=True)
+    request_ids = {}
+
+    def _create(request_id):
+        request_ids[request_id] = create(client, request_id).parameters["request_id"]
+
+    threads = [threading.Thread(target=_create, args=(f"request-{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert request_ids == {f"request-{i}": f"request-{i}" for i in range(4)}
+    assert len(api_server.requests) == 1
+    client.close()
+
+
+def test_sqlite_tier_keeps_the_newest_entries(tmp_path):
+    path = str(tmp_path / "completions.db")
+    cache = CompletionCache(max_entries=1, path=path, max_disk_entries=3)
+
+    for i in range(5):
+        cache.set(f"key-{i}", b"%d" % i)
+    # Rewriting an entry makes it the newest
+    cache.set("key-2", b"2")
+    cache.set("key-5", b"5")
+    assert cache.stats.disk_evictions == 3
+
+    reopened = CompletionCache(path=path, max_disk_entries=3)
+    assert [reopened.get(f"key-{i}") for i in range(6)] == [None, None, b"2", None, b"4", b"5"]
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+
+import pytest
+import requests
+
+from vendi_sdk.completions.concurrency import AdaptiveConcurrencyLimiter, is_overload
+from vendi_sdk.core.timeouts import DeadlineExceeded, deadline
+
+
+def http_error(status: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+def wait_until(condition, timeout: float = 5) -> None:
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "Timed out"
+        time.sleep(0.001)
+
+
+def test_is_overload():
+    assert is_overload(http_error(429))
+    assert is_overload(http_error(503))
+    assert is_overload(requests.ReadTimeout())
+    assert not is_overload(http_error(400))
+    assert not is_overload(DeadlineExceeded())
+    assert not is_overload(ValueError())
+
+
+def test_limit_grows_while_the_latency_is_steady():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2)
+
+    # Every slot is used, like in a bulk run
+    for _ in range(20):
+        while limiter.in_flight < limiter.limit:
+            limiter.acquire()
+        limiter.release(latency=0.01)
+    assert limiter.limit > 2
+    assert limiter.increases == limiter.limit - 2
+    assert limiter.decreases == 0
+
+
+def test_limit_does_not_grow_when_it_is_not_used():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+
+    for _ in range(100):
+        limiter.acquire()
+        limiter.release(latency=0.01)
+    assert limiter.limit == 8
+
+
+def test_overload_backs_off_once_per_round_trip():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10, backoff_ratio=0.5)
+    limiter.acquire()
+    limiter.release(latency=60)
+
+    for _ in range(3):
+        limiter.acquire()
+    for _ in range(3):
+        limiter.release(overloaded=True)
+    assert limiter.limit == 5
+    assert limiter.decreases == 1
+
+
+def test_overload_never_goes_below_the_minimum():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, min_limit=2, backoff_ratio=0.1)
+
+    limiter.acquire()
+    limiter.release(overloaded=True)
+    assert limiter.limit == 2
+
+
+def test_latency_inflation_decreases_the_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=32)
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release(latency=0.01)
+
+    limiter.acquire()
+    limiter.release(latency=10)
+    assert limiter.limit < 32
+    assert limiter.decreases == 1
+
+
+def test_waiters_get_slots_in_order():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    limiter.acquire()
+    granted = []
+
+    def wait(i):
+        limiter.acquire()
+        granted.append(i)
+
+    threads = []
+    for i in range(3):
+        threads.append(threading.Thread(target=wait, args=(i,)))
+        threads[-1].start()
+        wait_until(lambda: limiter.waiting == i + 1)
+    for i in range(3):
+        limiter.release()
+        wait_until(lambda: len(granted) == i + 1)
+    for thread in threads:
+        thread.join()
+    assert granted == [0, 1, 2]
+    assert limiter.in_flight == 1
+
+
+def test_acquire_gives_up_at_the_deadline():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    limiter.acquire()
+
+    with deadline(0.05), pytest.raises(DeadlineExceeded):
+        limiter.acquire()
+    assert limiter.waiting == 0
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+def test_aacquire_waits_for_a_slot_without_blocking_the_loop():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+
+    async def main():
+        await limiter.aacquire()
+        waiter = asyncio.ensure_future(limiter.aacquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done() and limiter.waiting == 1
+        limiter.release()
+        await asyncio.wait_for(waiter, 1)
+        assert limiter.in_flight == 1
+
+        with deadline(0.05):
+            with pytest.raises(DeadlineExceeded):
+                await limiter.aacquire()
+        assert limiter.waiting == 0
+
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+from vendi_sdk import Vendi
+from vendi_sdk.completions.concurrency import AdaptiveConcurrencyLimiter
+from vendi_sdk.completions.schema import CompletionRequest
+from vendi_sdk.core.retry import RetryPolicy
+
+
+@pytest.fixture()
+def delays(api_server):
+    """
+    How long the API takes to answer each message content, failing the requests whose content is "bad"
+    """
+    delays = {}
+
+    def _complete(request, body):
+        content = json.loads(body)["messages"][0]["content"]
+        time.sleep(delays.get(content, 0))
+        if content == "bad":
+            return 400, {"detail": "invalid"}
+        return 200, {
+            "id": "completion", "created": 1, "model": "openai/gpt-4o", "provider": "openai", "elapsed_time": 0.01,
+            "choices": [{"finish_reason": "stop", "index": 0, "message": {"role": "assistant", "content": content}}],
+            "usage": {"completion_tokens": 1, "prompt_tokens": 2, "total_tokens": 3},
+        }
+
+    api_server.routes[("POST", "/v1/chat/completions")] = _complete
+    return delays
+
+
+@pytest.fixture()
+def limiter():
+    return AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2)
+
+
+@pytest.fixture()
+def client(api_server, limiter):
+    client = Vendi(
+        api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled(), concurrency_limiter=limiter
+    )
+    yield client
+    client.close()
+
+
+def request(content: str) -> CompletionRequest:
+    return CompletionRequest(model="openai/gpt-4o", messages=[{"role": "user", "content": content}])
+
+
+def content(response) -> str:
+    return response.choices[0].message.content
+
+
+def test_threaded_results_are_in_the_order_of_the_requests(delays, client):
+    contents = [f"message {i}" for i in range(6)]
+    # The first requests complete last
+    delays.update({text: 0.03 * (len(contents) - i) for i, text in enumerate(contents)})
+
+    responses = client.completions.create_many([request(text) for text in contents], mode="threads", max_workers=6)
+    assert [content(response) for response in responses] == contents
+
+
+def test_threaded_failures_are_returned_in_place(delays, client, limiter):
+    responses = client.completions.create_many(
+        [request("first"), request("bad"), request("last")], mode="threads", return_exceptions=True
+    )
+
+    assert content(responses[0]) == "first"
+    assert isinstance(responses[1], requests.HTTPError)
+    assert content(responses[2]) == "last"
+    assert limiter.in_flight == 0
+
+
+def test_a_threaded_failure_fails_the_call_and_gives_back_the_slots(api_server, delays, client, limiter):
+    delays.update({"slow": 0.2})
+
+    with pytest.raises(requests.HTTPError):
+        client.completions.create_many(
+            [request("bad"), request("slow")] + [request(f"message {i}") for i in range(8)],
+            mode="threads",
+            max_workers=2,
+        )
+    # The requests still running were waited for, the ones not started were never sent
+    assert len(api_server.requests) < 10
+    assert limiter.in_flight == 0
+    assert limiter.waiting == 0
+    assert client.completions.create(**request("after").model_dump()) is not None
+
+
+def test_threaded_progress_is_reported_after_each_request(delays, client):
+    reports = []
+    threads = set()
+
+    def on_progress(done: int, total: int):
+        reports.append((done, total))
+        threads.add(threading.current_thread().name)
+
+    client.completions.create_many(
+        [request(f"message {i}") for i in range(5)] + [request("bad")],
+        mode="threads",
+        return_exceptions=True,
+        on_progress=on_progress,
+    )
+    assert reports == [(done, 6) for done in range(1, 7)]
+    assert all(name.startswith("vendi-completions") for name in threads)
+
+
+def test_unknown_modes_are_rejected(client):
+    with pytest.raises(ValueError):
+        client.completions.create_many([request("message")], mode="processes")
@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from vendi_sdk import Vendi
+from vendi_sdk.core.event_loop import BackgroundEventLoop
+
+
+async def slow_to_cancel():
+    try:
+        await asyncio.sleep(10)
+    except asyncio.CancelledError:
+        # Blocks the background loop, not the caller's
+        time.sleep(0.3)
+        raise
+
+
+async def ticks_while(awaitable) -> int:
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker = asyncio.ensure_future(tick())
+    await awaitable
+    ticker.cancel()
+    return ticks
+
+
+def test_aclose_does_not_block_the_caller_loop():
+    event_loop = BackgroundEventLoop()
+    future = event_loop.submit(slow_to_cancel())
+
+    ticks = asyncio.run(ticks_while(event_loop.aclose()))
+    assert ticks >= 10
+    assert future.cancelled()
+    assert not event_loop.running
+    # Started again on next use
+    assert event_loop.run(asyncio.sleep(0, result="again")) == "again"
+    event_loop.close()
+
+
+def test_client_aclose_stops_the_background_loop():
+    client = Vendi(api_url="http://127.0.0.1:1", api_key="key")
+    client.completions.event_loop.submit(slow_to_cancel())
+
+    async def main():
+        async with client:
+            pass
+
+    assert asyncio.run(ticks_while(main())) >= 10
+    assert not client.completions.event_loop.running
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from vendi_sdk import Vendi
+from vendi_sdk.completions.cache import CompletionCache
+from vendi_sdk.completions.concurrency import AdaptiveConcurrencyLimiter
+from vendi_sdk.completions.hedging import HedgingPolicy
+from vendi_sdk.core.retry import RetryPolicy
+
+MODEL = "openai/gpt-4o"
+FALLBACK_MODEL = "vendi/llama-3-8b-instruct"
+
+
+@pytest.fixture()
+def delays(api_server):
+    """
+    How long the API takes to answer the n-th request to a model, the last delay applying to the next requests
+    """
+    delays = {MODEL: [0.0], FALLBACK_MODEL: [0.0]}
+    counts = {}
+    lock = threading.Lock()
+
+    def _complete(request, body):
+        model = json.loads(body)["model"]
+        with lock:
+            count = counts[model] = counts.get(model, 0) + 1
+        time.sleep(delays[model][min(count, len(delays[model])) - 1])
+        return 200, {
+            "id": "completion", "created": 1, "model": model, "provider": model.split("/")[0], "elapsed_time": 0.01,
+            "choices": [{"finish_reason": "stop", "index": 0, "message": {"role": "assistant", "content": "Hello"}}],
+            "usage": {"completion_tokens": 1, "prompt_tokens": 2, "total_tokens": 3},
+        }
+
+    api_server.routes[("POST", "/v1/chat/completions")] = _complete
+    return delays
+
+
+def models_sent(api_server) -> list[str]:
+    return [json.loads(body)["model"] for _, path, body in api_server.requests if path == "/v1/chat/completions"]
+
+
+def run(api_server, policy: HedgingPolicy, main, **kwargs):
+    async def _run():
+        async with Vendi(
+            api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled(), hedging=policy, **kwargs
+        ) as client:
+            return await main(client)
+
+    return asyncio.run(_run())
+
+
+async def acreate(client: Vendi, **params):
+    return await client.completions.acreate(model=MODEL, messages=[{"role": "user", "content": "Hi"}], **params)
+
+
+def test_fast_requests_are_not_hedged(api_server, delays):
+    policy = HedgingPolicy(initial_delay=0.5)
+
+    run(api_server, policy, acreate)
+    assert policy.snapshot()["hedges"] == 0
+    assert models_sent(api_server) == [MODEL]
+
+
+def test_slow_requests_are_hedged_after_the_delay(api_server, delays):
+    delays[MODEL] = [2.0, 0.0]
+    policy = HedgingPolicy(initial_delay=0.1)
+    limiter = AdaptiveConcurrencyLimiter()
+
+    async def main(client):
+        started_at = time.monotonic()
+        await acreate(client)
+        elapsed = time.monotonic() - started_at
+        # The slow request was cancelled, it gives back its slot once the cancellation ran
+        for _ in range(100):
+            if limiter.in_flight == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert limiter.in_flight == 0
+        return elapsed
+
+    assert run(api_server, policy, main, concurrency_limiter=limiter) < 1
+    assert policy.snapshot()["hedges"] == 1 and policy.snapshot()["hedge_wins"] == 1
+    assert models_sent(api_server) == [MODEL, MODEL]
+
+
+def test_hedges_are_capped_by_the_budget(api_server, delays):
+    delays[MODEL] = [0.2]
+    policy = HedgingPolicy(initial_delay=0.05, max_burst=1, max_hedge_ratio=0)
+
+    async def main(client):
+        await acreate(client)
+        await acreate(client)
+
+    run(api_server, policy, main)
+    assert policy.snapshot()["hedges"] == 1
+    assert len(models_sent(api_server)) == 3
+
+
+def test_hedges_go_to_the_fallback_model(api_server, delays):
+    delays[MODEL] = [2.0]
+    policy = HedgingPolicy(initial_delay=0.05, fallback_model=FALLBACK_MODEL)
+
+    assert run(api_server, policy, acreate).model == FALLBACK_MODEL
+    assert models_sent(api_server) == [MODEL, FALLBACK_MODEL]
+
+
+def test_responses_of_the_fallback_model_are_not_cached(api_server, delays):
+    delays[MODEL] = [2.0, 0.0]
+    policy = HedgingPolicy(initial_delay=0.05, fallback_model=FALLBACK_MODEL)
+
+    async def main(client):
+        assert (await acreate(client, temperature=0)).model == FALLBACK_MODEL
+        assert (await acreate(client, temperature=0)).model == MODEL
+        assert (await acreate(client, temperature=0)).model == MODEL
+
+    run(api_server, policy, main, cache=CompletionCache())
+    assert models_sent(api_server) == [MODEL, FALLBACK_MODEL, MODEL]
+
+
+def test_responses_of_the_fallback_model_are_not_shared(api_server, delays):
+    delays[MODEL] = [2.0, 0.0]
+    policy = HedgingPolicy(initial_delay=0.05, fallback_model=FALLBACK_MODEL)
+
+    async def main(client):
+        return await asyncio.gather(acreate(client, temperature=0), acreate(client, temperature=0))
+
+    leader, follower = run(api_server, policy, main, coalesce_requests=True)
+    assert leader.model == FALLBACK_MODEL
+    # The follower sent the request again instead of taking the answer of another model
+    assert follower.model == MODEL
+    assert models_sent(api_server) == [MODEL, FALLBACK_MODEL, MODEL]
@@ -0,0 +1,106 @@
+import json
+
+import pandas as pd
+import pytest
+
+from vendi_sdk.datasets import Datasets
+from vendi_sdk.datasets.cache import DatasetCache
+
+DATASET_ID = "00000000-0000-0000-0000-000000000001"
+
+ROWS = [
+    {"messages": [{"role": "user", "content": "What is on the picture?"}], "score": 1, "created": "2024-01-01T00:00:00"},
+    {
+        "messages": [{"role": "user", "content": [
+            {"type": "text", "text": "And on this one?"},
+            {"type": "image_url", "image_url": {"url": "https://example.com/cat.png"}},
+        ]}],
+        "score": "high",
+        "created": "2024-01-02T00:00:00",
+    },
+    {"messages": [{"role": "assistant", "content": "A cat"}], "created": "2024-01-03T00:00:00"},
+]
+
+
+def serve_dataset(api_server, rows):
+    api_server.routes[("GET", f"/platform/v1/datasets/{DATASET_ID}")] = lambda request, body: (200, {
+        "id": DATASET_ID, "created_at": "2024-01-01T00:00:00", "updated_at": "2024-01-01T00:00:00",
+        "created_by": "user", "tenant": "tenant", "name": "dataset.jsonl", "path": "datasets",
+    })
+    document = json.dumps({"data": rows}).encode()
+    lines = b"".join(json.dumps(row).encode() + b"\n" for row in rows)
+    # Sent in small chunks, so that the rows are split between them
+    api_server.routes[("GET", f"/platform/v1/datasets/{DATASET_ID}/data")] = lambda request, body: (
+        200, (document[i:i + 50] for i in range(0, len(document), 50))
+    )
+    api_server.routes[("GET", f"/platform/v1/datasets/{DATASET_ID}/download-link")] = lambda request, body: (
+        200, f"{api_server.url}/files/dataset.jsonl"
+    )
+    api_server.routes[("GET", "/files/dataset.jsonl")] = lambda request, body: (
+        200, (lines[i:i + 50] for i in range(0, len(lines), 50))
+    )
+
+
+@pytest.mark.parametrize("from_download_link", [False, True])
+def test_load_data_keeps_rows_with_mixed_types(api_server, from_download_link):
+    serve_dataset(api_server, ROWS)
+    datasets = Datasets(url=api_server.url, api_key="key")
+    dataset = datasets.get(DATASET_ID)
+
+    assert dataset.load_data(format="records", from_download_link=from_download_link) == ROWS
+    data = dataset.load_data(from_download_link=from_download_link)
+    assert isinstance(data, pd.DataFrame)
+    assert data.equals(pd.DataFrame(ROWS))
+    assert data["messages"][1][0]["content"][0]["text"] == "And on this one?"
+
+
+def test_load_data_as_arrow_keeps_strings(api_server):
+    pytest.importorskip("pyarrow")
+    rows = [{"messages": [{"role": "user", "content": f"Message {i}"}], "created": "2024-01-01T00:00:00"} for i in range(3)]
+    serve_dataset(api_server, rows)
+    dataset = Datasets(url=api_server.url, api_key="key").get(DATASET_ID)
+
+    table = dataset.load_data(format="arrow")
+    assert str(table.schema.field("created").type) == "string"
+    assert table.to_pylist() == rows
+
+
+def test_load_data_as_arrow_rejects_mixed_types(api_server):
+    pytest.importorskip("pyarrow")
+    serve_dataset(api_server, ROWS)
+    dataset = Datasets(url=api_server.url, api_key="key").get(DATASET_ID)
+
+    with pytest.raises(ValueError, match="format='pandas' or 'records'"):
+        dataset.load_data(format="arrow")
+
+
+@pytest.mark.parametrize("from_download_link", [False, True])
+def test_cached_datasets_load_like_downloaded_ones(api_server, tmp_path, from_download_link):
+    serve_dataset(api_server, ROWS)
+    cache = DatasetCache(tmp_path)
+    datasets = Datasets(url=api_server.url, api_key="key", cache=cache)
+
+    assert datasets.get(DATASET_ID).load_data(format="records", from_download_link=from_download_link) == ROWS
+    assert datasets.get(DATASET_ID).load_data(format="records", from_download_link=from_download_link) == ROWS
+    assert datasets.get(DATASET_ID).load_data(from_download_link=from_download_link).equals(pd.DataFrame(ROWS))
+    downloads = [path for _, path, _ in api_server.requests if path.endswith(("/data", ".jsonl"))]
+    assert len(downloads) == 1
+    assert cache.snapshot()["hits"] == 2
+    assert [(entry.dataset_id, entry.rows) for entry in cache.entries()] == [(DATASET_ID, len(ROWS))]
+
+
+def test_cached_datasets_keep_their_arrow_table(api_server, tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    rows = [{"messages": [{"role": "user", "content": f"Message {i}"}], "created": "2024-01-01T00:00:00"} for i in range(3)]
+    serve_dataset(api_server, rows)
+    cache = DatasetCache(tmp_path)
+    datasets = Datasets(url=api_server.url, api_key="key", cache=cache)
+
+    table = datasets.get(DATASET_ID).load_data(format="arrow")
+    assert isinstance(table, pa.Table) and table.to_pylist() == rows
+    assert datasets.get(DATASET_ID).load_data(format="arrow").equals(table)
+    assert datasets.get(DATASET_ID).load_data(format="records") == rows
+    assert len([path for _, path, _ in api_server.requests if path.endswith("/data")]) == 1
+
+    cache.clear()
+    assert cache.entries() == [] and cache.size == 0
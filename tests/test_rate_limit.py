@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from vendi_sdk.completions.rate_limit import RateLimit, RateLimiter, TokenBucket, estimate_tokens
+from vendi_sdk.completions.schema import CompletionUsage
+from vendi_sdk.core.timeouts import DeadlineExceeded, deadline
+
+
+def payload(model: str = "openai/gpt-4o", content: str = "x" * 40, max_tokens: int = 10) -> dict:
+    return {"model": model, "messages": [{"role": "user", "content": content}], "max_tokens": max_tokens}
+
+
+def test_token_bucket_delays_the_overdraft():
+    bucket = TokenBucket(per_minute=60)
+
+    assert bucket.reserve(60) == 0
+    assert bucket.reserve(2) == pytest.approx(2, abs=0.05)
+    bucket.refund(2)
+    assert bucket.available == pytest.approx(0, abs=0.1)
+
+
+def test_estimate_tokens_counts_the_prompt_and_the_generated_tokens():
+    assert estimate_tokens(payload()) == 2 + 4 + 10 + 10
+    parts = [{"type": "text", "text": "x" * 40}, {"type": "image_url", "image_url": {"url": "https://example.com"}}]
+    assert estimate_tokens(payload(content=parts)) == estimate_tokens(payload())
+
+
+def test_requests_per_minute_are_limited_per_model():
+    limiter = RateLimiter({"openai/gpt-4o": RateLimit(requests_per_minute=60)})
+
+    assert limiter.reserve(payload()).delay == 0
+    for _ in range(59):
+        limiter.reserve(payload())
+    assert limiter.reserve(payload()).delay == pytest.approx(1, abs=0.05)
+    # Another model of the provider is not limited
+    assert limiter.reserve(payload(model="openai/gpt-4o-mini")).delay == 0
+
+
+def test_every_matching_limit_applies():
+    limiter = RateLimiter({
+        "openai": RateLimit(tokens_per_minute=100),
+        "openai/gpt-4o": RateLimit(requests_per_minute=1000),
+    })
+
+    limiter.reserve(payload(max_tokens=74))
+    assert limiter.reserve(payload(model="openai/gpt-4o-mini", max_tokens=74)).delay > 0
+
+
+def test_unlisted_models_get_their_own_default_limit():
+    limiter = RateLimiter(default=RateLimit(requests_per_minute=1))
+
+    assert limiter.reserve(payload(model="vendi/a")).delay == 0
+    assert limiter.reserve(payload(model="vendi/b")).delay == 0
+    assert limiter.reserve(payload(model="vendi/a")).delay > 0
+
+
+def test_reconcile_gives_back_the_unused_tokens():
+    limiter = RateLimiter({"openai": RateLimit(tokens_per_minute=100)})
+
+    reservation = limiter.reserve(payload(max_tokens=90))
+    assert limiter.reserve(payload(max_tokens=0)).delay > 0
+    limiter.reconcile(reservation, CompletionUsage(prompt_tokens=10, completion_tokens=5, total_tokens=15))
+    assert limiter.reserve(payload(max_tokens=0)).delay == 0
+
+
+def test_cancel_gives_back_the_whole_reservation():
+    limiter = RateLimiter({"openai": RateLimit(requests_per_minute=1)})
+
+    limiter.cancel(limiter.reserve(payload()))
+    assert limiter.reserve(payload()).delay == 0
+
+
+def test_acquire_fails_at_once_when_the_wait_passes_the_deadline():
+    limiter = RateLimiter({"openai": RateLimit(requests_per_minute=1)})
+    limiter.acquire(payload())
+
+    with deadline(0.5):
+        with pytest.raises(DeadlineExceeded):
+            limiter.acquire(payload())
+
+        async def aacquire():
+            await limiter.aacquire(payload())
+
+        with pytest.raises(DeadlineExceeded):
+            asyncio.run(aacquire())
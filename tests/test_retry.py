@@ -0,0 +1,112 @@
+import asyncio
+import email.utils
+import socket
+import time
+
+import pytest
+import requests
+
+from vendi_sdk.core.ahttp_client import AsyncHTTPClient
+from vendi_sdk.core.http_client import HttpClient
+from vendi_sdk.core.retry import RetryPolicy, parse_retry_after
+
+
+def fast_policy(**kwargs) -> RetryPolicy:
+    return RetryPolicy(backoff_base=0.01, backoff_max=0.01, **kwargs)
+
+
+def test_post_disconnected_before_responding_is_not_sent_again(api_server):
+    api_server.routes[("POST", "/completions")] = lambda request, body: None
+    policy = fast_policy()
+    client = HttpClient(api_key="key", url=api_server.url, retry_policy=policy)
+
+    with pytest.raises(requests.ConnectionError):
+        client.post("/completions", json_data={"model": "model"})
+    assert len(api_server.requests) == 1
+    assert policy.stats.snapshot()["retries"] == 0
+
+
+def test_get_disconnected_before_responding_is_sent_again(api_server):
+    api_server.routes[("GET", "/datasets")] = lambda request, body: None
+    client = HttpClient(api_key="key", url=api_server.url, retry_policy=fast_policy())
+
+    with pytest.raises(requests.ConnectionError):
+        client.get("/datasets")
+    assert len(api_server.requests) == 3
+
+
+def test_post_to_a_refused_connection_is_sent_again():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    policy = fast_policy()
+    client = HttpClient(api_key="key", url=f"http://127.0.0.1:{port}", retry_policy=policy)
+
+    with pytest.raises(requests.ConnectionError):
+        client.post("/completions", json_data={"model": "model"})
+    assert policy.stats.snapshot()["retries"] == 2
+
+
+def test_retry_after_is_honored(api_server):
+    replies = iter([(503, {"detail": "overloaded"}, {"Retry-After": "0.3"}), (200, {"ok": True})])
+    api_server.routes[("POST", "/completions")] = lambda request, body: next(replies)
+    policy = fast_policy()
+    client = HttpClient(api_key="key", url=api_server.url, retry_policy=policy)
+
+    started_at = time.monotonic()
+    assert client.post("/completions", json_data={"model": "model"}) == {"ok": True}
+    assert time.monotonic() - started_at >= 0.3
+    assert policy.stats.snapshot()["retries_by_reason"] == {"503": 1}
+
+
+def test_retry_after_past_the_budget_is_not_waited_for(api_server):
+    api_server.routes[("GET", "/datasets")] = lambda request, body: (429, {}, {"Retry-After": "120"})
+    policy = fast_policy(retry_budget=5)
+    client = HttpClient(api_key="key", url=api_server.url, retry_policy=policy)
+
+    started_at = time.monotonic()
+    with pytest.raises(requests.HTTPError):
+        client.get("/datasets")
+    assert time.monotonic() - started_at < 1
+    assert len(api_server.requests) == 1
+
+
+@pytest.mark.parametrize("method, status, attempts", [
+    ("GET", 500, 3),
+    ("GET", 400, 1),
+    ("POST", 429, 3),
+    ("POST", 503, 3),
+    ("POST", 500, 1),
+])
+def test_retried_statuses_depend_on_the_method(api_server, method, status, attempts):
+    api_server.routes[(method, "/resource")] = lambda request, body: (status, {"detail": "failed"})
+    policy = fast_policy()
+    client = HttpClient(api_key="key", url=api_server.url, retry_policy=policy)
+
+    with pytest.raises(requests.HTTPError):
+        client.get("/resource") if method == "GET" else client.post("/resource", json_data={})
+    assert len(api_server.requests) == attempts
+    assert policy.stats.snapshot()["exhausted"] == (1 if attempts > 1 else 0)
+
+
+def test_async_client_retries_with_retry_after(api_server):
+    replies = iter([(429, {}, {"Retry-After": "0.2"}), (200, {"ok": True})])
+    api_server.routes[("POST", "/completions")] = lambda request, body: next(replies)
+
+    async def post():
+        async with AsyncHTTPClient(api_server.url, retry_policy=fast_policy()) as client:
+            return await client.post("/completions", data={"model": "model"})
+
+    started_at = time.monotonic()
+    assert asyncio.run(post()) == {"ok": True}
+    assert time.monotonic() - started_at >= 0.2
+    assert len(api_server.requests) == 2
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+    retry_at = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert 28 <= parse_retry_after(retry_at) <= 30
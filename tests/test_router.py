@@ -0,0 +1,144 @@
+import asyncio
+import json
+import time
+
+import aiohttp
+import pydantic
+import pytest
+import requests
+
+from vendi_sdk import Vendi
+from vendi_sdk.completions.circuit_breaker import CircuitBreaker, CircuitOpenError
+from vendi_sdk.completions.router import should_fall_back
+from vendi_sdk.completions.structured import StructuredOutputError
+from vendi_sdk.core.retry import RetryPolicy
+from vendi_sdk.core.timeouts import DeadlineExceeded
+
+MESSAGES = [{"role": "user", "content": "Hi"}]
+
+
+def http_error(status: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+def completion(model: str) -> dict:
+    return {
+        "id": "completion", "created": 1, "model": model, "provider": model.split("/")[0], "elapsed_time": 0.01,
+        "choices": [{"finish_reason": "stop", "index": 0, "message": {"role": "assistant", "content": "Hello"}}],
+        "usage": {"completion_tokens": 1, "prompt_tokens": 2, "total_tokens": 3},
+    }
+
+
+@pytest.fixture()
+def statuses(api_server):
+    """
+    The status the API fails the requests to a model with
+    """
+    statuses = {}
+
+    def _complete(request, body):
+        model = json.loads(body)["model"]
+        if model in statuses:
+            return statuses[model], {"detail": "failed"}
+        return 200, completion(model)
+
+    api_server.routes[("POST", "/v1/chat/completions")] = _complete
+    return statuses
+
+
+def models_sent(api_server) -> list[str]:
+    return [json.loads(body)["model"] for _, path, body in api_server.requests if path == "/v1/chat/completions"]
+
+
+@pytest.mark.parametrize("exc", [
+    requests.ConnectionError(),
+    requests.Timeout(),
+    aiohttp.ClientConnectionError(),
+    http_error(429),
+    http_error(503),
+])
+def test_falls_back_on_connection_errors_and_retryable_statuses(exc):
+    assert should_fall_back(exc)
+
+
+@pytest.mark.parametrize("exc", [
+    DeadlineExceeded(),
+    CircuitOpenError("openai/gpt-4o", 10.0),
+    StructuredOutputError("Invalid output", "{"),
+    pydantic.ValidationError.from_exception_data("Completion", []),
+    ValueError("Invalid request"),
+    http_error(400),
+    http_error(401),
+    http_error(501),
+])
+def test_raises_other_errors(exc):
+    assert not should_fall_back(exc)
+
+
+def test_create_falls_back_to_the_next_model(api_server, statuses):
+    statuses["openai/gpt-4o"] = 503
+    client = Vendi(api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled())
+    router = client.completions.router(["openai/gpt-4o", "vendi/llama-3-8b-instruct"], exploration=0)
+
+    assert router.create(messages=MESSAGES).model == "vendi/llama-3-8b-instruct"
+    assert router.snapshot()["openai/gpt-4o"]["failures"] == 1
+
+    statuses["openai/gpt-4o"] = 400
+    with pytest.raises(requests.HTTPError):
+        router.create(messages=MESSAGES)
+    assert models_sent(api_server)[-1] == "openai/gpt-4o"
+    client.close()
+
+
+def test_models_with_an_open_circuit_come_last(api_server, statuses):
+    circuit_breaker = CircuitBreaker(minimum_calls=1, window_size=1, open_duration=60)
+    client = Vendi(
+        api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled(), circuit_breaker=circuit_breaker
+    )
+    router = client.completions.router(["openai/gpt-4o", "vendi/llama-3-8b-instruct"], exploration=0)
+    circuit_breaker.record_failure(circuit_breaker.acquire("openai/gpt-4o"))
+
+    assert router.rank() == ["vendi/llama-3-8b-instruct", "openai/gpt-4o"]
+    assert router.create(messages=MESSAGES).model == "vendi/llama-3-8b-instruct"
+
+    circuit_breaker.record_failure(circuit_breaker.acquire("vendi/llama-3-8b-instruct"))
+    with pytest.raises(CircuitOpenError):
+        router.create(messages=MESSAGES)
+    client.close()
+
+
+def test_models_out_of_trial_requests_are_skipped(api_server, statuses):
+    circuit_breaker = CircuitBreaker(minimum_calls=1, window_size=1, open_duration=0.01, half_open_calls=1)
+    client = Vendi(
+        api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled(), circuit_breaker=circuit_breaker
+    )
+    router = client.completions.router(["openai/gpt-4o", "vendi/llama-3-8b-instruct"], exploration=0)
+    circuit_breaker.record_failure(circuit_breaker.acquire("openai/gpt-4o"))
+    time.sleep(0.02)
+    # The only trial request of the half-open circuit is in flight
+    circuit_breaker.acquire("openai/gpt-4o")
+
+    assert router.rank()[0] == "openai/gpt-4o"
+    assert router.create(messages=MESSAGES).model == "vendi/llama-3-8b-instruct"
+    assert asyncio.run(router.acreate(messages=MESSAGES)).model == "vendi/llama-3-8b-instruct"
+    assert models_sent(api_server) == ["vendi/llama-3-8b-instruct"] * 2
+    assert router.snapshot()["openai/gpt-4o"]["failures"] == 0
+    client.close()
+
+
+def test_the_elapsed_time_of_the_models_is_scored(api_server):
+    elapsed_times = {"openai/gpt-4o": 5.0, "vendi/llama-3-8b-instruct": 0.5}
+    api_server.routes[("POST", "/v1/chat/completions")] = lambda request, body: (200, {
+        **completion(json.loads(body)["model"]), "elapsed_time": elapsed_times[json.loads(body)["model"]],
+    })
+    client = Vendi(api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled())
+    router = client.completions.router(list(elapsed_times), exploration=0)
+
+    router.create(messages=MESSAGES)
+    assert router.rank()[0] == "vendi/llama-3-8b-instruct"
+    router.create(messages=MESSAGES)
+    assert router.rank() == ["vendi/llama-3-8b-instruct", "openai/gpt-4o"]
+    assert router.snapshot()["openai/gpt-4o"]["elapsed_time"] == 5.0
+    client.close()
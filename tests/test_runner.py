@@ -0,0 +1,133 @@
+import asyncio
+import json
+
+import pytest
+
+from vendi_sdk import Vendi
+from vendi_sdk.completions.runner import CompletionRunner
+from vendi_sdk.core.retry import RetryPolicy
+
+REQUESTS = [{"model": "openai/gpt-4o", "messages": [{"role": "user", "content": f"message {i}"}]} for i in range(20)]
+
+
+def completion(content: str) -> dict:
+    return {
+        "id": "completion", "created": 1, "model": "openai/gpt-4o", "provider": "openai", "elapsed_time": 0.01,
+        "choices": [{"finish_reason": "stop", "index": 0, "message": {"role": "assistant", "content": content}}],
+        "usage": {"completion_tokens": 1, "prompt_tokens": 2, "total_tokens": 3},
+    }
+
+
+@pytest.fixture()
+def failing(api_server):
+    """
+    The contents of the requests the API fails, once each
+    """
+    failing = set()
+
+    def _complete(request, body):
+        content = json.loads(body)["messages"][0]["content"]
+        if content in failing:
+            failing.discard(content)
+            return 400, {"detail": "failed"}
+        return 200, completion(content)
+
+    api_server.routes[("POST", "/v1/chat/completions")] = _complete
+    return failing
+
+
+@pytest.fixture()
+def client(api_server):
+    client = Vendi(api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled())
+    yield client
+    client.close()
+
+
+@pytest.fixture()
+def requests_path(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    path.write_text("".join(json.dumps(request) + "\n" for request in REQUESTS))
+    return path
+
+
+def read_results(path) -> dict[int, dict]:
+    # The last line of a request is its final result
+    return {entry["index"]: entry for entry in map(json.loads, path.read_text().splitlines())}
+
+
+def sent(api_server) -> int:
+    return sum(1 for method, path, _ in api_server.requests if path == "/v1/chat/completions")
+
+
+def test_run_writes_every_result_and_checkpoints(api_server, failing, client, requests_path, tmp_path):
+    output = tmp_path / "results.jsonl"
+    runner = CompletionRunner(client.completions, output, max_concurrency=4)
+
+    summary = runner.run(requests_path)
+
+    assert (summary.succeeded, summary.failed, summary.skipped) == (20, 0, 0)
+    results = read_results(output)
+    assert sorted(results) == list(range(20))
+    assert all(results[i]["response"]["choices"][0]["message"]["content"] == f"message {i}" for i in range(20))
+    checkpoint = runner.load_checkpoint()
+    assert (checkpoint.position, checkpoint.input_offset) == (20, requests_path.stat().st_size)
+    assert checkpoint.output_offset == output.stat().st_size
+    assert (checkpoint.completed_ahead, checkpoint.succeeded, checkpoint.failed) == ([], 20, 0)
+
+
+@pytest.mark.parametrize("from_file", [True, False])
+def test_resume_sends_the_failed_requests_again(api_server, failing, client, requests_path, tmp_path, from_file):
+    output = tmp_path / "results.jsonl"
+    failing.update({"message 2", "message 11", "message 19"})
+    runner = CompletionRunner(client.completions, output, max_concurrency=4)
+
+    summary = runner.run(requests_path if from_file else iter(REQUESTS))
+    assert (summary.succeeded, summary.failed) == (17, 3)
+    assert [failed.position for failed in runner.load_checkpoint().failed_requests] == [2, 11, 19]
+
+    summary = runner.run(requests_path if from_file else iter(REQUESTS))
+    assert (summary.succeeded, summary.failed, summary.skipped) == (3, 0, 0)
+    assert sent(api_server) == 23
+    results = read_results(output)
+    assert all("response" in results[i] for i in range(20))
+    checkpoint = runner.load_checkpoint()
+    assert (checkpoint.failed_requests, checkpoint.succeeded, checkpoint.failed) == ([], 20, 0)
+
+
+def test_resume_skips_the_failed_requests_without_retry_failed(api_server, failing, client, requests_path, tmp_path):
+    output = tmp_path / "results.jsonl"
+    failing.update({"message 2", "message 11"})
+    CompletionRunner(client.completions, output).run(requests_path)
+
+    runner = CompletionRunner(client.completions, output, retry_failed=False)
+    summary = runner.run(requests_path)
+    assert (summary.succeeded, summary.failed, summary.skipped) == (0, 0, 0)
+    assert sent(api_server) == 20
+    assert [failed.position for failed in runner.load_checkpoint().failed_requests] == [2, 11]
+
+
+def test_resume_recovers_the_results_after_the_checkpoint(api_server, failing, client, requests_path, tmp_path):
+    output = tmp_path / "results.jsonl"
+    failing.add("message 5")
+    runner = CompletionRunner(client.completions, output)
+    runner.run(requests_path)
+    # Interrupted before its first checkpoint, while writing a result
+    (tmp_path / "results.jsonl.checkpoint").unlink()
+    with open(output, "ab") as f:
+        f.write(b'{"index": 20, "request_id": nu')
+
+    summary = runner.run(requests_path)
+
+    assert (summary.succeeded, summary.failed, summary.skipped) == (1, 0, 19)
+    assert sent(api_server) == 21
+    results = read_results(output)
+    assert sorted(results) == list(range(20)) and "response" in results[5]
+
+
+def test_run_from_a_running_event_loop(api_server, failing, client, requests_path, tmp_path):
+    runner = CompletionRunner(client.completions, tmp_path / "results.jsonl")
+
+    async def main():
+        return runner.run(requests_path)
+
+    assert asyncio.run(main()).succeeded == 20
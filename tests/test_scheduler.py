@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from vendi_sdk.completions.scheduler import Priority, PriorityScheduler, current_priority, priority
+from vendi_sdk.core.timeouts import DeadlineExceeded, deadline
+
+
+async def grant_order(scheduler: PriorityScheduler, lanes: list[Priority]) -> list[Priority]:
+    """
+    Queue a request per lane behind a held slot, then free the slots one at a time and record who gets them
+    """
+    held = await scheduler.aacquire(Priority.DEFAULT)
+    granted = []
+
+    async def request(lane):
+        granted.append(await scheduler.aacquire(lane))
+
+    tasks = [asyncio.ensure_future(request(lane)) for lane in lanes]
+    await asyncio.sleep(0.01)
+    scheduler.release(held)
+    while len(granted) < len(lanes):
+        count = len(granted)
+        while len(granted) == count:
+            await asyncio.sleep(0.001)
+        scheduler.release(granted[-1])
+    await asyncio.gather(*tasks)
+    return granted
+
+
+def test_slots_are_shared_by_weight():
+    scheduler = PriorityScheduler(max_concurrency=1, weights={"interactive": 3, "bulk": 1})
+    lanes = [Priority.BULK] * 4 + [Priority.INTERACTIVE] * 4
+
+    granted = asyncio.run(grant_order(scheduler, lanes))
+    # The bulk requests queued first, but the interactive lane gets three slots for every bulk one
+    assert granted == [Priority.INTERACTIVE] * 3 + [Priority.BULK, Priority.INTERACTIVE] + [Priority.BULK] * 3
+    assert scheduler.snapshot()["interactive"]["admitted"] == 4
+    assert scheduler.in_flight == 0
+
+
+def test_a_lane_alone_uses_the_whole_budget():
+    scheduler = PriorityScheduler(max_concurrency=3)
+
+    lanes = [scheduler.acquire(Priority.BULK) for _ in range(3)]
+    assert scheduler.in_flight == 3
+    with deadline(0.05), pytest.raises(DeadlineExceeded):
+        scheduler.acquire(Priority.INTERACTIVE)
+    assert scheduler.snapshot()["interactive"]["queued"] == 0
+    for lane in lanes:
+        scheduler.release(lane)
+    assert scheduler.in_flight == 0
+
+
+def test_requests_take_the_priority_of_their_context():
+    scheduler = PriorityScheduler()
+
+    assert current_priority() == Priority.DEFAULT
+    with priority("bulk"):
+        with priority(None):
+            assert scheduler.acquire() == Priority.BULK
+
+        async def acquire():
+            return await scheduler.aacquire()
+
+        assert asyncio.run(acquire()) == Priority.BULK
+        with priority(Priority.INTERACTIVE):
+            assert scheduler.acquire() == Priority.INTERACTIVE
+    assert current_priority() == Priority.DEFAULT
+    assert {lane: stats["in_flight"] for lane, stats in scheduler.snapshot().items()} == {
+        "interactive": 1, "default": 0, "bulk": 2,
+    }
@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from vendi_sdk.core.singleflight import AsyncSingleFlight, SingleFlight
+
+calls = []
+"""The calls that actually ran, across the callers."""
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+
+
+def wait_until(condition, timeout: float = 1):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.001)
+
+
+def run_callers(group: SingleFlight, fn, count: int) -> tuple[list, list[threading.Thread]]:
+    outcomes = []
+
+    def _call():
+        try:
+            outcomes.append(group.do("key", fn))
+        except Exception as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=_call) for _ in range(count)]
+    threads[0].start()
+    wait_until(lambda: calls)
+    for thread in threads[1:]:
+        thread.start()
+    wait_until(lambda: group.coalesced == count - 1)
+    return outcomes, threads
+
+
+def test_concurrent_calls_share_the_call_of_the_leader():
+    group = SingleFlight()
+    release = threading.Event()
+
+    def fn():
+        calls.append(1)
+        release.wait(1)
+        return "result"
+
+    outcomes, threads = run_callers(group, fn, 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert outcomes == ["result"] * 4
+    assert len(calls) == 1
+
+
+def test_the_error_of_the_leader_reaches_every_follower():
+    group = SingleFlight()
+    release = threading.Event()
+    error = ValueError("failed")
+
+    def fn():
+        calls.append(1)
+        release.wait(1)
+        raise error
+
+    outcomes, threads = run_callers(group, fn, 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert all(outcome is error for outcome in outcomes) and len(outcomes) == 4
+    assert len(calls) == 1
+
+
+def test_the_key_is_released_once_the_call_is_done():
+    group = SingleFlight()
+
+    def fail():
+        raise ValueError("failed")
+
+    with pytest.raises(ValueError):
+        group.do("key", fail)
+    assert group.do("key", lambda: 1) == 1
+    assert group.do("key", lambda: 2) == 2
+    assert group.do("other", lambda: 3) == 3
+    assert group.coalesced == 0
+
+
+def test_async_concurrent_calls_share_the_call_of_the_leader():
+    group = AsyncSingleFlight()
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(group.do("key", fn) for _ in range(4)))
+
+    assert asyncio.run(main()) == ["result"] * 4
+    assert len(calls) == 1
+    assert group.coalesced == 3
+
+
+def test_async_error_of_the_leader_reaches_every_follower():
+    group = AsyncSingleFlight()
+    error = ValueError("failed")
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise error
+
+    async def main():
+        return await asyncio.gather(*(group.do("key", fn) for _ in range(4)), return_exceptions=True)
+
+    outcomes = asyncio.run(main())
+    assert all(outcome is error for outcome in outcomes) and len(outcomes) == 4
+    assert len(calls) == 1
+
+
+def test_a_cancelled_async_leader_neither_cancels_nor_hangs_the_followers():
+    group = AsyncSingleFlight()
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        leader = asyncio.ensure_future(group.do("key", fn))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(group.do("key", fn)) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        results = await asyncio.wait_for(asyncio.gather(*followers), 1)
+        assert leader.cancelled()
+        return results
+
+    assert asyncio.run(main()) == ["result"] * 3
+    assert len(calls) == 1
+
+
+def test_async_key_is_released_once_the_call_is_done():
+    group = AsyncSingleFlight()
+
+    async def fn():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ValueError("failed")
+        return len(calls)
+
+    async def main():
+        with pytest.raises(ValueError):
+            await group.do("key", fn)
+        assert await group.do("key", fn) == 2
+        assert await group.do("key", fn) == 3
+
+    asyncio.run(main())
+    assert group.coalesced == 0
@@ -0,0 +1,147 @@
+import asyncio
+import gc
+import json
+
+import pytest
+
+from vendi_sdk import Vendi
+from vendi_sdk.completions.concurrency import AdaptiveConcurrencyLimiter
+from vendi_sdk.completions.streaming import CompletionStreamError
+from vendi_sdk.core.retry import RetryPolicy
+from vendi_sdk.core.sse import SSEDecoder
+from vendi_sdk.core.timeouts import deadline
+
+MESSAGES = [{"role": "user", "content": "Hi"}]
+
+
+def chunk_event(content: str, **extra) -> bytes:
+    chunk = {
+        "id": "completion", "created": 1, "model": "openai/gpt-4o",
+        "choices": [{"index": 0, "delta": {"role": "assistant", "content": content}, "finish_reason": None}],
+        **extra,
+    }
+    return b"data: " + json.dumps(chunk).encode() + b"\n\n"
+
+
+def decode(stream: bytes, size: int) -> list:
+    decoder = SSEDecoder()
+    events = []
+    for i in range(0, len(stream), size):
+        events += decoder.feed(stream[i:i + size])
+    return events + decoder.flush()
+
+
+def test_decoder_joins_multi_line_data():
+    events = decode(b"event: update\ndata: first\ndata:second\ndata:  third\nid: 7\n\n", 1000)
+    assert [(event.event, event.data, event.id) for event in events] == [("update", b"first\nsecond\n third", "7")]
+
+
+def test_decoder_ignores_comments_and_keep_alives():
+    events = decode(b": keep-alive\n\n:\n\ndata: a\n: in the middle\ndata: b\n\n\n\n", 1000)
+    assert [event.data for event in events] == [b"a\nb"]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_decoder_handles_events_split_across_chunks(size):
+    stream = b"data: {\"a\": \"\xc3\xa9\"}\r\n\r\n: ping\n\nevent: done\r\ndata: [DONE]\n\ndata: last"
+    events = decode(stream, size)
+    assert [(event.event, event.data) for event in events] == [
+        ("message", '{"a": "é"}'.encode()), ("done", b"[DONE]"), ("message", b"last"),
+    ]
+
+
+@pytest.fixture()
+def stream(api_server):
+    """
+    The bytes of the event stream sent by the API, in the chunks they are sent in
+    """
+    chunks = []
+    api_server.routes[("POST", "/v1/chat/completions")] = lambda request, body: (200, iter(list(chunks)))
+    return chunks
+
+
+@pytest.fixture()
+def client(api_server):
+    client = Vendi(api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled())
+    yield client
+    client.close()
+
+
+def split(data: bytes, size: int) -> list[bytes]:
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 5, 1000])
+def test_stream_aggregates_the_chunks_until_done(stream, client, size):
+    data = b": keep-alive\n\n" + chunk_event("Hel") + chunk_event("lo", usage={
+        "completion_tokens": 2, "prompt_tokens": 1, "total_tokens": 3,
+    }) + b"data: [DONE]\n\n" + chunk_event(" ignored")
+    stream.extend(split(data, size))
+
+    completion = client.completions.create(model="openai/gpt-4o", messages=MESSAGES, stream=True)
+    assert [chunk.choices[0].delta.content for chunk in completion] == ["Hel", "lo"]
+    assert completion.final_response.choices[0].message.content == "Hello"
+    assert completion.final_response.usage.total_tokens == 3
+
+
+@pytest.mark.parametrize("error_event", [
+    b"event: error\ndata: {\"error\": {\"message\": \"Provider overloaded\"}}\n\n",
+    b"data: {\"error\": {\"message\": \"Provider overloaded\", \"code\": 503}}\n\n",
+])
+def test_stream_raises_the_errors_sent_mid_stream(stream, client, error_event):
+    stream.extend(split(chunk_event("Hel") + error_event + chunk_event("lo"), 7))
+
+    completion = client.completions.create(model="openai/gpt-4o", messages=MESSAGES, stream=True)
+    assert next(completion).choices[0].delta.content == "Hel"
+    with pytest.raises(CompletionStreamError, match="Provider overloaded"):
+        next(completion)
+
+
+def test_async_stream_raises_the_errors_sent_mid_stream(stream, client):
+    stream.extend(split(chunk_event("Hel") + b"event: error\ndata: upstream timeout\n\n", 3))
+
+    async def consume():
+        contents = []
+        completion = await client.completions.acreate(model="openai/gpt-4o", messages=MESSAGES, stream=True)
+        with pytest.raises(CompletionStreamError, match="upstream timeout"):
+            async for chunk in completion:
+                contents.append(chunk.choices[0].delta.content)
+        return contents
+
+    assert asyncio.run(consume()) == ["Hel"]
+
+
+@pytest.mark.parametrize("consumed", [0, 1])
+def test_dropped_streams_give_back_their_slot(stream, api_server, consumed):
+    stream.extend([chunk_event("Hel"), chunk_event("lo"), b"data: [DONE]\n\n"])
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+    client = Vendi(api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled(),
+                   concurrency_limiter=limiter)
+
+    for _ in range(3):
+        # Would wait forever for the slot of the previous stream if it was kept
+        with deadline(5):
+            completion = client.completions.create(model="openai/gpt-4o", messages=MESSAGES, stream=True)
+        for _ in range(consumed):
+            next(completion)
+        assert limiter.in_flight == 1
+        del completion
+        assert limiter.in_flight == 0
+    client.close()
+
+
+def test_dropped_async_streams_give_back_their_slot(stream, api_server):
+    stream.extend([chunk_event("Hel"), chunk_event("lo"), b"data: [DONE]\n\n"])
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+    client = Vendi(api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled(),
+                   concurrency_limiter=limiter)
+
+    async def drop():
+        completion = await client.completions.acreate(model="openai/gpt-4o", messages=MESSAGES, stream=True)
+        await completion.__anext__()
+        del completion
+        gc.collect()
+        return limiter.in_flight
+
+    assert asyncio.run(drop()) == 0
+    client.close()
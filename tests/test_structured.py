@@ -0,0 +1,78 @@
+import json
+
+import pytest
+from pydantic import BaseModel
+
+from vendi_sdk import Vendi
+from vendi_sdk.completions.schema import CompletionParams
+from vendi_sdk.completions.structured import SchemaRegistry, StructuredOutputError
+from vendi_sdk.core.retry import RetryPolicy
+
+SCHEMA = {"type": "object", "properties": {"name": {"type": "string"}}, "required": ["name"]}
+
+
+class Person(BaseModel):
+    name: str
+    age: int
+
+
+def test_schemas_are_compiled_once():
+    registry = SchemaRegistry()
+
+    compiled = registry.compile(json.dumps(SCHEMA))
+    assert registry.compile(json.dumps(SCHEMA)) is compiled
+    # Dicts are keyed by their canonical text, whatever the order of their keys
+    assert registry.compile(SCHEMA) is registry.compile(dict(reversed(SCHEMA.items())))
+    assert registry.compile(Person) is registry.compile(Person)
+    assert (registry.hits, registry.misses, len(registry)) == (3, 3, 3)
+
+
+def test_least_recently_used_schemas_are_evicted():
+    registry = SchemaRegistry(max_entries=1)
+
+    compiled = registry.compile(SCHEMA)
+    registry.compile(Person)
+    assert len(registry) == 1
+    assert registry.compile(SCHEMA) is not compiled
+
+
+@pytest.mark.parametrize("schema", ["3", '"object"', "[1]", "null", "{", {"type": 12}])
+def test_invalid_schemas_raise_value_errors(schema):
+    with pytest.raises(ValueError, match="Passed schema"):
+        SchemaRegistry().compile(schema)
+
+
+def test_invalid_schemas_fail_the_request_validation():
+    with pytest.raises(ValueError):
+        CompletionParams(json_schema="3")
+    assert CompletionParams(json_schema="true").json_schema == "true"
+
+
+def test_content_is_validated_against_the_schema():
+    compiled = SchemaRegistry().compile(SCHEMA)
+
+    assert compiled.parse('{"name": "Ada"}') == {"name": "Ada"}
+    with pytest.raises(StructuredOutputError, match="does not match the schema") as error:
+        compiled.parse('{"name": 1}')
+    assert error.value.content == '{"name": 1}'
+    with pytest.raises(StructuredOutputError, match="not valid JSON"):
+        compiled.parse('{"name": ')
+    assert not compiled.is_valid("{}")
+
+
+def test_create_structured_parses_the_content(api_server):
+    contents = ['{"name": "Ada", "age": 36}', '{"name": "Ada"}']
+    api_server.routes[("POST", "/v1/chat/completions")] = lambda request, body: (200, {
+        "id": "completion", "created": 1, "model": "openai/gpt-4o", "provider": "openai", "elapsed_time": 0.01,
+        "choices": [{"finish_reason": "stop", "index": 0, "message": {"role": "assistant", "content": contents.pop(0)}}],
+        "usage": {"completion_tokens": 1, "prompt_tokens": 2, "total_tokens": 3},
+    })
+    client = Vendi(api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled())
+    messages = [{"role": "user", "content": "Who?"}]
+
+    assert client.completions.create_structured("openai/gpt-4o", messages, schema=Person) == Person(name="Ada", age=36)
+    with pytest.raises(StructuredOutputError, match="does not match Person") as error:
+        client.completions.create_structured("openai/gpt-4o", messages, schema=Person)
+    assert error.value.content == '{"name": "Ada"}'
+    assert json.loads(json.loads(api_server.requests[0][2])["json_schema"]) == Person.model_json_schema()
+    client.close()
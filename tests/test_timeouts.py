@@ -0,0 +1,201 @@
+import asyncio
+import threading
+import time
+
+import aiohttp
+import pytest
+import requests
+
+from vendi_sdk import Vendi
+from vendi_sdk.completions.concurrency import AdaptiveConcurrencyLimiter
+from vendi_sdk.completions.rate_limit import RateLimit, RateLimiter
+from vendi_sdk.core.retry import RetryPolicy
+from vendi_sdk.core.timeouts import DeadlineExceeded, Timeout, deadline
+
+MODEL = "openai/gpt-4o"
+MESSAGES = [{"role": "user", "content": "Hi"}]
+COMPLETION = {
+    "id": "completion", "created": 1, "model": MODEL, "provider": "openai", "elapsed_time": 0.01,
+    "choices": [{"finish_reason": "stop", "index": 0, "message": {"role": "assistant", "content": "Hello"}}],
+    "usage": {"completion_tokens": 1, "prompt_tokens": 2, "total_tokens": 3},
+}
+
+
+def route(api_server, delay: float = 0.0, status: int = 200):
+    def _complete(request, body):
+        time.sleep(delay)
+        return (200, COMPLETION) if status == 200 else (status, {"detail": "overloaded"})
+
+    api_server.routes[("POST", "/v1/chat/completions")] = _complete
+
+
+def sent(api_server) -> int:
+    return sum(path == "/v1/chat/completions" for _, path, _ in api_server.requests)
+
+
+def retrying() -> RetryPolicy:
+    return RetryPolicy(max_attempts=10, backoff_base=0.01, backoff_max=0.01)
+
+
+def test_the_deadline_stops_the_retries_of_a_slow_route(api_server):
+    route(api_server, delay=0.15, status=503)
+    client = Vendi(api_url=api_server.url, api_key="key", retry_policy=retrying())
+
+    started_at = time.monotonic()
+    with deadline(0.2), pytest.raises(DeadlineExceeded):
+        client.completions.create(model=MODEL, messages=MESSAGES)
+    # The second attempt only had what the first one left, and no third one was sent
+    assert time.monotonic() - started_at < 0.4
+    assert sent(api_server) == 2
+    client.close()
+
+
+def test_the_deadline_stops_the_async_retries_of_a_slow_route(api_server):
+    route(api_server, delay=0.15, status=503)
+
+    async def main():
+        async with Vendi(api_url=api_server.url, api_key="key", retry_policy=retrying()) as client:
+            with deadline(0.2):
+                await client.completions.acreate(model=MODEL, messages=MESSAGES)
+
+    started_at = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(main())
+    assert time.monotonic() - started_at < 0.4
+    assert sent(api_server) == 2
+
+
+def test_the_deadline_covers_the_wait_for_the_rate_limit(api_server):
+    route(api_server)
+    client = Vendi(
+        api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled(),
+        rate_limiter=RateLimiter(default=RateLimit(requests_per_minute=1)),
+    )
+    client.completions.create(model=MODEL, messages=MESSAGES)
+
+    started_at = time.monotonic()
+    with deadline(0.5), pytest.raises(DeadlineExceeded):
+        client.completions.create(model=MODEL, messages=MESSAGES)
+    # The next slot is a minute away, so the call fails at once instead of waiting
+    assert time.monotonic() - started_at < 0.1
+    assert sent(api_server) == 1
+    client.close()
+
+
+def test_the_wait_for_a_slot_is_taken_from_the_deadline_of_the_request(api_server):
+    route(api_server, delay=0.5)
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+    client = Vendi(
+        api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled(), concurrency_limiter=limiter
+    )
+    limiter.acquire()
+    threading.Timer(0.2, limiter.release).start()
+
+    started_at = time.monotonic()
+    with deadline(0.4), pytest.raises(DeadlineExceeded):
+        client.completions.create(model=MODEL, messages=MESSAGES)
+    # Waited for the slot, then had only the rest of the deadline for the response
+    assert 0.4 <= time.monotonic() - started_at < 0.6
+    assert sent(api_server) == 1
+    assert limiter.in_flight == 0
+    client.close()
+
+
+def test_the_async_wait_for_a_slot_is_taken_from_the_deadline_of_the_request(api_server):
+    route(api_server, delay=0.5)
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+
+    async def main():
+        async with Vendi(
+            api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled(), concurrency_limiter=limiter
+        ) as client:
+            await limiter.aacquire()
+            asyncio.get_running_loop().call_later(0.2, limiter.release)
+            with deadline(0.4):
+                await client.completions.acreate(model=MODEL, messages=MESSAGES)
+
+    started_at = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(main())
+    assert 0.4 <= time.monotonic() - started_at < 0.6
+    assert sent(api_server) == 1
+
+
+def test_the_read_timeout_of_the_client_bounds_every_attempt(api_server):
+    route(api_server, delay=0.5)
+    client = Vendi(
+        api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled(), timeout=Timeout(connect=1, read=0.1)
+    )
+
+    started_at = time.monotonic()
+    with pytest.raises(requests.ReadTimeout):
+        client.completions.create(model=MODEL, messages=MESSAGES)
+    assert time.monotonic() - started_at < 0.4
+
+    with pytest.raises(requests.ReadTimeout):
+        client.completions.create(model=MODEL, messages=MESSAGES, timeout=Timeout(read=0.1))
+    client.close()
+
+
+def test_the_read_timeout_of_the_async_client_bounds_every_attempt(api_server):
+    route(api_server, delay=0.5)
+
+    async def main(timeout):
+        async with Vendi(
+            api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled(), timeout=timeout
+        ) as client:
+            await client.completions.acreate(model=MODEL, messages=MESSAGES)
+
+    started_at = time.monotonic()
+    with pytest.raises(aiohttp.ServerTimeoutError):
+        asyncio.run(main(Timeout(connect=1, read=0.1)))
+    assert time.monotonic() - started_at < 0.4
+
+
+def test_the_timeouts_reach_requests(api_server, monkeypatch):
+    route(api_server)
+    timeouts = []
+    request = requests.Session.request
+
+    def spy(self, method, url, **kwargs):
+        timeouts.append(kwargs["timeout"])
+        return request(self, method, url, **kwargs)
+
+    monkeypatch.setattr(requests.Session, "request", spy)
+    client = Vendi(
+        api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled(), timeout=Timeout(connect=3, read=7)
+    )
+
+    client.completions.create(model=MODEL, messages=MESSAGES)
+    client.completions.create(model=MODEL, messages=MESSAGES, timeout=2)
+    with deadline(1):
+        client.completions.create(model=MODEL, messages=MESSAGES)
+    assert timeouts[0] == (3, 7)
+    assert timeouts[1] == (2, 2)
+    assert all(0 < value <= 1 for value in timeouts[2])
+    client.close()
+
+
+def test_the_timeouts_reach_aiohttp(api_server, monkeypatch):
+    route(api_server)
+    timeouts = []
+    request = aiohttp.ClientSession.request
+
+    def spy(self, method, url, **kwargs):
+        timeouts.append(kwargs["timeout"])
+        return request(self, method, url, **kwargs)
+
+    monkeypatch.setattr(aiohttp.ClientSession, "request", spy)
+
+    async def main():
+        async with Vendi(
+            api_url=api_server.url, api_key="key", retry_policy=RetryPolicy.disabled(),
+            timeout=Timeout(connect=3, read=7, total=20),
+        ) as client:
+            await client.completions.acreate(model=MODEL, messages=MESSAGES)
+            with deadline(1):
+                await client.completions.acreate(model=MODEL, messages=MESSAGES)
+
+    asyncio.run(main())
+    assert (timeouts[0].sock_connect, timeouts[0].sock_read, timeouts[0].total) == (3, 7, 20)
+    assert all(0 < value <= 1 for value in (timeouts[1].sock_connect, timeouts[1].sock_read, timeouts[1].total))
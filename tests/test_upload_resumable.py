@@ -0,0 +1,107 @@
+import base64
+import hashlib
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from vendi_sdk.core.retry import RetryPolicy
+from vendi_sdk.datasets import Datasets
+from vendi_sdk.datasets.upload import UploadIncompleteError
+
+
+class _UploadServer(ThreadingHTTPServer):
+    """
+    A stand-in for the upload sessions of the datasets API, failing the parts in `failing` once
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _UploadHandler)
+        self.sessions = {}
+        self.failing = set()
+        self.sent_parts = []
+        self.lock = threading.Lock()
+
+
+class _UploadHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path == "/platform/v1/datasets/uploads":
+            session = {"id": f"upload-{len(self.server.sessions)}", "size": body["size"],
+                       "part_size": body["part_size"], "name": body["name"], "parts": {}}
+            self.server.sessions[session["id"]] = session
+            return self._reply(200, self._session(session))
+        session = self.server.sessions[re.match(r".*/uploads/([^/]+)/complete", self.path).group(1)]
+        session["data"] = b"".join(session["parts"][part["number"]][0] for part in body["parts"])
+        self._reply(200, {
+            "id": "00000000-0000-0000-0000-000000000001", "created_at": "2024-01-01T00:00:00",
+            "updated_at": "2024-01-01T00:00:00", "created_by": "user", "tenant": "tenant",
+            "name": session["name"], "path": "datasets",
+        })
+
+    def do_GET(self):
+        session = self.server.sessions[self.path.rsplit("/", 1)[1]]
+        self._reply(200, self._session(session))
+
+    def do_PUT(self):
+        upload_id, number = re.match(r".*/uploads/([^/]+)/parts/(\d+)", self.path).groups()
+        data = self.rfile.read(int(self.headers["Content-Length"]))
+        digest = base64.b64encode(hashlib.sha256(data).digest()).decode()
+        with self.server.lock:
+            self.server.sent_parts.append(int(number))
+            if int(number) in self.server.failing:
+                self.server.failing.discard(int(number))
+                return self._reply(400, {"detail": "failed"})
+        if self.headers["Content-Digest"] != f"sha-256=:{digest}:":
+            return self._reply(400, {"detail": "checksum mismatch"})
+        self.server.sessions[upload_id]["parts"][int(number)] = (data, digest)
+        self._reply(200, {"number": int(number), "size": len(data), "checksum": digest})
+
+    @staticmethod
+    def _session(session):
+        parts = [{"number": n, "size": len(d), "checksum": c} for n, (d, c) in session["parts"].items()]
+        return {"id": session["id"], "size": session["size"], "part_size": session["part_size"], "parts": parts}
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture()
+def upload_server():
+    server = _UploadServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+
+def test_upload_resumable_only_sends_the_failed_parts_again(upload_server, tmp_path):
+    data_path = tmp_path / "conversation.jsonl"
+    rows = [{"messages": [{"role": "user", "content": f"message {i}"}]} for i in range(1000)]
+    data_path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    datasets = Datasets(
+        url=f"http://127.0.0.1:{upload_server.server_port}", api_key="key", retry_policy=RetryPolicy.disabled()
+    )
+    upload_server.failing = {2, 5}
+
+    with pytest.raises(UploadIncompleteError) as exc:
+        datasets.upload_resumable(name="conversation", data_path=data_path, part_size=4096, max_workers=3)
+    assert set(exc.value.errors) == {2, 5}
+    parts = len(upload_server.sent_parts)
+
+    dataset = datasets.upload_resumable(
+        name="conversation", data_path=data_path, part_size=4096, upload_id=exc.value.upload_id
+    )
+    assert sorted(upload_server.sent_parts[parts:]) == [2, 5]
+    assert dataset.name == "conversation.jsonl"
+    assert upload_server.sessions[exc.value.upload_id]["data"] == data_path.read_bytes()
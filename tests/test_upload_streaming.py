@@ -0,0 +1,70 @@
+import io
+import json
+
+import pytest
+
+from vendi_sdk.datasets import Datasets
+from vendi_sdk.datasets.upload import RowSource, UploadBody
+
+ROWS = [
+    {"text": 'She said "hi" \\ and left', "path": "C:\\\\data\\\\file.txt"},
+    {"text": "tab\there, bell\x07, escape\x1b, nul\x00, line\nbreak and carriage\rreturn"},
+    {"text": "héllo wörld, 日本語, emoji 🐍🚀, combining e\u0301, line separator \u2028"},
+]
+# Raw tabs and carriage returns between the tokens are control characters of the JSONL text itself
+JSONL = "".join(json.dumps(row, ensure_ascii=False).replace(": ", ":\t") + "\r\n" for row in ROWS)
+
+
+def sources(tmp_path):
+    path = tmp_path / "rows.jsonl"
+    path.write_bytes(JSONL.encode())
+    return {
+        "path": lambda: str(path),
+        "binary file": lambda: io.BytesIO(JSONL.encode()),
+        "text file": lambda: io.StringIO(JSONL),
+    }
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64])
+def test_chunks_are_escaped_into_the_body(tmp_path, chunk_size):
+    for name, source in sources(tmp_path).items():
+        body = b"".join(UploadBody({"name": "rows.jsonl"}, RowSource(source()), chunk_size=chunk_size))
+
+        document = json.loads(body)
+        assert document["name"] == "rows.jsonl"
+        assert document["data"] == JSONL, name
+        assert [json.loads(line) for line in document["data"].split("\n") if line.strip()] == ROWS
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1024])
+def test_rows_are_escaped_into_the_body(chunk_size):
+    body = b"".join(UploadBody({}, RowSource(iter(ROWS)), chunk_size=chunk_size))
+
+    assert [json.loads(line) for line in json.loads(body)["data"].split("\n") if line] == ROWS
+
+
+def test_invalid_lines_fail_before_they_are_sent():
+    lines = b'{"a": 1}\n\n{"a": 2}\n{"a": broken'
+    sent = []
+
+    with pytest.raises(ValueError, match="line 4"):
+        for chunk in UploadBody({}, RowSource(io.BytesIO(lines)), chunk_size=4):
+            sent.append(chunk)
+    assert b"broken" not in b"".join(sent)
+
+    with pytest.raises(ValueError, match="line 2 is not"):
+        list(UploadBody({}, RowSource(io.BytesIO(b'{"a": 1}\n[1, 2]\n'))))
+
+
+def test_upload_streams_the_file(api_server, tmp_path):
+    api_server.routes[("POST", "/platform/v1/datasets/upload")] = lambda request, body: (200, {
+        "id": "00000000-0000-0000-0000-000000000001", "created_at": "2024-01-01T00:00:00",
+        "updated_at": "2024-01-01T00:00:00", "created_by": "user", "tenant": "tenant", "name": "rows.jsonl",
+        "path": "datasets",
+    })
+    path = tmp_path / "rows.jsonl"
+    path.write_bytes(JSONL.encode())
+
+    Datasets(url=api_server.url, api_key="key").upload(name="rows", data_path=str(path))
+    _, _, body = api_server.requests[-1]
+    assert json.loads(body)["data"] == JSONL